@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sistemaGestion.metricas.MetricasMiddleware',
+    'sistemaGestion.diagnostico.DiagnosticoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -89,6 +91,17 @@ DATABASES = {
 }
 
 
+# Cache compartida por todos los procesos (workers web y comandos de manage.py), para que la
+# invalidación de reportes y tarifas hecha en uno se vea en los demás. Usa una tabla de la misma
+# base de datos, que se crea con: python manage.py createcachetable
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_sistema',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,3 +147,14 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Token que permite al recolector de Prometheus leer /metrics sin sesión
+# (cabecera "Authorization: Bearer <token>"); vacío = solo el rol Administrador
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Diagnóstico de consultas: registra las consultas lentas (con su EXPLAIN) y los patrones N+1
+# en un archivo que rota por tamaño; el resumen está en /diagnostico/sql/ (solo Administrador)
+DIAGNOSTICO_SQL = os.environ.get('DIAGNOSTICO_SQL', '') == '1'
+DIAGNOSTICO_SQL_UMBRAL_MS = 100
+DIAGNOSTICO_SQL_REPETICIONES = 5
+DIAGNOSTICO_SQL_ARCHIVO = BASE_DIR / 'logs' / 'diagnostico_sql.log'
@@ -2,10 +2,10 @@ from django.contrib import admin
 from django import forms
 from django.contrib import messages
 from datetime import date
-from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, NotificacionLectura, NotificacionPago, Usuario
+from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, NotificacionLectura, NotificacionPago, Usuario, ReferenciaHuerfana
 
 # ==========================================================
-# FORMS PERSONALIZADOS PARA MENÚS DESPLEGABLES
+# FORMS PERSONALIZADOS PARA LAS RELACIONES
 # ==========================================================
 
 class ClienteAdminForm(forms.ModelForm):
@@ -15,11 +15,8 @@ class ClienteAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para usuario_asociado
-        usuarios = Usuario.objects.all()
-        choices = [('', '---------')]  # Opción vacía
-        choices += [(usuario.username, f"{usuario.username} ({usuario.rol})") for usuario in usuarios]
-        self.fields['usuario_asociado'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para usuario
+        self.fields['usuario'].label_from_instance = lambda usuario: f"{usuario.username} ({usuario.rol})"
 
 class ContratoAdminForm(forms.ModelForm):
     class Meta:
@@ -28,11 +25,8 @@ class ContratoAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para cliente_numero
-        clientes = Cliente.objects.all()
-        choices = [('', '---------')]
-        choices += [(cliente.numero_cliente, f"{cliente.numero_cliente} - {cliente.nombre}") for cliente in clientes]
-        self.fields['cliente_numero'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para cliente
+        self.fields['cliente'].label_from_instance = lambda cliente: f"{cliente.numero_cliente} - {cliente.nombre}"
 
 class MedidorAdminForm(forms.ModelForm):
     class Meta:
@@ -41,11 +35,8 @@ class MedidorAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para contrato_numero
-        contratos = Contrato.objects.all()
-        choices = [('', '---------')]
-        choices += [(contrato.numero_contrato, f"{contrato.numero_contrato} - {contrato.estado}") for contrato in contratos]
-        self.fields['contrato_numero'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para contrato
+        self.fields['contrato'].label_from_instance = lambda contrato: f"{contrato.numero_contrato} - {contrato.estado}"
 
 class LecturaAdminForm(forms.ModelForm):
     class Meta:
@@ -54,11 +45,8 @@ class LecturaAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para medidor_numero
-        medidores = Medidor.objects.all()
-        choices = [('', '---------')]
-        choices += [(medidor.numero_medidor, f"{medidor.numero_medidor} - {medidor.ubicacion}") for medidor in medidores]
-        self.fields['medidor_numero'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para medidor
+        self.fields['medidor'].label_from_instance = lambda medidor: f"{medidor.numero_medidor} - {medidor.ubicacion}"
 
 class BoletaAdminForm(forms.ModelForm):
     class Meta:
@@ -67,17 +55,11 @@ class BoletaAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para cliente_numero
-        clientes = Cliente.objects.all()
-        choices = [('', '---------')]
-        choices += [(cliente.numero_cliente, f"{cliente.numero_cliente} - {cliente.nombre}") for cliente in clientes]
-        self.fields['cliente_numero'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para cliente
+        self.fields['cliente'].label_from_instance = lambda cliente: f"{cliente.numero_cliente} - {cliente.nombre}"
         
-        # ✅ MENÚ DESPLEGABLE para lectura_id
-        lecturas = Lectura.objects.all()
-        lectura_choices = [('', '---------')]
-        lectura_choices += [(str(lectura.id), f"Lectura #{lectura.id} - {lectura.fecha_lectura}") for lectura in lecturas]
-        self.fields['lectura_id'].widget = forms.Select(choices=lectura_choices)
+        # ✅ Texto del autocompletado para lectura
+        self.fields['lectura'].label_from_instance = lambda lectura: f"Lectura #{lectura.id} - {lectura.fecha_lectura}"
 
 class PagoAdminForm(forms.ModelForm):
     class Meta:
@@ -86,26 +68,39 @@ class PagoAdminForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ MENÚ DESPLEGABLE para boleta_id
-        boletas = Boleta.objects.all()
-        choices = [('', '---------')]
-        choices += [(str(boleta.id), f"Boleta #{boleta.id} - ${boleta.monto_total}") for boleta in boletas]
-        self.fields['boleta_id'].widget = forms.Select(choices=choices)
+        # ✅ Texto del autocompletado para boleta
+        self.fields['boleta'].label_from_instance = lambda boleta: f"Boleta #{boleta.id} - ${boleta.monto_total}"
+
+# ==========================================================
+# BÚSQUEDA INDEXADA PARA EL AUTOCOMPLETADO
+# ==========================================================
+# las relaciones se eligen con autocomplete_fields, que consulta los search_fields del
+# admin relacionado; se usan búsquedas por prefijo (^) sobre columnas indexadas
+class BusquedaPorIdMixin:
+    """Si el término de búsqueda es numérico se busca por id, que es la clave primaria"""
+    def get_search_results(self, request, queryset, search_term):
+        termino = search_term.strip()
+        if termino.isdigit():
+            return queryset.filter(pk=int(termino)), False
+        return super().get_search_results(request, queryset, search_term)
 
 # ==========================================================
 # CONFIGURACIÓN DEL ADMIN - CLIENTE (MODIFICADO)
 # ==========================================================
 class ClienteAdmin(admin.ModelAdmin):
     form = ClienteAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('numero_cliente', 'nombre', 'email', 'telefono', 'usuario_asociado')
-    list_filter = ('numero_cliente', 'usuario_asociado')
-    search_fields = ('numero_cliente', 'nombre', 'email', 'telefono', 'usuario_asociado')
+    list_display = ('numero_cliente', 'nombre', 'email', 'telefono', 'tipo_cliente', 'usuario')
+    list_filter = ('tipo_cliente',)
+    list_select_related = ('usuario',)
+    search_fields = ('^numero_cliente', '^nombre', '^email')
+    autocomplete_fields = ('usuario',)
     ordering = ('numero_cliente',)
     
     fieldsets = (
         ('Información del Cliente', {'fields': ('numero_cliente', 'nombre')}),
         ('Contacto', {'fields': ('email', 'telefono')}),
-        ('Relaciones', {'fields': ('usuario_asociado',)}),
+        ('Facturación', {'fields': ('tipo_cliente',)}),
+        ('Relaciones', {'fields': ('usuario',)}),
     )
     
     def get_readonly_fields(self, request, obj=None):
@@ -118,14 +113,16 @@ class ClienteAdmin(admin.ModelAdmin):
 # ==========================================================
 class ContratoAdmin(admin.ModelAdmin):
     form = ContratoAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('numero_contrato', 'cliente_numero', 'fecha_inicio', 'fecha_fin', 'estado')
-    list_filter = ('estado', 'fecha_inicio', 'cliente_numero')
-    search_fields = ('numero_contrato', 'cliente_numero')
+    list_display = ('numero_contrato', 'cliente', 'fecha_inicio', 'fecha_fin', 'estado')
+    list_filter = ('estado', 'fecha_inicio')
+    list_select_related = ('cliente',)
+    search_fields = ('^numero_contrato',)
+    autocomplete_fields = ('cliente',)
     ordering = ('-fecha_inicio',)
     
     fieldsets = (
         ('Información del Contrato', {'fields': ('numero_contrato', 'estado')}),
-        ('Relaciones', {'fields': ('cliente_numero',)}),
+        ('Relaciones', {'fields': ('cliente',)}),
         ('Periodo de Vigencia', {'fields': ('fecha_inicio', 'fecha_fin')}),
     )
     
@@ -153,14 +150,16 @@ class TarifaAdmin(admin.ModelAdmin):
 # ==========================================================
 class MedidorAdmin(admin.ModelAdmin):
     form = MedidorAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('numero_medidor', 'contrato_numero', 'ubicacion', 'estado_medidor', 'fecha_instalacion')
-    list_filter = ('estado_medidor', 'fecha_instalacion', 'contrato_numero')
-    search_fields = ('numero_medidor', 'ubicacion', 'contrato_numero')
+    list_display = ('numero_medidor', 'contrato', 'ubicacion', 'estado_medidor', 'fecha_instalacion')
+    list_filter = ('estado_medidor', 'fecha_instalacion')
+    list_select_related = ('contrato',)
+    search_fields = ('^numero_medidor',)
+    autocomplete_fields = ('contrato',)
     ordering = ('numero_medidor',)
     
     fieldsets = (
         ('Identificación del Medidor', {'fields': ('numero_medidor', 'ubicacion')}),
-        ('Relaciones', {'fields': ('contrato_numero',)}),
+        ('Relaciones', {'fields': ('contrato',)}),
         ('Estado y Fecha', {'fields': ('estado_medidor', 'fecha_instalacion')}),
         ('Imágenes', {'fields': ('imagen_ubicacion', 'imagen_fisica')}),
     )
@@ -173,16 +172,18 @@ class MedidorAdmin(admin.ModelAdmin):
 # ==========================================================
 # CONFIGURACIÓN DEL ADMIN - LECTURA (MODIFICADO)
 # ==========================================================
-class LecturaAdmin(admin.ModelAdmin):
+class LecturaAdmin(BusquedaPorIdMixin, admin.ModelAdmin):
     form = LecturaAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('fecha_lectura', 'medidor_numero', 'consumo_energetico', 'tipo_lectura', 'lectura_actual')
-    list_filter = ('tipo_lectura', 'fecha_lectura', 'medidor_numero')
-    search_fields = ('tipo_lectura', 'medidor_numero')
+    list_display = ('fecha_lectura', 'medidor', 'consumo_energetico', 'tipo_lectura', 'lectura_actual')
+    list_filter = ('tipo_lectura', 'fecha_lectura')
+    list_select_related = ('medidor',)
+    search_fields = ('^medidor__numero_medidor',)  # o el id de la lectura
+    autocomplete_fields = ('medidor',)
     ordering = ('-fecha_lectura',)
     
     fieldsets = (
         ('Datos de Lectura', {'fields': ('fecha_lectura', 'lectura_actual', 'tipo_lectura')}),
-        ('Relaciones', {'fields': ('medidor_numero',)}),
+        ('Relaciones', {'fields': ('medidor',)}),
         ('Consumo', {'fields': ('consumo_energetico',)}),
     )
     
@@ -194,16 +195,18 @@ class LecturaAdmin(admin.ModelAdmin):
 # ==========================================================
 # CONFIGURACIÓN DEL ADMIN - BOLETA (MODIFICADO)
 # ==========================================================
-class BoletaAdmin(admin.ModelAdmin):
+class BoletaAdmin(BusquedaPorIdMixin, admin.ModelAdmin):
     form = BoletaAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('fecha_emision', 'cliente_numero', 'fecha_vencimiento', 'monto_total', 'estado')
-    list_filter = ('estado', 'fecha_emision', 'cliente_numero')
-    search_fields = ('estado', 'consumo_energetico', 'cliente_numero')
+    list_display = ('fecha_emision', 'cliente', 'fecha_vencimiento', 'monto_total', 'estado')
+    list_filter = ('estado', 'fecha_emision')
+    list_select_related = ('cliente',)
+    search_fields = ('^cliente__numero_cliente',)  # o el id de la boleta
+    autocomplete_fields = ('cliente', 'lectura')
     ordering = ('-fecha_emision',)
     
     fieldsets = (
         ('Información de la Boleta', {'fields': ('fecha_emision', 'monto_total', 'consumo_energetico')}),
-        ('Relaciones', {'fields': ('cliente_numero', 'lectura_id')}),
+        ('Relaciones', {'fields': ('cliente', 'lectura')}),
         ('Estado y Vencimiento', {'fields': ('estado', 'fecha_vencimiento')}),
     )
     
@@ -217,14 +220,16 @@ class BoletaAdmin(admin.ModelAdmin):
 # ==========================================================
 class PagoAdmin(admin.ModelAdmin):
     form = PagoAdminForm  # ✅ FORM PERSONALIZADO
-    list_display = ('fecha_pago', 'boleta_id', 'monto_pagado', 'metodo_pago', 'numero_referencia')
-    list_filter = ('metodo_pago', 'estado_pago', 'boleta_id')
-    search_fields = ('numero_referencia', 'metodo_pago', 'boleta_id')
+    list_display = ('fecha_pago', 'boleta', 'monto_pagado', 'metodo_pago', 'numero_referencia')
+    list_filter = ('metodo_pago', 'estado_pago')
+    list_select_related = ('boleta',)
+    search_fields = ('^numero_referencia', '=boleta__id')
+    autocomplete_fields = ('boleta',)
     ordering = ('-fecha_pago',)
     
     fieldsets = (
         ('Información del Pago', {'fields': ('fecha_pago', 'monto_pagado', 'metodo_pago')}),
-        ('Relaciones', {'fields': ('boleta_id',)}),
+        ('Relaciones', {'fields': ('boleta',)}),
         ('Referencia y Estado', {'fields': ('numero_referencia', 'estado_pago')}),
     )
     
@@ -239,7 +244,7 @@ class PagoAdmin(admin.ModelAdmin):
 class UsuarioAdmin(admin.ModelAdmin):
     list_display = ('username', 'email', 'rol', 'telefono')
     list_filter = ('rol',)
-    search_fields = ('username', 'email')
+    search_fields = ('^username', '^email')
     ordering = ('username',)
     
     fieldsets = (
@@ -256,23 +261,37 @@ class UsuarioAdmin(admin.ModelAdmin):
 # CONFIGURACIÓN DEL ADMIN - NOTIFICACIONES
 # ==========================================================
 class NotificacionLecturaAdmin(admin.ModelAdmin):
-    list_display = ('id', 'registro_consumo')
+    list_display = ('id', 'registro_consumo', 'medidor', 'tipo_anomalia', 'puntaje')
+    list_filter = ('tipo_anomalia',)
     search_fields = ('registro_consumo',)
+    list_select_related = ('medidor',)
+    autocomplete_fields = ('medidor',)
+    raw_id_fields = ('lectura',)
     ordering = ('id',)
     
     fieldsets = (
         ('Información de Notificación', {'fields': ('registro_consumo',)}),
+        ('Anomalía', {'fields': ('medidor', 'lectura', 'tipo_anomalia', 'puntaje')}),
     )
 
 class NotificacionPagoAdmin(admin.ModelAdmin):
-    list_display = ('id', 'deuda_pendiente')
-    search_fields = ('deuda_pendiente',)
+    list_display = ('id', 'deuda_pendiente', 'cliente', 'clave_cobranza')
+    search_fields = ('deuda_pendiente', '^clave_cobranza')
+    list_select_related = ('cliente',)
+    autocomplete_fields = ('cliente',)
     ordering = ('id',)
     
     fieldsets = (
         ('Información de Notificación', {'fields': ('deuda_pendiente',)}),
+        ('Cobranza', {'fields': ('cliente', 'clave_cobranza')}),
     )
 
+class ReferenciaHuerfanaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'modelo', 'objeto_id', 'campo', 'valor')
+    list_filter = ('modelo', 'campo')
+    search_fields = ('valor',)
+    ordering = ('modelo', 'campo', 'objeto_id')
+
 # ==========================================================
 # REGISTRO DE MODELOS EN EL ADMIN
 # ==========================================================
@@ -285,4 +304,5 @@ admin.site.register(Boleta, BoletaAdmin)
 admin.site.register(Pago, PagoAdmin)
 admin.site.register(Usuario, UsuarioAdmin)
 admin.site.register(NotificacionLectura, NotificacionLecturaAdmin)
-admin.site.register(NotificacionPago, NotificacionPagoAdmin)
\ No newline at end of file
+admin.site.register(NotificacionPago, NotificacionPagoAdmin)
+admin.site.register(ReferenciaHuerfana, ReferenciaHuerfanaAdmin)
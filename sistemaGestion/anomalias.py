@@ -0,0 +1,179 @@
+"""
+Detección de anomalías en las lecturas de cada medidor.
+
+Las lecturas se cargan por bloques de medidores en columnas (arreglos de NumPy ordenados por
+medidor, fecha_lectura e id) y se evalúan todas a la vez, sin recorrerlas una por una:
+- pico: el consumo supera la media de las VENTANA lecturas anteriores del mismo medidor en
+  UMBRAL_Z desviaciones o más (la media y la desviación se calculan con sumas acumuladas)
+- sin consumo: RACHA_SIN_CONSUMO lecturas seguidas con consumo cero (medidor detenido o intervenido)
+- registro menor: lectura_actual menor que la anterior sin ser una vuelta del registro
+  (mismo criterio que consumos.derivar_consumo), posible manipulación o cambio de medidor
+
+Cada anomalía crea una NotificacionLectura con el medidor, la lectura, el tipo y el puntaje.
+Una lectura tiene a lo más una notificación por tipo, así el análisis se puede repetir.
+"""
+
+import numpy as np
+from django.db import transaction
+
+from .consumos import FRACCION_VUELTA
+from .models import Lectura, Medidor, NotificacionLectura
+
+PICO = 'Pico'
+SIN_CONSUMO = 'Sin consumo'
+REGISTRO_MENOR = 'Registro menor'
+
+# lecturas anteriores que forman la línea base, y mínimo de ellas para evaluar picos
+VENTANA = 12
+MINIMO_LECTURAS_BASE = 4
+UMBRAL_Z = 4.0
+# piso de la desviación, para que un medidor de consumo casi constante no dé puntajes enormes
+FRACCION_DESVIACION_MINIMA = 0.25
+DESVIACION_MINIMA = 1.0
+RACHA_SIN_CONSUMO = 3
+
+MEDIDORES_POR_BLOQUE = 2000
+TAMANO_LOTE = 1000
+
+# 10, 100, ..., para contar los dígitos del registro (PositiveIntegerField tiene a lo más 10)
+_POTENCIAS = 10 ** np.arange(1, 11, dtype=np.int64)
+
+
+def puntuar(medidores, valores, consumos):
+    """
+    Evalúa las lecturas dadas como arreglos ordenados por medidor y fecha.
+    Retorna {tipo: (posiciones, puntajes, referencias)}: para los picos el puntaje es el z y la
+    referencia la media de la línea base; para las rachas sin consumo el largo de la racha; para
+    los registros menores la diferencia con la lectura anterior y la referencia es esa lectura.
+    """
+    n = len(medidores)
+    posicion = np.arange(n)
+    inicio = np.ones(n, dtype=bool)
+    inicio[1:] = medidores[1:] != medidores[:-1]
+    # posición de la primera lectura del medidor de cada fila
+    primera = np.maximum.accumulate(np.where(inicio, posicion, 0))
+
+    # línea base: media y desviación de las VENTANA lecturas anteriores del mismo medidor
+    consumo = consumos.astype(np.float64)
+    suma = np.concatenate(([0.0], np.cumsum(consumo)))
+    suma_cuadrados = np.concatenate(([0.0], np.cumsum(consumo * consumo)))
+    desde = np.maximum(primera, posicion - VENTANA)
+    cantidad = posicion - desde
+    con_base = cantidad >= MINIMO_LECTURAS_BASE
+    divisor = np.maximum(cantidad, 1)
+    media = (suma[posicion] - suma[desde]) / divisor
+    varianza = (suma_cuadrados[posicion] - suma_cuadrados[desde]) / divisor - media * media
+    desviacion = np.maximum(np.sqrt(np.maximum(varianza, 0)), np.maximum(FRACCION_DESVIACION_MINIMA * media, DESVIACION_MINIMA))
+    z = (consumo - media) / desviacion
+    picos = np.flatnonzero(con_base & (z >= UMBRAL_Z))
+
+    # rachas sin consumo: distancia a la última lectura con consumo del mismo medidor;
+    # se notifica la lectura que completa la racha (una vez por racha)
+    cero = consumos == 0
+    ultima_con_consumo = np.maximum.accumulate(np.where(~cero, posicion, np.where(inicio, posicion - 1, -1)))
+    racha = posicion - ultima_con_consumo
+    sin_consumo = np.flatnonzero(racha == RACHA_SIN_CONSUMO)
+
+    # registro menor que el anterior, descontando las vueltas del registro (99999 -> 00012)
+    anterior = np.empty_like(valores)
+    anterior[0] = 0
+    anterior[1:] = valores[:-1]
+    menor = ~inicio & (valores < anterior)
+    capacidad = 10 ** (np.searchsorted(_POTENCIAS, anterior, side='right') + 1).astype(np.int64)
+    vuelta = (anterior >= capacidad * (1 - FRACCION_VUELTA)) & (capacidad - anterior + valores <= capacidad * FRACCION_VUELTA)
+    registros_menores = np.flatnonzero(menor & ~vuelta)
+
+    return {
+        PICO: (picos, z[picos], media[picos]),
+        SIN_CONSUMO: (sin_consumo, racha[sin_consumo].astype(np.float64), np.zeros(len(sin_consumo))),
+        REGISTRO_MENOR: (registros_menores, (anterior - valores)[registros_menores].astype(np.float64), anterior[registros_menores]),
+    }
+
+
+def cargar_bloque(medidor_desde, medidor_hasta):
+    """Lecturas de los medidores con id en [medidor_desde, medidor_hasta] como columnas"""
+    filas = list(
+        Lectura.objects.filter(medidor_id__gte=medidor_desde, medidor_id__lte=medidor_hasta)
+        .order_by('medidor_id', 'fecha_lectura', 'id')
+        .values_list('id', 'medidor_id', 'lectura_actual', 'consumo_energetico', 'fecha_lectura')
+    )
+    if not filas:
+        return None
+    ids, medidores, valores, consumos, fechas = zip(*filas)
+    return {
+        'ids': np.array(ids, dtype=np.int64),
+        'medidores': np.array(medidores, dtype=np.int64),
+        'valores': np.array(valores, dtype=np.int64),
+        'consumos': np.array(consumos, dtype=np.int64),
+        'fechas': fechas,
+    }
+
+
+def texto_notificacion(tipo, numero_medidor, fecha, consumo, valor, puntaje, referencia):
+    if tipo == PICO:
+        return (f"Pico de consumo en medidor {numero_medidor}: {consumo} kWh el {fecha:%d/%m/%Y} "
+                f"(promedio anterior {referencia:.0f} kWh, z={puntaje:.1f})")
+    if tipo == SIN_CONSUMO:
+        return f"Medidor {numero_medidor} sin consumo en {puntaje:.0f} lecturas seguidas hasta el {fecha:%d/%m/%Y}"
+    return (f"Lectura menor que la anterior en medidor {numero_medidor}: {valor} el {fecha:%d/%m/%Y} "
+            f"(anterior {referencia}), posible manipulación o cambio de medidor")
+
+
+def detectar_anomalias(medidores_por_bloque=MEDIDORES_POR_BLOQUE, notificar=True):
+    """
+    Analiza las lecturas de todos los medidores y crea las notificaciones que aún no existen
+    (con `notificar` en False solo cuenta). Retorna la cantidad de anomalías por tipo,
+    las ya notificadas y las notificaciones creadas.
+    """
+    resumen = {PICO: 0, SIN_CONSUMO: 0, REGISTRO_MENOR: 0, 'lecturas': 0, 'ya_notificadas': 0, 'creadas': 0}
+    ids_medidores = Medidor.objects.order_by('id').values_list('id', flat=True)
+    ultimo_id = 0
+    while True:
+        bloque = list(ids_medidores.filter(id__gt=ultimo_id)[:medidores_por_bloque])
+        if not bloque:
+            break
+        ultimo_id = bloque[-1]
+
+        columnas = cargar_bloque(bloque[0], ultimo_id)
+        if columnas is None:
+            continue
+        resumen['lecturas'] += len(columnas['ids'])
+        anomalias = puntuar(columnas['medidores'], columnas['valores'], columnas['consumos'])
+        for tipo, (posiciones, _, _) in anomalias.items():
+            resumen[tipo] += len(posiciones)
+        if not notificar or not any(len(posiciones) for posiciones, _, _ in anomalias.values()):
+            continue
+
+        del_bloque = NotificacionLectura.objects.filter(medidor_id__gte=bloque[0], medidor_id__lte=ultimo_id, tipo_anomalia__isnull=False)
+        existentes = set(del_bloque.values_list('lectura_id', 'tipo_anomalia'))
+        numeros = dict(Medidor.objects.filter(id__gte=bloque[0], id__lte=ultimo_id).values_list('id', 'numero_medidor'))
+        notificaciones = []
+        for tipo, (posiciones, puntajes, referencias) in anomalias.items():
+            for posicion, puntaje, referencia in zip(posiciones.tolist(), puntajes.tolist(), referencias.tolist()):
+                lectura_id = int(columnas['ids'][posicion])
+                if (lectura_id, tipo) in existentes:
+                    resumen['ya_notificadas'] += 1
+                    continue
+                medidor_id = int(columnas['medidores'][posicion])
+                texto = texto_notificacion(
+                    tipo, numeros.get(medidor_id), columnas['fechas'][posicion],
+                    int(columnas['consumos'][posicion]), int(columnas['valores'][posicion]), puntaje, referencia,
+                )
+                notificaciones.append(NotificacionLectura(
+                    registro_consumo=texto,
+                    medidor_id=medidor_id,
+                    lectura_id=lectura_id,
+                    tipo_anomalia=tipo,
+                    puntaje=round(puntaje, 2),
+                ))
+        if not notificaciones:
+            continue
+        # ignore_conflicts descarta sin error las que otra ejecución insertó después de leer las existentes:
+        # se cuentan como creadas solo las filas nuevas del bloque (antes y después del INSERT)
+        with transaction.atomic():
+            antes = del_bloque.count()
+            NotificacionLectura.objects.bulk_create(notificaciones, batch_size=TAMANO_LOTE, ignore_conflicts=True)
+            creadas = del_bloque.count() - antes
+        resumen['creadas'] += creadas
+        resumen['ya_notificadas'] += len(notificaciones) - creadas
+    return resumen
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SistemagestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sistemaGestion'
+
+    def ready(self):
+        # registra las señales que mantienen los contadores del dashboard
+        from . import signals  # noqa: F401
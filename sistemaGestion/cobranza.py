@@ -0,0 +1,126 @@
+"""
+Avisos de cobranza (NotificacionPago) para los clientes con boletas impagas.
+
+Una sola consulta recorre las boletas 'Vencido' y 'Pendiente' ordenadas por cliente (con
+iterator, sin cargarlas todas), cada una con su saldo (monto_total menos sus pagos, así las
+boletas con pagos parciales cobran solo lo que falta); mientras se recorren se acumulan por
+cliente la deuda total y la lista de boletas, y se arma el aviso con las plantillas de texto PLANTILLA_AVISO y
+PLANTILLA_BOLETA (str.format: con una plantilla de Django el renderizado era el 75% del tiempo).
+Los avisos se insertan con bulk_create por bloques.
+
+Cada aviso lleva la clave única 'AAAA-MM:cliente_id' del ciclo: los clientes que ya tienen
+aviso en el ciclo se omiten (y la restricción única evita duplicados entre ejecuciones simultáneas;
+el resumen cuenta solo los avisos que esta ejecución insertó).
+"""
+
+from datetime import date
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+from .conciliacion import total_pagado
+from .models import Boleta, NotificacionPago
+
+TAMANO_BLOQUE = 2000
+# boletas que se detallan en cada aviso (el texto tiene un máximo de 500 caracteres)
+MAXIMO_BOLETAS_AVISO = 5
+LARGO_AVISO = NotificacionPago._meta.get_field('deuda_pendiente').max_length
+
+PLANTILLA_AVISO = 'Cliente {numero_cliente} - {nombre}: deuda de ${deuda} en {cantidad} boleta(s){vencidas}. {detalle}.'
+PLANTILLA_VENCIDAS = ' ({} vencida(s))'
+PLANTILLA_BOLETA = '#{id} ${monto} vence {vencimiento:%d/%m/%Y}{vencida}'
+PLANTILLA_OMITIDAS = 'y {} más'
+
+
+def ciclo_de(fecha):
+    return f'{fecha:%Y-%m}'
+
+
+def clave_cobranza(ciclo, cliente_id):
+    return f'{ciclo}:{cliente_id}'
+
+
+def boletas_impagas():
+    """
+    Boletas impagas con cliente y saldo pendiente, ordenadas por cliente (vencidas y más antiguas
+    primero). En vez de monto_total traen el saldo: monto_total menos la suma de sus pagos.
+    """
+    return (
+        Boleta.objects.filter(estado__in=['Vencido', 'Pendiente'], cliente__isnull=False)
+        .annotate(pagado=Coalesce(total_pagado(), 0))
+        .filter(monto_total__gt=F('pagado'))
+        .annotate(saldo=F('monto_total') - F('pagado'))
+        .order_by('cliente_id', 'fecha_vencimiento', 'id')
+        .values_list('cliente_id', 'cliente__numero_cliente', 'cliente__nombre',
+                     'id', 'saldo', 'fecha_vencimiento', 'estado')
+        .iterator(chunk_size=TAMANO_BLOQUE)
+    )
+
+
+def _guardar_bloque(bloque, deudas, resumen):
+    """
+    Inserta el bloque y suma al resumen solo los avisos que realmente se crearon: con ignore_conflicts
+    se descartan sin error los que otra ejecución insertó después de leer los ya notificados.
+    Son nuevas las claves del bloque que no estaban antes del INSERT y sí después.
+    """
+    claves = [aviso.clave_cobranza for aviso in bloque]
+    with transaction.atomic():
+        existentes = set(NotificacionPago.objects.filter(clave_cobranza__in=claves).values_list('clave_cobranza', flat=True))
+        NotificacionPago.objects.bulk_create(bloque, batch_size=TAMANO_BLOQUE, ignore_conflicts=True)
+        creadas = set(NotificacionPago.objects.filter(clave_cobranza__in=claves).values_list('clave_cobranza', flat=True)) - existentes
+    resumen['creados'] += len(creadas)
+    resumen['ya_notificados'] += len(bloque) - len(creadas)
+    resumen['deuda_total'] += sum(deudas[clave] for clave in creadas)
+
+
+def generar_avisos(fecha=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Crea un aviso por cliente con deuda que aún no tenga aviso en el ciclo de `fecha` (por defecto hoy).
+    Retorna un diccionario con el resumen.
+    """
+    ciclo = ciclo_de(fecha or date.today())
+    # avisos ya emitidos en el ciclo: búsqueda por prefijo sobre el índice único de la clave
+    notificados = set(
+        NotificacionPago.objects.filter(clave_cobranza__startswith=f'{ciclo}:').values_list('clave_cobranza', flat=True)
+    )
+
+    resumen = {'ciclo': ciclo, 'creados': 0, 'ya_notificados': 0, 'deuda_total': 0}
+    bloque, deudas = [], {}
+    for cliente_id, filas in groupby(boletas_impagas(), key=lambda fila: fila[0]):
+        filas = list(filas)
+        clave = clave_cobranza(ciclo, cliente_id)
+        if clave in notificados:
+            resumen['ya_notificados'] += 1
+            continue
+
+        deuda = sum(int(fila[4]) for fila in filas)
+        vencidas = sum(1 for fila in filas if fila[6] == 'Vencido')
+        detalle = [
+            PLANTILLA_BOLETA.format(id=fila[3], monto=int(fila[4]), vencimiento=fila[5], vencida=' (vencida)' if fila[6] == 'Vencido' else '')
+            for fila in filas[:MAXIMO_BOLETAS_AVISO]
+        ]
+        if len(filas) > MAXIMO_BOLETAS_AVISO:
+            detalle.append(PLANTILLA_OMITIDAS.format(len(filas) - MAXIMO_BOLETAS_AVISO))
+        texto = PLANTILLA_AVISO.format(
+            numero_cliente=filas[0][1],
+            nombre=filas[0][2],
+            deuda=deuda,
+            cantidad=len(filas),
+            vencidas=PLANTILLA_VENCIDAS.format(vencidas) if vencidas else '',
+            detalle='; '.join(detalle),
+        )
+        bloque.append(NotificacionPago(
+            deuda_pendiente=Truncator(texto).chars(LARGO_AVISO),
+            cliente_id=cliente_id,
+            clave_cobranza=clave,
+        ))
+        deudas[clave] = deuda
+        if len(bloque) >= tamano_bloque:
+            _guardar_bloque(bloque, deudas, resumen)
+            bloque, deudas = [], {}
+    if bloque:
+        _guardar_bloque(bloque, deudas, resumen)
+    return resumen
@@ -0,0 +1,96 @@
+"""
+Conciliación de boletas con sus pagos.
+
+El estado de cada boleta se deriva de la suma de sus pagos y de la fecha de vencimiento,
+con unas pocas sentencias UPDATE sobre toda la tabla (sin recorrer las boletas en Python):
+- 'Pagado' si los pagos cubren monto_total
+- 'Vencido' si no está pagada y la fecha de vencimiento ya pasó, 'Pendiente' si aún no vence
+Los pagos quedan 'Pagado' si su boleta quedó pagada y 'No pagado completamente' si no.
+
+Las boletas marcadas 'Pagado' a mano que no tienen pagos registrados no se modifican
+(pudieron pagarse fuera del sistema).
+"""
+
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Case, OuterRef, Subquery, Sum, Value, When
+
+from . import estadisticas, reportes
+from .models import Boleta, Pago
+
+PASOS = ('boletas_pagadas', 'boletas_reabiertas', 'boletas_vencidas', 'boletas_pendientes', 'pagos_completos', 'pagos_parciales')
+TAMANO_GRUPO = 1000
+
+
+def total_pagado():
+    """Subconsulta con la suma de los pagos de la boleta externa (NULL si no tiene pagos)"""
+    return Subquery(
+        Pago.objects.filter(boleta_id=OuterRef('pk'))
+        .order_by()
+        .values('boleta_id')
+        .annotate(total=Sum('monto_pagado'))
+        .values('total')
+    )
+
+
+def conciliar_boletas(hoy=None, boleta_ids=None):
+    """
+    Actualiza los estados de boletas y pagos. Retorna la cantidad de filas cambiadas por paso.
+    Con `boleta_ids` solo se concilian esas boletas y sus pagos (por ejemplo las de una importación),
+    por grupos de TAMANO_GRUPO ids en la misma transacción.
+    """
+    hoy = hoy or date.today()
+    if boleta_ids is None:
+        grupos = [None]
+    else:
+        ids = sorted(set(boleta_ids))
+        grupos = [ids[inicio:inicio + TAMANO_GRUPO] for inicio in range(0, len(ids), TAMANO_GRUPO)]
+    resumen = dict.fromkeys(PASOS, 0)
+    with transaction.atomic():
+        for grupo in grupos:
+            boletas = Boleta.objects.all() if grupo is None else Boleta.objects.filter(id__in=grupo)
+            pagos = Pago.objects.all() if grupo is None else Pago.objects.filter(boleta_id__in=grupo)
+            for paso, cambiadas in _conciliar(boletas, pagos, hoy).items():
+                resumen[paso] += cambiadas
+        # update() no dispara señales: el contador de pagos y los reportes se actualizan aquí
+        estadisticas.incrementar('pagos_realizados', resumen['pagos_completos'] - resumen['pagos_parciales'])
+    if any(resumen.values()):
+        reportes.invalidar()
+    return resumen
+
+
+def _conciliar(boletas, pagos, hoy):
+    no_pagado = Case(When(fecha_vencimiento__lt=hoy, then=Value('Vencido')), default=Value('Pendiente'))
+    resumen = {}
+    # 1. boletas cuyos pagos cubren el monto
+    resumen['boletas_pagadas'] = (
+        boletas.exclude(estado='Pagado')
+        .filter(monto_total__lte=total_pagado())
+        .update(estado='Pagado')
+    )
+    # 2. boletas 'Pagado' con pagos registrados que no alcanzan el monto (pago editado o eliminado)
+    resumen['boletas_reabiertas'] = (
+        boletas.filter(estado='Pagado', monto_total__gt=total_pagado())
+        .update(estado=no_pagado)
+    )
+    # 3. boletas impagas que vencieron, y vencidas cuya fecha de vencimiento se extendió
+    resumen['boletas_vencidas'] = (
+        boletas.filter(estado='Pendiente', fecha_vencimiento__lt=hoy).update(estado='Vencido')
+    )
+    resumen['boletas_pendientes'] = (
+        boletas.filter(estado='Vencido', fecha_vencimiento__gte=hoy).update(estado='Pendiente')
+    )
+    # 4. estado de los pagos según su boleta (la subconsulta es sobre boletas, no sobre pagos,
+    #    así MySQL puede ejecutarla dentro del mismo UPDATE)
+    resumen['pagos_completos'] = (
+        pagos.filter(boleta_id__in=Subquery(boletas.filter(estado='Pagado').values('id')))
+        .exclude(estado_pago='Pagado')
+        .update(estado_pago='Pagado')
+    )
+    resumen['pagos_parciales'] = (
+        pagos.filter(boleta_id__in=Subquery(boletas.exclude(estado='Pagado').values('id')))
+        .exclude(estado_pago='No pagado completamente')
+        .update(estado_pago='No pagado completamente')
+    )
+    return resumen
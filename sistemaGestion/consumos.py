@@ -0,0 +1,164 @@
+"""
+Derivación del consumo a partir de lecturas sucesivas del mismo medidor.
+
+El consumo de una lectura es la diferencia entre su lectura_actual y la lectura anterior
+del mismo medidor (ordenadas por fecha_lectura e id). Si el registro del medidor dio la
+vuelta (pasó de 99999 a 00012) el consumo se calcula sobre la capacidad del registro;
+cualquier otra lectura menor que la anterior se marca como no monótona y no se corrige.
+
+- revisar_consumos: recorre todas las lecturas por bloques de medidores con la función de
+  ventana LAG y valida (o corrige con bulk_update) consumo_energetico.
+- derivar_consumo: para lecturas nuevas basta la lectura anterior del medidor, que se toma
+  de la copia de la última lectura guardada en Medidor.
+
+La copia (ultima_lectura_fecha, ultima_lectura_valor, ultimo_consumo) se actualiza con
+registrar_lectura_nueva al crear una lectura y con reconstruir_ultimas_lecturas al editar,
+eliminar o cargar lecturas en bloque.
+"""
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Lag
+
+from . import resumenes
+from .models import Lectura, Medidor
+
+# estados de la comparación entre el consumo registrado y el derivado
+OK = 'ok'
+DISTINTO = 'distinto'
+VUELTA = 'vuelta'
+NO_MONOTONA = 'no_monotona'
+PRIMERA = 'primera'
+# la lectura siguiente a una no monótona se deriva de un valor dudoso: se informa pero no se corrige
+POSTERIOR_NO_MONOTONA = 'posterior_no_monotona'
+
+# una lectura menor que la anterior se considera vuelta del registro si la anterior estaba
+# en el último 10% de la capacidad y el consumo resultante es menor al 10% de la capacidad
+FRACCION_VUELTA = 0.1
+
+MEDIDORES_POR_BLOQUE = 500
+TAMANO_ACTUALIZACION = 1000
+
+
+def derivar_consumo(anterior, actual):
+    """
+    Retorna (consumo, estado) para una lectura con valor `actual` cuya lectura anterior
+    es `anterior` (None si es la primera del medidor). El consumo es None si no se puede derivar.
+    """
+    if anterior is None:
+        return None, PRIMERA
+    if actual >= anterior:
+        return actual - anterior, OK
+    # capacidad del registro según la cantidad de dígitos de la lectura anterior (99999 -> 100000)
+    capacidad = 10 ** len(str(anterior))
+    consumo = capacidad - anterior + actual
+    if anterior >= capacidad * (1 - FRACCION_VUELTA) and consumo <= capacidad * FRACCION_VUELTA:
+        return consumo, VUELTA
+    return None, NO_MONOTONA
+
+
+def lecturas_con_anterior(medidor_desde, medidor_hasta):
+    """
+    Lecturas de los medidores con id en [medidor_desde, medidor_hasta) junto con la lectura
+    anterior del mismo medidor, calculada en la base de datos con LAG.
+    """
+    return (
+        Lectura.objects
+        .filter(medidor_id__gte=medidor_desde, medidor_id__lt=medidor_hasta)
+        .annotate(lectura_anterior=Window(
+            Lag('lectura_actual'),
+            partition_by=[F('medidor_id')],
+            order_by=[F('fecha_lectura').asc(), F('id').asc()],
+        ))
+        .values_list('id', 'medidor_id', 'fecha_lectura', 'lectura_actual', 'consumo_energetico', 'lectura_anterior')
+        .order_by('medidor_id', 'fecha_lectura', 'id')
+    )
+
+
+def revisar_consumos(corregir=False, medidores_por_bloque=MEDIDORES_POR_BLOQUE, informar=None):
+    """
+    Compara consumo_energetico con el consumo derivado de todas las lecturas con medidor.
+    Con `corregir` reemplaza los consumos distintos (incluidas las vueltas de registro).
+    `informar` recibe cada diferencia como (id, medidor_id, fecha, registrado, derivado, estado).
+    Retorna la cantidad de lecturas por estado y las corregidas.
+    """
+    resumen = {OK: 0, DISTINTO: 0, VUELTA: 0, NO_MONOTONA: 0, POSTERIOR_NO_MONOTONA: 0, PRIMERA: 0, 'corregidas': 0}
+    ids_medidores = Medidor.objects.order_by('id').values_list('id', flat=True)
+    ultimo_id = 0
+    while True:
+        # bloques por rango de id de medidor: cada bloque contiene particiones completas
+        bloque = list(ids_medidores.filter(id__gt=ultimo_id)[:medidores_por_bloque])
+        if not bloque:
+            break
+        ultimo_id = bloque[-1]
+
+        correcciones, quitadas, agregadas = [], [], []
+        estado_anterior = None
+        for id_lectura, medidor_id, fecha, actual, registrado, anterior in lecturas_con_anterior(bloque[0], ultimo_id + 1).iterator():
+            consumo, estado = derivar_consumo(anterior, actual)
+            if estado in (OK, VUELTA) and consumo != registrado:
+                if estado_anterior == NO_MONOTONA:
+                    estado = POSTERIOR_NO_MONOTONA
+                else:
+                    if estado == OK:
+                        estado = DISTINTO
+                    correcciones.append(Lectura(id=id_lectura, consumo_energetico=consumo))
+                    quitadas.append((medidor_id, fecha, registrado))
+                    agregadas.append((medidor_id, fecha, consumo))
+            resumen[estado] += 1
+            estado_anterior = estado
+            if informar and estado not in (OK, PRIMERA):
+                informar((id_lectura, medidor_id, fecha, registrado, consumo, estado))
+
+        if corregir and correcciones:
+            with transaction.atomic():
+                Lectura.objects.bulk_update(correcciones, ['consumo_energetico'], batch_size=TAMANO_ACTUALIZACION)
+                reconstruir_ultimas_lecturas(bloque)
+                resumenes.registrar_cambios(quitadas, agregadas)
+            resumen['corregidas'] += len(correcciones)
+    return resumen
+
+
+def registrar_lectura_nueva(lectura):
+    """Actualiza la copia del medidor si la lectura nueva es la más reciente (un solo UPDATE, sin leer)"""
+    if not lectura.medidor_id:
+        return
+    (
+        Medidor.objects
+        .filter(id=lectura.medidor_id)
+        .filter(Q(ultima_lectura_fecha__isnull=True) | Q(ultima_lectura_fecha__lte=lectura.fecha_lectura))
+        .update(
+            ultima_lectura_fecha=lectura.fecha_lectura,
+            ultima_lectura_valor=lectura.lectura_actual,
+            ultimo_consumo=lectura.consumo_energetico,
+        )
+    )
+
+
+def reconstruir_ultimas_lecturas(medidor_ids=None, medidores_por_bloque=MEDIDORES_POR_BLOQUE):
+    """
+    Recalcula la copia de la última lectura de los medidores indicados (o de todos, por bloques)
+    con un UPDATE por bloque y subconsultas sobre el índice (medidor, fecha_lectura).
+    Retorna la cantidad de medidores actualizados.
+    """
+    ultima = Lectura.objects.filter(medidor_id=OuterRef('pk')).order_by('-fecha_lectura', '-id')
+    valores = {
+        'ultima_lectura_fecha': Subquery(ultima.values('fecha_lectura')[:1]),
+        'ultima_lectura_valor': Subquery(ultima.values('lectura_actual')[:1]),
+        'ultimo_consumo': Subquery(ultima.values('consumo_energetico')[:1]),
+    }
+    if medidor_ids is not None:
+        medidor_ids = [medidor_id for medidor_id in medidor_ids if medidor_id]
+        return Medidor.objects.filter(id__in=medidor_ids).update(**valores) if medidor_ids else 0
+
+    actualizados = 0
+    ids_medidores = Medidor.objects.order_by('id').values_list('id', flat=True)
+    ultimo_id = 0
+    while True:
+        bloque = list(ids_medidores.filter(id__gt=ultimo_id)[:medidores_por_bloque])
+        if not bloque:
+            break
+        ultimo_id = bloque[-1]
+        with transaction.atomic():
+            actualizados += Medidor.objects.filter(id__gte=bloque[0], id__lte=ultimo_id).update(**valores)
+    return actualizados
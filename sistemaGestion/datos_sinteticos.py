@@ -0,0 +1,298 @@
+"""
+Generación de datos sintéticos a escala de producción (para pruebas de rendimiento).
+
+Crea un grafo consistente Usuarios → Clientes → Contratos → Medidores → Lecturas mensuales
+→ Boletas → Pagos, más notificaciones, respetando las reglas de forms.py. Las reglas que
+dependen de la fecha de hoy (por ejemplo, una lectura no puede tener más de un año) se
+aplican respecto de la fecha en que se habría ingresado cada registro, porque si no sería
+imposible tener un historial de varios años.
+
+Los datos se generan "al cierre" del mes final: la fecha de referencia (contratos vigentes,
+boletas vencidas, pagos ya hechos) es el último día de ese mes y no la fecha en que se ejecuta.
+Todo se inserta con bulk_create por bloques de clientes, y el resultado es el mismo para una
+misma semilla y un mismo mes final.
+"""
+
+import calendar
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from . import consumos, estadisticas, reportes, resumenes, tarifas
+from .facturacion import DIAS_VENCIMIENTO, temporada_tarifa
+from .models import Boleta, Cliente, Contrato, Lectura, Medidor, NotificacionLectura, NotificacionPago, Pago, Tarifa, Usuario
+
+# filas por INSERT
+TAMANO_LOTE = 2000
+
+NOMBRES = ['Ana', 'Benjamín', 'Camila', 'Diego', 'Elena', 'Felipe', 'Gabriela', 'Héctor', 'Isidora', 'Joaquín',
+           'Javiera', 'Lucas', 'Martina', 'Matías', 'Sofía', 'Tomás', 'Valentina', 'Vicente', 'Rocío', 'Pablo']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda',
+             'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela']
+CALLES = ['Av. Libertador', 'Los Aromos', 'Pedro de Valdivia', 'San Martín', 'Las Acacias', 'Av. Grecia',
+          'Los Carrera', 'O Higgins', 'Manuel Montt', 'Irarrázaval']
+ROLES = ['Administrador', 'Eléctrico', 'Finanzas']
+
+# proporción de clientes por tipo y rango de consumo mensual (kWh) de cada tipo
+TIPOS_CLIENTE = [('Residencial', 0.80, (120, 450)), ('Comercial', 0.15, (800, 5000)), ('Industrial', 0.05, (8000, 60000))]
+
+# precio base por kWh de cada tipo de cliente (verano, invierno); sube un 4% cada año
+PRECIOS_BASE = {'Residencial': (120, 140), 'Comercial': (160, 185), 'Industrial': (100, 115)}
+
+METODOS_PAGO = [metodo for metodo, _ in Pago.METODOPAGO_CHOICES]
+
+
+def _sumar_meses(fecha, meses):
+    mes = fecha.month - 1 + meses
+    return date(fecha.year + mes // 12, mes % 12 + 1, 1)
+
+
+def _fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def _mes_anterior(hoy):
+    return _sumar_meses(hoy.replace(day=1), -1)
+
+
+class _Generador:
+    def __init__(self, meses, usuarios, semilla, mes_final):
+        self.meses = [_sumar_meses(mes_final, -i) for i in range(meses - 1, -1, -1)]
+        self.total_usuarios = usuarios
+        # fecha de referencia fija (cierre del mes final), para que el resultado no dependa del día de ejecución
+        self.hoy = _fin_de_mes(mes_final)
+        self.rng = random.Random(semilla)
+        self.resumen = {'usuarios': 0, 'clientes': 0, 'contratos': 0, 'medidores': 0, 'lecturas': 0,
+                        'boletas': 0, 'pagos': 0, 'tarifas': 0, 'notificaciones': 0}
+        self.referencias = 0
+
+    # ------------------------------------------------------------------ catálogos
+    def crear_tarifas(self):
+        """Una tarifa por tipo de cliente y temporada, vigente desde el 1 de enero de cada año del periodo"""
+        anios = sorted({mes.year for mes in self.meses})
+        existentes = set(Tarifa.objects.values_list('tipo_cliente', 'tipo_tarifa', 'fecha_vigencia'))
+        nuevas = []
+        for indice, anio in enumerate(anios):
+            for tipo_cliente, (verano, invierno) in PRECIOS_BASE.items():
+                for tipo_tarifa, precio in (('Verano', verano), ('Invierno', invierno)):
+                    vigencia = date(anio, 1, 1)
+                    if (tipo_cliente, tipo_tarifa, vigencia) not in existentes:
+                        nuevas.append(Tarifa(tipo_cliente=tipo_cliente, tipo_tarifa=tipo_tarifa, fecha_vigencia=vigencia,
+                                             precio=round(precio * 1.04 ** indice)))
+        Tarifa.objects.bulk_create(nuevas)
+        self.resumen['tarifas'] = len(nuevas)
+        self.tarifas = tarifas.ResolutorTarifas.desde_base_de_datos()
+
+    def precios_lecturas(self, lecturas, medidor_a_cliente):
+        """Tarifa vigente de cada lectura, resuelta por (tipo de cliente, temporada) con una pasada por grupo"""
+        grupos = {}
+        for indice, lectura in enumerate(lecturas):
+            tipo_cliente = medidor_a_cliente[lectura.medidor_id][1]
+            grupos.setdefault((tipo_cliente, temporada_tarifa(lectura.fecha_lectura)), []).append(indice)
+        precios = [None] * len(lecturas)
+        for (tipo_cliente, temporada), indices in grupos.items():
+            fechas = [lecturas[indice].fecha_lectura for indice in indices]
+            for indice, precio in zip(indices, self.tarifas.precios_en_fechas(tipo_cliente, temporada, fechas)):
+                precios[indice] = precio
+        return precios
+
+    def crear_usuarios(self):
+        usuarios = []
+        for n in range(1, self.total_usuarios + 1):
+            usuarios.append(Usuario(
+                username=f'usuario{n:05d}',
+                password='clave123',
+                email=f'usuario{n:05d}@sistemaelectrico.cl',
+                telefono=f'+569{self.rng.randint(10000000, 99999999)}',
+                rol=ROLES[n % len(ROLES)],
+            ))
+        Usuario.objects.bulk_create(usuarios, batch_size=TAMANO_LOTE)
+        self.resumen['usuarios'] = len(usuarios)
+        # ordenados: con la misma semilla rng.choice debe elegir siempre el mismo usuario
+        self.usuarios = list(Usuario.objects.filter(username__in=[u.username for u in usuarios]).order_by('id').values_list('id', flat=True))
+
+    # ------------------------------------------------------------------ clientes y su historial
+    def crear_bloque(self, desde, hasta):
+        clientes, contratos, medidores, perfiles = [], [], [], {}
+        primer_mes = self.meses[0]
+        for n in range(desde, hasta):
+            tipo_cliente, rango = self._tipo_cliente()
+            nombre = f"{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}"
+            clientes.append(Cliente(
+                numero_cliente=f'CLI-{n:07d}',
+                nombre=nombre,
+                email=f'cliente{n:07d}@correo.cl',
+                telefono=f'+569{self.rng.randint(10000000, 99999999)}',
+                tipo_cliente=tipo_cliente,
+                usuario_id=self.rng.choice(self.usuarios) if self.usuarios else None,
+            ))
+            # el contrato se ingresa el día en que comienza; si es activo termina después de la fecha
+            # de referencia (la extensión se sortea siempre, para no alterar la secuencia aleatoria)
+            fecha_inicio = primer_mes - timedelta(days=self.rng.randint(0, 90))
+            fecha_fin = fecha_inicio + timedelta(days=365 * self.rng.randint(3, 6))
+            extension = timedelta(days=self.rng.randint(30, 730))
+            if fecha_fin <= self.hoy:
+                fecha_fin = self.hoy + extension
+            contratos.append(Contrato(
+                numero_contrato=f'CON-{n:07d}',
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                estado='Activo' if self.rng.random() < 0.95 else 'Inactivo',
+            ))
+            estado_medidor = 'Activo' if self.rng.random() < 0.97 else self.rng.choice(['Mantenimiento', 'Dañado'])
+            medidores.append(Medidor(
+                numero_medidor=f'MED-{n:07d}',
+                fecha_instalacion=fecha_inicio,
+                ubicacion=f"{self.rng.choice(CALLES)} {self.rng.randint(1, 9999)}",
+                estado_medidor=estado_medidor,
+            ))
+            perfiles[n] = (tipo_cliente, rango, self.rng.randint(1, 28), self.rng.randint(1000, 50000))
+
+        with transaction.atomic():
+            # bulk_create no devuelve los id en MySQL, se recuperan por el número de cada registro
+            Cliente.objects.bulk_create(clientes, batch_size=TAMANO_LOTE)
+            id_clientes = dict(Cliente.objects.filter(numero_cliente__in=[c.numero_cliente for c in clientes]).values_list('numero_cliente', 'id'))
+            for contrato in contratos:
+                contrato.cliente_id = id_clientes['CLI-' + contrato.numero_contrato[4:]]
+            Contrato.objects.bulk_create(contratos, batch_size=TAMANO_LOTE)
+            id_contratos = dict(Contrato.objects.filter(numero_contrato__in=[c.numero_contrato for c in contratos]).values_list('numero_contrato', 'id'))
+            for medidor in medidores:
+                medidor.contrato_id = id_contratos['CON-' + medidor.numero_medidor[4:]]
+            Medidor.objects.bulk_create(medidores, batch_size=TAMANO_LOTE)
+            id_medidores = dict(Medidor.objects.filter(numero_medidor__in=[m.numero_medidor for m in medidores]).values_list('numero_medidor', 'id'))
+
+            self.resumen['clientes'] += len(clientes)
+            self.resumen['contratos'] += len(contratos)
+            self.resumen['medidores'] += len(medidores)
+            self._crear_historial(perfiles, id_clientes, id_medidores)
+
+    def _tipo_cliente(self):
+        valor = self.rng.random()
+        acumulado = 0
+        for tipo_cliente, proporcion, rango in TIPOS_CLIENTE:
+            acumulado += proporcion
+            if valor < acumulado:
+                return tipo_cliente, rango
+        return TIPOS_CLIENTE[0][0], TIPOS_CLIENTE[0][2]
+
+    def _crear_historial(self, perfiles, id_clientes, id_medidores):
+        lecturas, notificaciones_lectura = [], []
+        for n, (tipo_cliente, (minimo, maximo), dia, lectura_actual) in perfiles.items():
+            medidor_id = id_medidores[f'MED-{n:07d}']
+            for mes in self.meses:
+                fecha_lectura = mes.replace(day=dia)
+                if fecha_lectura > self.hoy:
+                    break
+                consumo = self.rng.randint(minimo, maximo)
+                if temporada_tarifa(mes) == 'Invierno':
+                    consumo = int(consumo * 1.25)
+                if self.rng.random() < 0.005:
+                    # algunos consumos anómalos para las alertas
+                    consumo *= 4
+                    notificaciones_lectura.append(NotificacionLectura(
+                        registro_consumo=f"Consumo inusual en medidor MED-{n:07d}: {consumo} kWh en {mes:%m/%Y}"))
+                lectura_actual += consumo
+                lecturas.append(Lectura(
+                    fecha_lectura=fecha_lectura,
+                    consumo_energetico=consumo,
+                    tipo_lectura='Digital' if self.rng.random() < 0.85 else 'Analogica',
+                    lectura_actual=lectura_actual,
+                    medidor_id=medidor_id,
+                ))
+        Lectura.objects.bulk_create(lecturas, batch_size=TAMANO_LOTE)
+        NotificacionLectura.objects.bulk_create(notificaciones_lectura, batch_size=TAMANO_LOTE)
+        self.resumen['lecturas'] += len(lecturas)
+        self.resumen['notificaciones'] += len(notificaciones_lectura)
+
+        # una boleta por lectura mensual, con la tarifa vigente a la fecha de la lectura
+        id_lecturas = dict(
+            ((medidor_id, fecha), lectura_id) for medidor_id, fecha, lectura_id in
+            Lectura.objects.filter(medidor_id__in=id_medidores.values()).values_list('medidor_id', 'fecha_lectura', 'id')
+        )
+        medidor_a_cliente = {id_medidores[f'MED-{n:07d}']: (n, perfiles[n][0]) for n in perfiles}
+        boletas, cobros, notificaciones_pago = [], {}, []
+        for lectura, precio in zip(lecturas, self.precios_lecturas(lecturas, medidor_a_cliente)):
+            n = medidor_a_cliente[lectura.medidor_id][0]
+            if precio is None:
+                continue
+            fecha_emision = _fin_de_mes(lectura.fecha_lectura)
+            fecha_vencimiento = fecha_emision + timedelta(days=DIAS_VENCIMIENTO)
+            monto = lectura.consumo_energetico * precio
+            estado, pago = self._cobro(fecha_emision, fecha_vencimiento, monto)
+            lectura_id = id_lecturas[(lectura.medidor_id, lectura.fecha_lectura)]
+            boletas.append(Boleta(
+                fecha_emision=fecha_emision,
+                fecha_vencimiento=fecha_vencimiento,
+                monto_total=monto,
+                consumo_energetico=str(lectura.consumo_energetico),
+                estado=estado,
+                cliente_id=id_clientes[f'CLI-{n:07d}'],
+                lectura_id=lectura_id,
+            ))
+            if pago:
+                cobros[lectura_id] = pago
+            if estado == 'Vencido':
+                notificaciones_pago.append(NotificacionPago(
+                    deuda_pendiente=f"Cliente CLI-{n:07d} tiene una boleta vencida el {fecha_vencimiento:%d/%m/%Y} por ${monto}"))
+        Boleta.objects.bulk_create(boletas, batch_size=TAMANO_LOTE)
+        NotificacionPago.objects.bulk_create(notificaciones_pago, batch_size=TAMANO_LOTE)
+        self.resumen['boletas'] += len(boletas)
+        self.resumen['notificaciones'] += len(notificaciones_pago)
+
+        id_boletas = dict(
+            Boleta.objects.filter(lectura__medidor_id__in=id_medidores.values()).values_list('lectura_id', 'id')
+        )
+        pagos = []
+        for lectura_id, pago in cobros.items():
+            pago.boleta_id = id_boletas[lectura_id]
+            pagos.append(pago)
+        Pago.objects.bulk_create(pagos, batch_size=TAMANO_LOTE)
+        self.resumen['pagos'] += len(pagos)
+
+    def _cobro(self, fecha_emision, fecha_vencimiento, monto):
+        """Decide si la boleta se pagó (total o parcialmente) y devuelve (estado, Pago o None)"""
+        resultado = self.rng.random()
+        fecha_pago = fecha_emision + timedelta(days=self.rng.randint(1, DIAS_VENCIMIENTO + 10))
+        metodo = self.rng.choice(METODOS_PAGO)
+        impaga = 'Vencido' if fecha_vencimiento < self.hoy else 'Pendiente'
+        if fecha_pago > self.hoy or resultado >= 0.95:
+            return impaga, None
+        self.referencias += 1
+        referencia = f'REF-{self.referencias:010d}'
+        if resultado < 0.88:
+            return 'Pagado', Pago(fecha_pago=fecha_pago, monto_pagado=monto, metodo_pago=metodo,
+                                  numero_referencia=referencia, estado_pago='Pagado')
+        parcial = max(1, int(monto * self.rng.uniform(0.3, 0.8)))
+        return impaga, Pago(fecha_pago=fecha_pago, monto_pagado=parcial, metodo_pago=metodo,
+                            numero_referencia=referencia, estado_pago='No pagado completamente')
+
+
+def generar_datos(clientes=1000, meses=12, usuarios=10, semilla=42, mes_final=None, tamano_bloque=1000, informar=None):
+    """
+    Genera `clientes` clientes (con un contrato y un medidor cada uno) y `meses` meses de lecturas,
+    boletas y pagos hasta `mes_final` (por defecto el mes anterior al actual), que debe ser anterior
+    al mes actual para que ningún registro quede en el futuro.
+    `informar` recibe el resumen parcial después de cada bloque.
+    """
+    mes_final = (mes_final or _mes_anterior(date.today())).replace(day=1)
+    if mes_final >= date.today().replace(day=1):
+        raise ValueError('El último mes debe ser anterior al mes actual')
+    if Cliente.objects.filter(numero_cliente='CLI-0000001').exists() or Usuario.objects.filter(username='usuario00001').exists():
+        raise ValueError("La base de datos ya tiene datos generados (CLI-0000001 / usuario00001)")
+    generador = _Generador(meses, usuarios, semilla, mes_final)
+    generador.crear_tarifas()
+    generador.crear_usuarios()
+    for desde in range(1, clientes + 1, tamano_bloque):
+        generador.crear_bloque(desde, min(desde + tamano_bloque, clientes + 1))
+        if informar:
+            informar(generador.resumen)
+
+    # bulk_create no dispara señales: se recalculan los contadores del dashboard,
+    # la última lectura de cada medidor y los resúmenes mensuales de consumo
+    estadisticas.reconciliar()
+    consumos.reconstruir_ultimas_lecturas()
+    resumenes.reconstruir()
+    reportes.invalidar()
+    tarifas.invalidar()
+    return generador.resumen
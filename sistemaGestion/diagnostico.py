@@ -0,0 +1,212 @@
+"""
+Modo de diagnóstico de consultas SQL (se activa con DIAGNOSTICO_SQL en settings).
+
+DiagnosticoMiddleware observa las consultas de cada petición y registra dos tipos de hallazgos:
+- consultas lentas: las que superan DIAGNOSTICO_SQL_UMBRAL_MS, con su plan (EXPLAIN), la vista y la pila
+- N+1: la misma forma de consulta repetida DIAGNOSTICO_SQL_REPETICIONES veces o más en una petición
+  (por ejemplo una plantilla que recorre contratos_cliente y accede a una relación en cada fila)
+
+Los hallazgos se escriben como JSON (una línea cada uno) en un archivo que rota por tamaño,
+y la vista diagnostico_sql los resume para el administrador.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+TAMANO_MAXIMO_ARCHIVO = 5 * 1024 * 1024
+ARCHIVOS_RESPALDO = 3
+# cantidad de líneas de la pila que se guardan por hallazgo
+PROFUNDIDAD_PILA = 8
+# módulos de instrumentación que no aportan a la pila
+ARCHIVOS_OMITIDOS = ('diagnostico.py', 'metricas.py')
+
+logger = logging.getLogger('sistemaGestion.diagnostico')
+
+
+def umbral_ms():
+    return getattr(settings, 'DIAGNOSTICO_SQL_UMBRAL_MS', 100)
+
+
+def repeticiones_n_mas_1():
+    return getattr(settings, 'DIAGNOSTICO_SQL_REPETICIONES', 5)
+
+
+def archivo_registro():
+    return str(getattr(settings, 'DIAGNOSTICO_SQL_ARCHIVO', os.path.join(settings.BASE_DIR, 'logs', 'diagnostico_sql.log')))
+
+
+def _configurar_logger():
+    """El manejador se agrega al usarlo por primera vez, así el archivo solo existe si el diagnóstico está activo"""
+    if logger.handlers:
+        return
+    ruta = archivo_registro()
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    manejador = RotatingFileHandler(ruta, maxBytes=TAMANO_MAXIMO_ARCHIVO, backupCount=ARCHIVOS_RESPALDO, encoding='utf-8')
+    manejador.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(manejador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def forma_consulta(sql):
+    """
+    SQL sin valores literales, para agrupar las consultas que solo cambian en sus parámetros.
+    Las listas IN de distinto largo quedan con la misma forma.
+    """
+    forma = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    forma = re.sub(r'\b\d+(?:\.\d+)?\b', '?', forma)
+    forma = forma.replace('%s', '?')
+    forma = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?...)', forma)
+    return forma
+
+
+def pila_del_proyecto():
+    """Líneas de la pila que pertenecen al proyecto, más la plantilla y línea que se estaba renderizando"""
+    base = str(settings.BASE_DIR)
+    lineas, plantilla = [], None
+    frame = sys._getframe(1)
+    while frame is not None:
+        codigo = frame.f_code
+        if plantilla is None and codigo.co_name == 'render_annotated':
+            nodo = frame.f_locals.get('self')
+            origen = getattr(nodo, 'origin', None)
+            token = getattr(nodo, 'token', None)
+            if origen is not None and token is not None:
+                plantilla = f'plantilla {origen.template_name}:{token.lineno}'
+        archivo = codigo.co_filename
+        if archivo.startswith(base) and 'site-packages' not in archivo and not archivo.endswith(ARCHIVOS_OMITIDOS):
+            lineas.append(f'{os.path.relpath(archivo, base)}:{frame.f_lineno} {codigo.co_name}')
+        frame = frame.f_back
+    if plantilla:
+        lineas.insert(0, plantilla)
+    return lineas[:PROFUNDIDAD_PILA]
+
+
+def plan_de_ejecucion(sql, params):
+    """EXPLAIN de una consulta SELECT ya ejecutada; None si el motor no puede explicarla"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    # el EXPLAIN no es una consulta de la petición: se ejecuta sin los execute_wrapper activos
+    # (por ejemplo el de MetricasMiddleware) para que no se sume a sus métricas
+    wrappers = connection.execute_wrappers
+    connection.execute_wrappers = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(valor) for valor in fila) for fila in cursor.fetchall())
+    except DatabaseError as error:
+        return f'No se pudo obtener el plan: {error}'
+    finally:
+        connection.execute_wrappers = wrappers
+
+
+class CapturaConsultas:
+    """execute_wrapper que agrupa las consultas de una petición por forma y guarda las lentas"""
+    def __init__(self, umbral_segundos):
+        self.umbral_segundos = umbral_segundos
+        self.formas = {}
+        self.lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            forma = forma_consulta(sql)
+            datos = self.formas.setdefault(forma, {'veces': 0, 'segundos': 0.0, 'pila': None})
+            datos['veces'] += 1
+            datos['segundos'] += duracion
+            # la pila se toma en la segunda repetición, que es la que está dentro del ciclo
+            if datos['veces'] == 2:
+                datos['pila'] = pila_del_proyecto()
+            if duracion >= self.umbral_segundos and not many:
+                self.lentas.append((sql, params, duracion, pila_del_proyecto()))
+
+
+class DiagnosticoMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'DIAGNOSTICO_SQL', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _configurar_logger()
+
+    def __call__(self, request):
+        captura = CapturaConsultas(umbral_ms() / 1000)
+        with connection.execute_wrapper(captura):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # las exportaciones leen las filas mientras se envía el contenido: se revisa al terminar de enviarlo
+            response.streaming_content = self._capturar_contenido(response.streaming_content, request, captura)
+        else:
+            self._informar(request, captura)
+        return response
+
+    def _capturar_contenido(self, contenido, request, captura):
+        try:
+            with connection.execute_wrapper(captura):
+                yield from contenido
+        finally:
+            self._informar(request, captura)
+
+    def _informar(self, request, captura):
+        resolver_match = getattr(request, 'resolver_match', None)
+        vista = resolver_match.view_name if resolver_match else 'sin_ruta'
+        comun = {'fecha': timezone.now().isoformat(timespec='seconds'), 'vista': vista, 'ruta': request.path}
+
+        # el EXPLAIN se ejecuta fuera de los wrappers para no registrarse a sí mismo
+        # (en el archivo queda la forma de la consulta, sin los valores de los parámetros)
+        for sql, params, duracion, pila in captura.lentas:
+            self.registrar({**comun, 'tipo': 'lenta', 'milisegundos': round(duracion * 1000, 1), 'veces': 1,
+                            'sql': forma_consulta(sql), 'plan': plan_de_ejecucion(sql, params), 'pila': pila})
+
+        for forma, datos in captura.formas.items():
+            if datos['veces'] >= repeticiones_n_mas_1():
+                self.registrar({**comun, 'tipo': 'n+1', 'milisegundos': round(datos['segundos'] * 1000, 1), 'veces': datos['veces'],
+                                'sql': forma, 'plan': None, 'pila': datos['pila']})
+
+    def registrar(self, hallazgo):
+        logger.info(json.dumps(hallazgo, ensure_ascii=False))
+
+
+def leer_hallazgos(limite=1000):
+    """Últimos hallazgos del archivo actual (el más reciente primero)"""
+    try:
+        with open(archivo_registro(), encoding='utf-8') as archivo:
+            ultimas = deque(archivo, maxlen=limite)
+    except FileNotFoundError:
+        return []
+    hallazgos = []
+    for linea in reversed(ultimas):
+        try:
+            hallazgos.append(json.loads(linea))
+        except ValueError:
+            continue
+    return hallazgos
+
+
+def resumen_hallazgos(hallazgos):
+    """Agrupa los hallazgos por tipo, vista y forma de consulta, de peor a mejor"""
+    grupos = {}
+    for hallazgo in hallazgos:
+        clave = (hallazgo['tipo'], hallazgo['vista'], hallazgo['sql'])
+        grupo = grupos.get(clave)
+        if grupo is None:
+            # los hallazgos vienen del más reciente al más antiguo: el primero da la fecha, el plan y la pila
+            grupo = grupos[clave] = {**hallazgo, 'ocurrencias': 0, 'maximo_ms': 0, 'maximo_veces': 0}
+        grupo['ocurrencias'] += 1
+        grupo['maximo_ms'] = max(grupo['maximo_ms'], hallazgo['milisegundos'])
+        grupo['maximo_veces'] = max(grupo['maximo_veces'], hallazgo['veces'])
+    return sorted(grupos.values(), key=lambda grupo: grupo['maximo_ms'] * grupo['ocurrencias'], reverse=True)
@@ -0,0 +1,50 @@
+"""
+Contadores del dashboard.
+
+Los totales se guardan en la tabla EstadisticaSistema y se actualizan con incrementos
+(+1 / -1) desde las señales de los modelos, así el dashboard no ejecuta COUNT(*).
+reconciliar() recalcula todos los contadores desde las tablas para corregir diferencias
+(por ejemplo las producidas por bulk_create o update, que no disparan señales).
+"""
+
+from django.db.models import F
+
+from .models import Boleta, Cliente, Contrato, EstadisticaSistema, Lectura, Medidor, Pago
+
+# clave del contador -> consulta con la que se recalcula
+CONTADORES = {
+    'total_clientes': lambda: Cliente.objects.all(),
+    'total_contratos': lambda: Contrato.objects.all(),
+    'total_medidores': lambda: Medidor.objects.all(),
+    'lecturas_pendientes': lambda: Lectura.objects.all(),
+    'boletas_emitidas': lambda: Boleta.objects.all(),
+    'pagos_realizados': lambda: Pago.objects.filter(estado_pago='Pagado'),
+}
+
+
+def reconciliar():
+    """Recalcula todos los contadores y devuelve un diccionario {clave: (anterior, nuevo)}"""
+    anteriores = dict(EstadisticaSistema.objects.values_list('clave', 'valor'))
+    cambios = {}
+    for clave, consulta in CONTADORES.items():
+        valor = consulta().count()
+        EstadisticaSistema.objects.update_or_create(clave=clave, defaults={'valor': valor})
+        cambios[clave] = (anteriores.get(clave), valor)
+    return cambios
+
+
+def incrementar(clave, cantidad=1):
+    if not cantidad:
+        return
+    actualizados = EstadisticaSistema.objects.filter(clave=clave).update(valor=F('valor') + cantidad)
+    if not actualizados:
+        # el contador aun no existe: se inicializan todos desde las tablas
+        reconciliar()
+
+
+def obtener():
+    """Devuelve los contadores del dashboard leyendo solo la tabla resumen"""
+    valores = dict(EstadisticaSistema.objects.values_list('clave', 'valor'))
+    if len(valores) < len(CONTADORES):
+        valores = {clave: nuevo for clave, (_, nuevo) in reconciliar().items()}
+    return {clave: valores.get(clave, 0) for clave in CONTADORES}
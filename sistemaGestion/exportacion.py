@@ -0,0 +1,137 @@
+"""
+Exportación completa de las listas en CSV o JSON Lines.
+
+Las filas se envían con StreamingHttpResponse a medida que se leen: el queryset
+filtrado de la vista se recorre en bloques por id (keyset, sin OFFSET) y cada bloque
+se lee con values_list e iterator(), así nunca se carga el resultado completo en memoria.
+MySQL no soporta cursores de servidor, por eso los bloques se piden por separado.
+"""
+
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+# filas por consulta al recorrer el queryset
+TAMANO_BLOQUE = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# columnas de cada lista: (encabezado, campo para values_list)
+COLUMNAS = {
+    'clientes': [
+        ('numero_cliente', 'numero_cliente'),
+        ('nombre', 'nombre'),
+        ('email', 'email'),
+        ('telefono', 'telefono'),
+        ('tipo_cliente', 'tipo_cliente'),
+        ('usuario', 'usuario__username'),
+    ],
+    'contratos': [
+        ('numero_contrato', 'numero_contrato'),
+        ('fecha_inicio', 'fecha_inicio'),
+        ('fecha_fin', 'fecha_fin'),
+        ('estado', 'estado'),
+        ('numero_cliente', 'cliente__numero_cliente'),
+    ],
+    'medidores': [
+        ('numero_medidor', 'numero_medidor'),
+        ('fecha_instalacion', 'fecha_instalacion'),
+        ('ubicacion', 'ubicacion'),
+        ('estado_medidor', 'estado_medidor'),
+        ('numero_contrato', 'contrato__numero_contrato'),
+        ('ultima_lectura_fecha', 'ultima_lectura_fecha'),
+        ('ultima_lectura_valor', 'ultima_lectura_valor'),
+        ('ultimo_consumo', 'ultimo_consumo'),
+    ],
+    'lecturas': [
+        ('id', 'id'),
+        ('numero_medidor', 'medidor__numero_medidor'),
+        ('fecha_lectura', 'fecha_lectura'),
+        ('tipo_lectura', 'tipo_lectura'),
+        ('lectura_actual', 'lectura_actual'),
+        ('consumo_energetico', 'consumo_energetico'),
+    ],
+    'boletas': [
+        ('id', 'id'),
+        ('numero_cliente', 'cliente__numero_cliente'),
+        ('lectura', 'lectura_id'),
+        ('fecha_emision', 'fecha_emision'),
+        ('fecha_vencimiento', 'fecha_vencimiento'),
+        ('consumo_energetico', 'consumo_energetico'),
+        ('monto_total', 'monto_total'),
+        ('estado', 'estado'),
+    ],
+    'pagos': [
+        ('id', 'id'),
+        ('boleta', 'boleta_id'),
+        ('fecha_pago', 'fecha_pago'),
+        ('monto_pagado', 'monto_pagado'),
+        ('metodo_pago', 'metodo_pago'),
+        ('numero_referencia', 'numero_referencia'),
+        ('estado_pago', 'estado_pago'),
+    ],
+    'tarifas': [
+        ('tipo_cliente', 'tipo_cliente'),
+        ('tipo_tarifa', 'tipo_tarifa'),
+        ('fecha_vigencia', 'fecha_vigencia'),
+        ('precio', 'precio'),
+    ],
+}
+
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito, para usar csv.writer en un generador"""
+    def write(self, valor):
+        return valor
+
+
+def formato_solicitado(request):
+    """Devuelve el formato pedido en el parámetro GET 'exportar' o None si no es una exportación"""
+    formato = request.GET.get('exportar', '')
+    return formato if formato in FORMATOS else None
+
+
+def recorrer_filas(objetos, campos, tamano_bloque=TAMANO_BLOQUE):
+    """Recorre el queryset en bloques ordenados por id y entrega tuplas con los campos pedidos"""
+    objetos = objetos.order_by('id').values_list('id', *campos)
+    ultimo_id = None
+    while True:
+        bloque = objetos if ultimo_id is None else objetos.filter(id__gt=ultimo_id)
+        cantidad = 0
+        for fila in bloque[:tamano_bloque].iterator(chunk_size=tamano_bloque):
+            ultimo_id = fila[0]
+            cantidad += 1
+            yield fila[1:]
+        if cantidad < tamano_bloque:
+            return
+
+
+def _lineas_csv(filas, encabezados):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _lineas_jsonl(filas, encabezados):
+    for fila in filas:
+        yield json.dumps(dict(zip(encabezados, fila)), ensure_ascii=False, default=str) + '\n'
+
+
+def exportar_filas(formato, filas, encabezados, nombre):
+    """Respuesta en streaming con las filas (tuplas en el orden de `encabezados`) en el formato pedido"""
+    lineas = _lineas_csv(filas, encabezados) if formato == 'csv' else _lineas_jsonl(filas, encabezados)
+    respuesta = StreamingHttpResponse(lineas, content_type=FORMATOS[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
+
+
+def exportar(formato, objetos, nombre):
+    """Respuesta en streaming con todas las filas del queryset ya filtrado por la vista"""
+    encabezados = [encabezado for encabezado, _ in COLUMNAS[nombre]]
+    campos = [campo for _, campo in COLUMNAS[nombre]]
+    return exportar_filas(formato, recorrer_filas(objetos, campos), encabezados, nombre)
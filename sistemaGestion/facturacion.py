@@ -0,0 +1,121 @@
+"""
+Motor de facturación masiva.
+
+Genera las boletas de un ciclo completo a partir de las lecturas del periodo:
+sigue la cadena Medidor → Contrato → Cliente, suma el consumo de cada medidor
+y lo valoriza con la tarifa vigente a la fecha de corte según el tipo de cliente.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+
+from . import estadisticas, reportes, tarifas
+from .models import Boleta, Lectura
+
+# cantidad de boletas que se insertan por transacción
+TAMANO_BLOQUE = 2000
+
+# dias de plazo para pagar (BoletaForm exige al menos 15)
+DIAS_VENCIMIENTO = 20
+
+# meses en que rige la tarifa de invierno (abril a septiembre)
+MESES_INVIERNO = range(4, 10)
+
+
+def temporada_tarifa(fecha):
+    """Devuelve el tipo de tarifa (Verano/Invierno) que corresponde a una fecha"""
+    return 'Invierno' if fecha.month in MESES_INVIERNO else 'Verano'
+
+
+def tarifas_vigentes(fecha):
+    """
+    Devuelve un diccionario {tipo_cliente: precio} con la tarifa vigente a la fecha,
+    es decir, la de fecha_vigencia más reciente que no sea posterior a la fecha.
+    Se resuelve en memoria (ver tarifas.py), sin consultar la tabla por cada tipo de cliente.
+    """
+    return tarifas.resolutor().vigentes(temporada_tarifa(fecha), fecha)
+
+
+def consumos_del_periodo(fecha_inicio, fecha_fin):
+    """
+    Suma en la base de datos el consumo de cada medidor con contrato activo en el periodo,
+    junto con su última lectura del periodo (la de fecha_lectura más reciente).
+    Es una sola consulta agrupada que se lee por bloques con iterator().
+    """
+    ultima_lectura = Subquery(
+        Lectura.objects.filter(medidor_id=OuterRef('medidor_id'), fecha_lectura__range=(fecha_inicio, fecha_fin))
+        .order_by('-fecha_lectura', '-id')
+        .values('id')[:1]
+    )
+    return (
+        Lectura.objects.filter(
+            fecha_lectura__range=(fecha_inicio, fecha_fin),
+            medidor__contrato__estado='Activo',
+            medidor__contrato__cliente__isnull=False,
+        )
+        .values('medidor_id', 'medidor__contrato__cliente_id', 'medidor__contrato__cliente__tipo_cliente')
+        .annotate(consumo=Sum('consumo_energetico'), ultima_lectura=ultima_lectura)
+        .order_by('medidor_id')
+        .iterator(chunk_size=TAMANO_BLOQUE)
+    )
+
+
+def _guardar_bloque(bloque, fecha_inicio, fecha_fin, resumen):
+    """`bloque` es una lista de (medidor_id, boleta)"""
+    # se omiten los medidores que ya tienen una boleta del periodo (asociada a una lectura del
+    # periodo), para poder re-ejecutar el ciclo sin duplicar aunque se hayan agregado lecturas
+    ya_emitidas = set(
+        Boleta.objects.filter(
+            lectura__medidor_id__in=[medidor_id for medidor_id, _ in bloque],
+            lectura__fecha_lectura__range=(fecha_inicio, fecha_fin),
+        ).values_list('lectura__medidor_id', flat=True)
+    )
+    nuevas = [boleta for medidor_id, boleta in bloque if medidor_id not in ya_emitidas]
+    with transaction.atomic():
+        Boleta.objects.bulk_create(nuevas, batch_size=TAMANO_BLOQUE)
+        # bulk_create no dispara señales, el contador se actualiza aqui
+        estadisticas.incrementar('boletas_emitidas', len(nuevas))
+    reportes.invalidar()
+    resumen['ya_emitidas'] += len(bloque) - len(nuevas)
+    resumen['creadas'] += len(nuevas)
+
+
+def generar_boletas(fecha_inicio, fecha_fin, fecha_emision=None, dias_vencimiento=DIAS_VENCIMIENTO, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Emite una boleta 'Pendiente' por cada medidor con consumo en el periodo.
+    Las boletas se insertan con bulk_create en bloques, cada bloque en su propia transacción.
+    Retorna un diccionario con el resumen de la ejecución.
+    """
+    fecha_emision = fecha_emision or fecha_fin
+    fecha_vencimiento = fecha_emision + timedelta(days=dias_vencimiento)
+    precios = tarifas_vigentes(fecha_fin)
+
+    resumen = {'creadas': 0, 'ya_emitidas': 0, 'sin_tarifa': 0, 'sin_consumo': 0}
+    bloque = []
+    for fila in consumos_del_periodo(fecha_inicio, fecha_fin):
+        precio = precios.get(fila['medidor__contrato__cliente__tipo_cliente'])
+        if precio is None:
+            resumen['sin_tarifa'] += 1
+            continue
+        consumo = fila['consumo'] or 0
+        if consumo <= 0:
+            resumen['sin_consumo'] += 1
+            continue
+
+        bloque.append((fila['medidor_id'], Boleta(
+            fecha_emision=fecha_emision,
+            fecha_vencimiento=fecha_vencimiento,
+            monto_total=consumo * precio,
+            consumo_energetico=str(consumo),
+            estado='Pendiente',
+            cliente_id=fila['medidor__contrato__cliente_id'],
+            lectura_id=fila['ultima_lectura'],
+        )))
+        if len(bloque) >= tamano_bloque:
+            _guardar_bloque(bloque, fecha_inicio, fecha_fin, resumen)
+            bloque = []
+    if bloque:
+        _guardar_bloque(bloque, fecha_inicio, fecha_fin, resumen)
+    return resumen
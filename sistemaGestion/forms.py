@@ -1,47 +1,80 @@
 from django import forms
 from datetime import date, timedelta
 import re
+from django.urls import reverse
+from . import consumos
 from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, Usuario, NotificacionPago, NotificacionLectura
 
+# ==========================================================
+# AUTOCOMPLETADO DE RELACIONES (ForeignKey)
+# ==========================================================
+# textos con que se muestra cada registro en los formularios y en el autocompletado
+def etiqueta_usuario(usuario):
+    return f"{usuario.username} ({usuario.rol})"
+
+def etiqueta_cliente(cliente):
+    return f"{cliente.numero_cliente} - {cliente.nombre}"
+
+def etiqueta_contrato(contrato):
+    return f"{contrato.numero_contrato} - {contrato.estado}"
+
+def etiqueta_medidor(medidor):
+    return f"{medidor.numero_medidor} - {medidor.ubicacion}"
+
+
+class SelectAutocompletar(forms.Select):
+    """
+    Select que solo renderiza la opción seleccionada (no recorre toda la tabla).
+    Las demás opciones se buscan con el endpoint JSON de autocompletar desde main.js.
+    """
+    def __init__(self, entidad, attrs=None):
+        super().__init__(attrs)
+        self.entidad = entidad
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocompletar'] = reverse('sistemaGestion:autocompletar', args=[self.entidad])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        # en vez de iterar todas las opciones del ModelChoiceField, se busca solo el valor actual
+        campo = self.choices.field
+        seleccionados = [valor for valor in value if str(valor).isdigit()]
+        opciones = [self.create_option(name, '', campo.empty_label or '', not seleccionados, 0)]
+        if seleccionados:
+            for indice, objeto in enumerate(campo.queryset.filter(pk__in=seleccionados), start=1):
+                opciones.append(self.create_option(name, objeto.pk, campo.label_from_instance(objeto), True, indice))
+        return [(None, opciones, 0)]
+
 # ==========================================================
 # FORMULARIO CLIENTE - MODIFICADO
 # ==========================================================
 class ClienteForm(forms.ModelForm):
-    # ✅ CAMPO NUEVO: Menú desplegable para usuario_asociado
-    usuario_asociado = forms.ChoiceField(
-        choices=[],
-        required=False,
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        label="Usuario Responsable"
-    )
-    
     class Meta:
         model = Cliente
-        fields = ['numero_cliente', 'nombre', 'email', 'telefono', 'usuario_asociado']
+        fields = ['numero_cliente', 'nombre', 'email', 'telefono', 'tipo_cliente', 'usuario']
         widgets = {
             'numero_cliente': forms.TextInput(attrs={'placeholder': 'Ejemplo: CLI-001','class': 'form-control'}),
             'nombre': forms.TextInput(attrs={'placeholder': 'Ingresa el nombre completo del cliente','class': 'form-control'}),
             'email': forms.EmailInput(attrs={'placeholder': 'ejemplo@correo.com','class': 'form-control'}),
             'telefono': forms.TextInput(attrs={'placeholder': '+56 9 1234 5678','class': 'form-control'}),
+            'tipo_cliente': forms.Select(attrs={'class': 'form-control'}),
+            'usuario': SelectAutocompletar('usuarios', attrs={'class': 'form-control'}),
         }
         labels = {
             'numero_cliente': 'Número de Cliente',
             'nombre': 'Nombre Completo',
             'email': 'Correo Electrónico',
             'telefono': 'Teléfono',
-            'usuario_asociado': 'Usuario Responsable'
+            'tipo_cliente': 'Tipo de Cliente',
+            'usuario': 'Usuario Responsable'
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ Llenar menú desplegable con usuarios existentes
-        usuarios = Usuario.objects.all()
-        choices = [('', '-- Seleccionar usuario --')]
-        choices += [(usuario.username, f"{usuario.username} ({usuario.rol})") for usuario in usuarios]
-        self.fields['usuario_asociado'].choices = choices
-        
-        if self.instance and self.instance.usuario_asociado:
-            self.fields['usuario_asociado'].initial = self.instance.usuario_asociado
+        # ✅ Usuario con autocompletado (ForeignKey, se valida con una búsqueda por id)
+        self.fields['usuario'].empty_label = '-- Seleccionar usuario --'
+        self.fields['usuario'].label_from_instance = etiqueta_usuario
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
@@ -86,41 +119,30 @@ class ClienteForm(forms.ModelForm):
 # FORMULARIO CONTRATO - MODIFICADO
 # ==========================================================
 class ContratoForm(forms.ModelForm):
-    # ✅ CAMPO NUEVO: Menú desplegable para cliente_numero
-    cliente_numero = forms.ChoiceField(
-        choices=[],
-        required=True,
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        label="Cliente Asociado"
-    )
-    
     class Meta:
         model = Contrato
-        fields = ['fecha_inicio', 'fecha_fin', 'estado', 'numero_contrato', 'cliente_numero']
+        fields = ['fecha_inicio', 'fecha_fin', 'estado', 'numero_contrato', 'cliente']
         widgets = {
             'fecha_inicio': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'fecha_fin': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'numero_contrato': forms.TextInput(attrs={'placeholder': 'Ejemplo: CON-001', 'class': 'form-control'}),
             'estado': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': SelectAutocompletar('clientes', attrs={'class': 'form-control'}),
         }
         labels = {
             'fecha_inicio': 'Fecha de Inicio',
             'fecha_fin': 'Fecha de Finalización',
             'estado': 'Estado del Contrato',
             'numero_contrato': 'Número de Contrato',
-            'cliente_numero': 'Cliente Asociado'
+            'cliente': 'Cliente Asociado'
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ Llenar menú desplegable con clientes existentes
-        clientes = Cliente.objects.all()
-        choices = [('', '-- Seleccionar cliente --')]
-        choices += [(cliente.numero_cliente, f"{cliente.numero_cliente} - {cliente.nombre}") for cliente in clientes]
-        self.fields['cliente_numero'].choices = choices
-        
-        if self.instance and self.instance.cliente_numero:
-            self.fields['cliente_numero'].initial = self.instance.cliente_numero
+        # ✅ Cliente con autocompletado (ForeignKey, se valida con una búsqueda por id)
+        self.fields['cliente'].required = True
+        self.fields['cliente'].empty_label = '-- Seleccionar cliente --'
+        self.fields['cliente'].label_from_instance = etiqueta_cliente
 
     def clean_numero_contrato(self):
         numero = self.cleaned_data.get('numero_contrato')
@@ -172,17 +194,9 @@ class ContratoForm(forms.ModelForm):
 # FORMULARIO MEDIDOR - MODIFICADO
 # ==========================================================
 class MedidorForm(forms.ModelForm):
-    # ✅ CAMPO NUEVO: Menú desplegable para contrato_numero
-    contrato_numero = forms.ChoiceField(
-        choices=[],
-        required=False,
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        label="Contrato Asociado"
-    )
-    
     class Meta:
         model = Medidor
-        fields = ['numero_medidor', 'fecha_instalacion', 'ubicacion', 'estado_medidor', 'imagen_ubicacion', 'imagen_fisica', 'contrato_numero']
+        fields = ['numero_medidor', 'fecha_instalacion', 'ubicacion', 'estado_medidor', 'imagen_ubicacion', 'imagen_fisica', 'contrato']
         widgets = {
             'numero_medidor': forms.TextInput(attrs={'placeholder': 'Ejemplo: MED-001','class': 'form-control'}),
             'fecha_instalacion': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -190,6 +204,7 @@ class MedidorForm(forms.ModelForm):
             'estado_medidor': forms.Select(attrs={'class': 'form-control'}),
             'imagen_ubicacion': forms.URLInput(attrs={'placeholder': 'https://ejemplo.com/mapa-ubicacion.jpg','class': 'form-control'}),
             'imagen_fisica': forms.URLInput(attrs={'placeholder': 'https://ejemplo.com/foto-medidor.jpg','class': 'form-control'}),
+            'contrato': SelectAutocompletar('contratos', attrs={'class': 'form-control'}),
         }
         labels = {
             'numero_medidor': 'Número de Medidor',
@@ -198,19 +213,14 @@ class MedidorForm(forms.ModelForm):
             'estado_medidor': 'Estado del Medidor',
             'imagen_ubicacion': 'URL Imagen Mapa/Ubicación (opcional)',
             'imagen_fisica': 'URL Imagen Física del Medidor (opcional)',
-            'contrato_numero': 'Contrato Asociado'
+            'contrato': 'Contrato Asociado'
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ Llenar menú desplegable con contratos existentes
-        contratos = Contrato.objects.all()
-        choices = [('', '-- Seleccionar contrato --')]
-        choices += [(contrato.numero_contrato, f"{contrato.numero_contrato} - {contrato.estado}") for contrato in contratos]
-        self.fields['contrato_numero'].choices = choices
-        
-        if self.instance and self.instance.contrato_numero:
-            self.fields['contrato_numero'].initial = self.instance.contrato_numero
+        # ✅ Contrato con autocompletado (ForeignKey, se valida con una búsqueda por id)
+        self.fields['contrato'].empty_label = '-- Seleccionar contrato --'
+        self.fields['contrato'].label_from_instance = etiqueta_contrato
 
     def clean_numero_medidor(self):
         numero = self.cleaned_data.get('numero_medidor')
@@ -246,23 +256,16 @@ class MedidorForm(forms.ModelForm):
 # FORMULARIO BOLETA - MODIFICADO
 # ==========================================================
 class BoletaForm(forms.ModelForm):
-    # ✅ CAMPO NUEVO: Menú desplegable para cliente_numero
-    cliente_numero = forms.ChoiceField(
-        choices=[],
-        required=True,
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        label="Cliente Asociado"
-    )
-    
     class Meta:
         model = Boleta
-        fields = ['fecha_emision', 'fecha_vencimiento', 'monto_total', 'consumo_energetico', 'estado', 'cliente_numero']
+        fields = ['fecha_emision', 'fecha_vencimiento', 'monto_total', 'consumo_energetico', 'estado', 'cliente']
         widgets = {
             'fecha_emision': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'fecha_vencimiento': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'monto_total': forms.NumberInput(attrs={'placeholder': 'Monto total a pagar','class': 'form-control','min': '1'}),
             'consumo_energetico': forms.TextInput(attrs={'placeholder': 'Ejemplo: 150 kWh','class': 'form-control'}),
             'estado': forms.Select(attrs={'class': 'form-control'}),
+            'cliente': SelectAutocompletar('clientes', attrs={'class': 'form-control'}),
         }
         labels = {
             'fecha_emision': 'Fecha de Emisión',
@@ -270,19 +273,15 @@ class BoletaForm(forms.ModelForm):
             'monto_total': 'Monto Total ($)',
             'consumo_energetico': 'Consumo Energético',
             'estado': 'Estado',
-            'cliente_numero': 'Cliente Asociado'
+            'cliente': 'Cliente Asociado'
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ✅ Llenar menú desplegable con clientes existentes
-        clientes = Cliente.objects.all()
-        choices = [('', '-- Seleccionar cliente --')]
-        choices += [(cliente.numero_cliente, f"{cliente.numero_cliente} - {cliente.nombre}") for cliente in clientes]
-        self.fields['cliente_numero'].choices = choices
-        
-        if self.instance and self.instance.cliente_numero:
-            self.fields['cliente_numero'].initial = self.instance.cliente_numero
+        # ✅ Cliente con autocompletado (ForeignKey, se valida con una búsqueda por id)
+        self.fields['cliente'].required = True
+        self.fields['cliente'].empty_label = '-- Seleccionar cliente --'
+        self.fields['cliente'].label_from_instance = etiqueta_cliente
 
     def clean_monto_total(self):
         monto = self.cleaned_data.get('monto_total')
@@ -311,20 +310,28 @@ class BoletaForm(forms.ModelForm):
 class LecturaForm(forms.ModelForm):
     class Meta:
         model = Lectura
-        fields = ['fecha_lectura', 'consumo_energetico', 'tipo_lectura', 'lectura_actual']
+        fields = ['medidor', 'fecha_lectura', 'consumo_energetico', 'tipo_lectura', 'lectura_actual']
         widgets = {
+            'medidor': SelectAutocompletar('medidores', attrs={'class': 'form-control'}),
             'fecha_lectura': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'consumo_energetico': forms.NumberInput(attrs={'placeholder': 'Consumo en kWh','class': 'form-control','min': '0'}),
             'tipo_lectura': forms.Select(attrs={'class': 'form-control'}),
             'lectura_actual': forms.NumberInput(attrs={'placeholder': 'Lectura actual del medidor','class': 'form-control','min': '0'})
         }
         labels = {
+            'medidor': 'Medidor',
             'fecha_lectura': 'Fecha de Lectura',
             'consumo_energetico': 'Consumo Energético (kWh)',
             'tipo_lectura': 'Tipo de Lectura',
             'lectura_actual': 'Lectura Actual'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ✅ Medidor con autocompletado (la importación CSV lo asigna aparte)
+        self.fields['medidor'].empty_label = '-- Seleccionar medidor --'
+        self.fields['medidor'].label_from_instance = etiqueta_medidor
+
     def clean_lectura_actual(self):
         lectura = self.cleaned_data.get('lectura_actual')
         if lectura is None or lectura < 0:
@@ -352,6 +359,46 @@ class LecturaForm(forms.ModelForm):
             raise forms.ValidationError("La fecha de lectura no puede ser tan antigua")
         return fecha_lectura
 
+    def clean(self):
+        cleaned_data = super().clean()
+        medidor = cleaned_data.get('medidor')
+        fecha_lectura = cleaned_data.get('fecha_lectura')
+        lectura_actual = cleaned_data.get('lectura_actual')
+        # una lectura nueva posterior a la última del medidor debe ser coherente con ella
+        # (la última lectura se lee de la copia guardada en el medidor, sin consultar las lecturas)
+        if self.instance.pk or not medidor or not fecha_lectura or not lectura_actual or medidor.ultima_lectura_fecha is None:
+            return cleaned_data
+        if fecha_lectura < medidor.ultima_lectura_fecha:
+            return cleaned_data
+        consumo, estado = consumos.derivar_consumo(medidor.ultima_lectura_valor, lectura_actual)
+        if estado == consumos.NO_MONOTONA:
+            self.add_error('lectura_actual', f"Es menor que la última lectura del medidor ({medidor.ultima_lectura_valor} el {medidor.ultima_lectura_fecha:%d/%m/%Y})")
+        elif consumo != cleaned_data.get('consumo_energetico'):
+            self.add_error('consumo_energetico', f"Según la lectura anterior ({medidor.ultima_lectura_valor}) el consumo es {consumo} kWh")
+        return cleaned_data
+
+# ==========================================================
+# FORMULARIO IMPORTACIÓN DE LECTURAS (CSV)
+# ==========================================================
+class ImportarLecturasForm(forms.Form):
+    archivo = forms.FileField(
+        label='Archivo CSV',
+        help_text='Columnas: medidor_numero, fecha_lectura (AAAA-MM-DD), lectura_actual, consumo_energetico, tipo_lectura (opcional)',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'})
+    )
+    delimitador = forms.ChoiceField(
+        choices=[(',', 'Coma (,)'), (';', 'Punto y coma (;)')],
+        initial=',',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label='Separador'
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data.get('archivo')
+        if not archivo.name.lower().endswith('.csv'):
+            raise forms.ValidationError("El archivo debe tener extensión .csv")
+        return archivo
+
 # ==========================================================
 # FORMULARIO TARIFA - SE MANTIENE IGUAL
 # ==========================================================
@@ -429,6 +476,24 @@ class PagoForm(forms.ModelForm):
             raise forms.ValidationError("La fecha de pago no puede ser futura.")
         return fecha_pago
 
+# en la importación de pagos los números de referencia repetidos se detectan contra un
+# conjunto en memoria (ver importacion_pagos.py), sin una consulta por fila
+class PagoImportadoForm(PagoForm):
+    def clean_numero_referencia(self):
+        referencia = self.cleaned_data.get('numero_referencia')
+        if len(referencia) < 1:
+            raise forms.ValidationError("El número de referencia debe tener al menos 1 carácter")
+        return referencia
+
+
+class ImportarPagosForm(ImportarLecturasForm):
+    archivo = forms.FileField(
+        label='Archivo CSV',
+        help_text='Columnas: numero_referencia, fecha_pago (AAAA-MM-DD), monto_pagado, metodo_pago (opcional), '
+                  'boleta (N° de boleta) y/o numero_cliente',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'})
+    )
+
 # ==========================================================
 # FORMULARIO USUARIO - SE MANTIENE IGUAL
 # ==========================================================
@@ -0,0 +1,126 @@
+"""
+Importación masiva de lecturas desde archivos CSV.
+
+El archivo se lee fila por fila (sin cargarlo completo en memoria). Cada fila se valida
+con las mismas reglas de LecturaForm, el medidor se resuelve contra un diccionario en
+memoria con los medidores existentes y las lecturas válidas se insertan con bulk_create
+por bloques. Las filas rechazadas se escriben en un archivo aparte con el motivo.
+
+La importación es todo o nada: los bloques se insertan dentro de una sola transacción, así
+si el archivo no se puede leer hasta el final (codificación o formato CSV inválidos) no queda
+ninguna lectura guardada y se puede volver a subir el archivo corregido sin duplicar lecturas.
+
+El consumo de cada lectura se deriva de la lectura anterior del mismo medidor (ver consumos.py),
+que se toma de la copia de la última lectura guardada en Medidor; si el consumo del archivo no
+coincide se reemplaza por el derivado. Las lecturas menores que la anterior (sin ser una vuelta
+del registro) se rechazan.
+"""
+
+import csv
+from itertools import islice
+
+from django.db import transaction
+
+from . import consumos, estadisticas, resumenes
+from .forms import LecturaForm
+from .models import Lectura, Medidor
+
+TAMANO_BLOQUE = 2000
+
+COLUMNAS = ['medidor_numero', 'fecha_lectura', 'lectura_actual', 'consumo_energetico', 'tipo_lectura']
+
+
+def _errores_formulario(form):
+    return '; '.join(f"{campo}: {' '.join(errores)}" for campo, errores in form.errors.items())
+
+
+def _guardar_bloque(bloque):
+    Lectura.objects.bulk_create(bloque, batch_size=TAMANO_BLOQUE)
+    # bulk_create no dispara señales: el contador, la última lectura de cada medidor
+    # y los resúmenes mensuales se actualizan aqui
+    estadisticas.incrementar('lecturas_pendientes', len(bloque))
+    consumos.reconstruir_ultimas_lecturas({lectura.medidor_id for lectura in bloque})
+    resumenes.registrar_cambios(agregadas=[
+        (lectura.medidor_id, lectura.fecha_lectura, lectura.consumo_energetico) for lectura in bloque
+    ])
+
+
+def importar_lecturas(archivo, archivo_rechazos, delimitador=',', tamano_bloque=TAMANO_BLOQUE):
+    """
+    Importa las lecturas de `archivo` (texto CSV con encabezado) y escribe las filas
+    rechazadas en `archivo_rechazos`. Retorna un diccionario con el resumen.
+    Si el archivo no se puede leer completo lanza ValueError y no se guarda ninguna lectura.
+    """
+    lector = csv.DictReader(archivo, delimiter=delimitador)
+    try:
+        with transaction.atomic():
+            return _importar(lector, archivo_rechazos, delimitador, tamano_bloque)
+    except csv.Error as error:
+        raise ValueError(f"El archivo no es un CSV válido (línea {lector.line_num}): {error}")
+
+
+def _importar(lector, archivo_rechazos, delimitador, tamano_bloque):
+    faltantes = {'medidor_numero', 'fecha_lectura', 'lectura_actual', 'consumo_energetico'} - set(lector.fieldnames or [])
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(sorted(faltantes))}")
+
+    rechazos = csv.writer(archivo_rechazos, delimiter=delimitador)
+    rechazos.writerow(['linea'] + lector.fieldnames + ['error'])
+
+    # numero_medidor -> id y medidor_id -> (fecha, lectura_actual) de su última lectura,
+    # una sola consulta para todo el archivo; `ultimas` se actualiza con las filas importadas
+    medidores, ultimas = {}, {}
+    for numero, medidor_id, fecha, valor in Medidor.objects.values_list('numero_medidor', 'id', 'ultima_lectura_fecha', 'ultima_lectura_valor'):
+        medidores[numero] = medidor_id
+        if fecha is not None:
+            ultimas[medidor_id] = (fecha, valor)
+
+    resumen = {'importadas': 0, 'rechazadas': 0, 'consumos_corregidos': 0}
+    while True:
+        filas = [(lector.line_num, fila) for fila in islice(lector, tamano_bloque)]
+        if not filas:
+            break
+
+        bloque = []
+        for linea, fila in filas:
+            datos = {columna: (fila.get(columna) or '').strip() for columna in COLUMNAS}
+            datos['tipo_lectura'] = datos['tipo_lectura'] or 'Digital'
+
+            medidor_id = medidores.get(datos['medidor_numero'])
+            if medidor_id is None:
+                error = f"medidor_numero: el medidor '{datos['medidor_numero']}' no existe"
+            else:
+                form = LecturaForm(data=datos)
+                error = None if form.is_valid() else _errores_formulario(form)
+
+            if not error:
+                lectura = form.save(commit=False)
+                lectura.medidor_id = medidor_id
+                error = _aplicar_consumo_derivado(lectura, ultimas, resumen)
+
+            if error:
+                rechazos.writerow([linea] + [fila.get(columna, '') for columna in lector.fieldnames] + [error])
+                resumen['rechazadas'] += 1
+                continue
+            bloque.append(lectura)
+
+        if bloque:
+            _guardar_bloque(bloque)
+            resumen['importadas'] += len(bloque)
+    return resumen
+
+
+def _aplicar_consumo_derivado(lectura, ultimas, resumen):
+    """Deriva el consumo desde la última lectura del medidor; retorna el error si la lectura no es válida"""
+    ultima = ultimas.get(lectura.medidor_id)
+    # las lecturas anteriores a la última conocida quedan con el consumo del archivo (se validan con derivar_consumos)
+    if ultima and lectura.fecha_lectura <= ultima[0]:
+        return None
+    consumo, estado = consumos.derivar_consumo(ultima[1] if ultima else None, lectura.lectura_actual)
+    if estado == consumos.NO_MONOTONA:
+        return f"lectura_actual: es menor que la lectura anterior del medidor ({ultima[1]})"
+    if consumo is not None and consumo != lectura.consumo_energetico:
+        lectura.consumo_energetico = consumo
+        resumen['consumos_corregidos'] += 1
+    ultimas[lectura.medidor_id] = (lectura.fecha_lectura, lectura.lectura_actual)
+    return None
@@ -0,0 +1,160 @@
+"""
+Importación masiva de pagos desde cartolas bancarias y archivos de recaudación (CSV).
+
+Como en la importación de lecturas, el archivo se lee por bloques, cada fila se valida con las
+reglas de PagoForm y los pagos válidos se insertan con bulk_create. Para no consultar por fila:
+- los numero_referencia existentes se cargan una vez en un conjunto; las referencias repetidas
+  (en la base o dentro del mismo archivo) se rechazan
+- cada pago se asocia a su boleta por el N° de boleta indicado en el archivo (una consulta por
+  bloque) o, si no viene, por número de cliente y monto: se busca en un diccionario
+  (numero_cliente, saldo) -> boletas impagas, cargado con una sola consulta, la más antigua
+  cuyo saldo sea igual al monto pagado
+
+Los pagos se crean como 'No pagado completamente' y al final una conciliación de las boletas
+afectadas (conciliacion.conciliar_boletas) actualiza los estados de las boletas y de los pagos.
+
+La importación es todo o nada: los bloques y la conciliación se ejecutan en una sola transacción,
+así si el archivo no se puede leer hasta el final (codificación o formato CSV inválidos) no queda
+ningún pago guardado ni boletas conciliadas a medias, y se puede volver a subir el archivo corregido.
+"""
+
+import csv
+from collections import defaultdict, deque
+from itertools import islice
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+
+from . import reportes
+from .conciliacion import conciliar_boletas, total_pagado
+from .forms import PagoImportadoForm
+from .models import Boleta, Pago
+
+TAMANO_BLOQUE = 2000
+
+COLUMNAS = ['numero_referencia', 'fecha_pago', 'monto_pagado', 'metodo_pago', 'boleta', 'numero_cliente']
+METODO_POR_DEFECTO = 'Transferencia'
+
+
+def _errores_formulario(form):
+    return '; '.join(f"{campo}: {' '.join(errores)}" for campo, errores in form.errors.items())
+
+
+def boletas_impagas_por_saldo():
+    """{(numero_cliente, saldo): deque de ids de boletas impagas}, de la que vence primero a la última"""
+    impagas = defaultdict(deque)
+    consulta = (
+        Boleta.objects.exclude(estado='Pagado').filter(cliente__isnull=False)
+        .annotate(pagado=Coalesce(total_pagado(), 0))
+        .order_by('fecha_vencimiento', 'id')
+        .values_list('id', 'cliente__numero_cliente', 'monto_total', 'pagado')
+    )
+    for boleta_id, numero_cliente, monto_total, pagado in consulta.iterator(chunk_size=TAMANO_BLOQUE):
+        if monto_total > pagado:
+            impagas[(numero_cliente, monto_total - pagado)].append(boleta_id)
+    return impagas
+
+
+def _boleta_por_cliente_y_monto(impagas, asignadas, numero_cliente, monto):
+    candidatas = impagas.get((numero_cliente, monto))
+    while candidatas:
+        boleta_id = candidatas.popleft()
+        if boleta_id not in asignadas:
+            return boleta_id
+    return None
+
+
+def importar_pagos(archivo, archivo_rechazos, delimitador=',', tamano_bloque=TAMANO_BLOQUE):
+    """
+    Importa los pagos de `archivo` (texto CSV con encabezado), escribe las filas rechazadas en
+    `archivo_rechazos` y concilia las boletas pagadas. Retorna un diccionario con el resumen.
+    Si el archivo no se puede leer completo lanza ValueError y no se guarda ningún pago.
+    """
+    lector = csv.DictReader(archivo, delimiter=delimitador)
+    try:
+        with transaction.atomic():
+            resumen = _importar(lector, archivo_rechazos, delimitador, tamano_bloque)
+    except csv.Error as error:
+        raise ValueError(f"El archivo no es un CSV válido (línea {lector.line_num}): {error}")
+    if resumen['importados']:
+        # después del commit, para que ningún proceso vuelva a guardar en cache los reportes sin estos pagos
+        reportes.invalidar()
+    return resumen
+
+
+def _importar(lector, archivo_rechazos, delimitador, tamano_bloque):
+    columnas = set(lector.fieldnames or [])
+    faltantes = {'numero_referencia', 'fecha_pago', 'monto_pagado'} - columnas
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(sorted(faltantes))}")
+    if not columnas & {'boleta', 'numero_cliente'}:
+        raise ValueError("El archivo debe tener la columna boleta o numero_cliente para asociar los pagos")
+
+    rechazos = csv.writer(archivo_rechazos, delimiter=delimitador)
+    rechazos.writerow(['linea'] + lector.fieldnames + ['error'])
+
+    referencias = set(Pago.objects.values_list('numero_referencia', flat=True).iterator(chunk_size=TAMANO_BLOQUE))
+    impagas = boletas_impagas_por_saldo() if 'numero_cliente' in columnas else {}
+    asignadas = set()
+
+    resumen = {'importados': 0, 'rechazados': 0, 'por_boleta': 0, 'por_cliente_y_monto': 0, 'monto_total': 0}
+    while True:
+        filas = [(lector.line_num, fila) for fila in islice(lector, tamano_bloque)]
+        if not filas:
+            break
+
+        # boletas indicadas en el bloque que existen, en una sola consulta
+        indicadas = {(fila.get('boleta') or '').strip() for _, fila in filas}
+        existentes = set(
+            Boleta.objects.filter(id__in=[int(numero) for numero in indicadas if numero.isdigit()]).values_list('id', flat=True)
+        )
+
+        bloque = []
+        for linea, fila in filas:
+            datos = {columna: (fila.get(columna) or '').strip() for columna in COLUMNAS}
+            datos['metodo_pago'] = datos['metodo_pago'] or METODO_POR_DEFECTO
+            datos['estado_pago'] = 'No pagado completamente'
+
+            error, pago = None, None
+            if datos['numero_referencia'] in referencias:
+                error = f"numero_referencia: el pago '{datos['numero_referencia']}' ya fue registrado"
+            else:
+                form = PagoImportadoForm(data=datos)
+                if form.is_valid():
+                    pago = form.save(commit=False)
+                else:
+                    error = _errores_formulario(form)
+
+            if pago is not None:
+                if datos['boleta']:
+                    if datos['boleta'].isdigit() and int(datos['boleta']) in existentes:
+                        pago.boleta_id = int(datos['boleta'])
+                        resumen['por_boleta'] += 1
+                    else:
+                        error = f"boleta: la boleta '{datos['boleta']}' no existe"
+                elif not datos['numero_cliente']:
+                    error = 'indique la boleta o el numero_cliente del pago'
+                else:
+                    pago.boleta_id = _boleta_por_cliente_y_monto(impagas, asignadas, datos['numero_cliente'], pago.monto_pagado)
+                    if pago.boleta_id is None:
+                        error = f"sin boleta impaga del cliente '{datos['numero_cliente']}' con saldo {pago.monto_pagado}"
+                    else:
+                        resumen['por_cliente_y_monto'] += 1
+
+            if error:
+                rechazos.writerow([linea] + [fila.get(columna, '') for columna in lector.fieldnames] + [error])
+                resumen['rechazados'] += 1
+                continue
+            referencias.add(pago.numero_referencia)
+            asignadas.add(pago.boleta_id)
+            resumen['monto_total'] += pago.monto_pagado
+            bloque.append(pago)
+
+        if bloque:
+            Pago.objects.bulk_create(bloque, batch_size=TAMANO_BLOQUE)
+            resumen['importados'] += len(bloque)
+
+    if asignadas:
+        # bulk_create no dispara señales: la conciliación actualiza los estados y el contador
+        resumen['conciliacion'] = conciliar_boletas(boleta_ids=asignadas)
+    return resumen
@@ -0,0 +1,219 @@
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from sistemaGestion import urls as urls_sistema
+from sistemaGestion.datos_sinteticos import generar_datos
+from sistemaGestion.models import Boleta, Cliente, Contrato, Lectura, Medidor, NotificacionLectura, NotificacionPago, Pago, Tarifa, Usuario
+from sistemaGestion.views import PERMISOS_ROL
+
+# modelo del que se toma un id para cada parámetro de las URLs
+MODELOS_PARAMETRO = {
+    'cliente_id': Cliente,
+    'contrato_id': Contrato,
+    'medidor_id': Medidor,
+    'lectura_id': Lectura,
+    'boleta_id': Boleta,
+    'pago_id': Pago,
+    'tarifa_id': Tarifa,
+    'usuario_id': Usuario,
+}
+
+# URLs que no se miden (cierran la sesión o descargan archivos temporales)
+OMITIDAS = {'logout', 'descargar_rechazos_lecturas', 'descargar_rechazos_pagos'}
+
+
+def variantes(nombre_url):
+    """Parámetros GET representativos de cada vista (filtros, páginas profundas y exportación)"""
+    hace_tres_meses = (date.today() - timedelta(days=90)).isoformat()
+    return {
+        'lista_clientes': [{}, {'nombre': 'Ana'}, {'page': '100'}, {'exportar': 'csv'}],
+        'lista_contratos': [{}, {'estado': 'Activo'}, {'page': '100'}, {'exportar': 'csv'}],
+        'lista_medidores': [{}, {'estado_medidor': 'Activo'}, {'page': '100'}, {'exportar': 'csv'}],
+        'lista_lecturas': [{}, {'tipo_lectura': 'Digital'}, {'fecha_lectura': hace_tres_meses}, {'fecha_lectura': hace_tres_meses, 'exportar': 'jsonl'}],
+        'lista_boletas': [{}, {'estado': 'Pendiente'}, {'page': '100'}, {'estado': 'Pendiente', 'exportar': 'csv'}],
+        'lista_pagos': [{}, {'estado_pago': 'Pagado'}, {'fecha_pago': hace_tres_meses}, {'fecha_pago': hace_tres_meses, 'exportar': 'jsonl'}],
+        'lista_tarifas': [{}, {'tipo_cliente': 'Residencial'}, {'exportar': 'csv'}],
+        'lista_notificaciones': [{}, {'tipo': 'Pago'}, {'page': '100'}],
+        'antiguedad_saldos': [{}, {'exportar': 'csv'}],
+        'autocompletar': [{'q': 'CLI-00001'}],
+    }.get(nombre_url, [{}])
+
+
+def percentil(valores, porcentaje):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(porcentaje / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+class _RegistroConsultas:
+    """execute_wrapper que guarda las consultas SELECT para contar después las filas que devolvieron"""
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.consultas.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def filas_obtenidas(consultas):
+    total = 0
+    with connection.cursor() as cursor:
+        for sql, params in consultas:
+            cursor.execute(f'SELECT COUNT(*) FROM ({sql}) AS consulta_medida', params)
+            total += cursor.fetchone()[0]
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cada URL de sistemaGestion con cada rol (latencia p50/p95, cantidad de consultas y filas "
+        "obtenidas) y guarda una línea base en JSON. Con --comparar informa las regresiones respecto "
+        "de una línea base anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salida', default='benchmark_vistas.json', help='Archivo JSON donde se guardan los resultados')
+        parser.add_argument('--comparar', help='Línea base JSON con la que se comparan los resultados')
+        parser.add_argument('--umbral', type=float, default=0.25, help='Aumento relativo que se considera regresión (0.25 = 25%%)')
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--clientes', type=int, default=2000, help='Escala de los datos generados')
+        parser.add_argument('--meses', type=int, default=12)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--base-actual', action='store_true',
+                            help='Usa la base de datos configurada (ya poblada) en vez de crear una base de prueba')
+        parser.add_argument('--mantener-base', action='store_true', help='No elimina la base de prueba al terminar (se reutiliza)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+        linea_base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    linea_base = json.load(archivo)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"No se pudo leer la línea base: {error}")
+
+        nombre_original = connection.settings_dict['NAME']
+        if not options['base_actual']:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['mantener_base'])
+        setup_test_environment()
+        try:
+            if not options['base_actual'] and not Cliente.objects.filter(numero_cliente='CLI-0000001').exists():
+                self.stdout.write(f"Generando datos: {options['clientes']} clientes, {options['meses']} meses...")
+                generar_datos(clientes=options['clientes'], meses=options['meses'], semilla=options['semilla'])
+            resultados = self.medir(options['repeticiones'])
+        finally:
+            teardown_test_environment()
+            if not options['base_actual']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0, keepdb=options['mantener_base'])
+
+        datos = {
+            'meta': {
+                'fecha': date.today().isoformat(),
+                'base_de_datos': connection.vendor,
+                'repeticiones': options['repeticiones'],
+                'clientes': None if options['base_actual'] else options['clientes'],
+                'meses': None if options['base_actual'] else options['meses'],
+            },
+            'resultados': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if linea_base:
+            regresiones = self.comparar(linea_base['resultados'], resultados, options['umbral'])
+            if regresiones:
+                raise CommandError(f'{regresiones} regresiones respecto de {options["comparar"]}')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones'))
+
+    def urls_a_medir(self):
+        vistas, rutas = [], set()
+        for patron in urls_sistema.urlpatterns:
+            if patron.name in OMITIDAS or str(patron.pattern) in rutas:
+                continue
+            rutas.add(str(patron.pattern))
+            parametros = {}
+            for nombre in patron.pattern.converters:
+                if nombre == 'entidad':
+                    parametros[nombre] = 'clientes'
+                    continue
+                modelo = MODELOS_PARAMETRO.get(nombre)
+                if nombre == 'notificacion_id':
+                    modelo = NotificacionLectura if 'lectura' in patron.name else NotificacionPago
+                parametros[nombre] = modelo.objects.order_by('id').values_list('id', flat=True).first() or 1
+            url = reverse(f'sistemaGestion:{patron.name}', kwargs=parametros)
+            for variante in variantes(patron.name):
+                vistas.append((url, variante))
+        return vistas
+
+    def medir(self, repeticiones):
+        resultados = {}
+        vistas = self.urls_a_medir()
+        for rol in PERMISOS_ROL:
+            usuario = Usuario.objects.filter(rol=rol).order_by('id').first()
+            if not usuario:
+                self.stdout.write(self.style.WARNING(f'No hay usuarios con rol {rol}, se omite'))
+                continue
+            cliente = Client()
+            cliente.post(reverse('sistemaGestion:login'), {'username': usuario.username, 'password': usuario.password})
+            for url, parametros in vistas:
+                clave = f"{rol} GET {url}" + (f"?{'&'.join(f'{k}={v}' for k, v in parametros.items())}" if parametros else '')
+                resultados[clave] = self.medir_vista(cliente, url, parametros, repeticiones)
+                medida = resultados[clave]
+                self.stdout.write(f"{medida['p50_ms']:9.1f} {medida['p95_ms']:9.1f} ms {medida['consultas']:5d} consultas {medida['filas']:8d} filas  {clave}")
+        return resultados
+
+    def medir_vista(self, cliente, url, parametros, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            respuesta = cliente.get(url, parametros)
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        # una ejecución más para contar consultas y filas (fuera de la medición de tiempo)
+        registro = _RegistroConsultas()
+        with CaptureQueriesContext(connection) as capturadas, connection.execute_wrapper(registro):
+            respuesta = cliente.get(url, parametros)
+            # las exportaciones consultan la base mientras se envían las filas
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)
+        return {
+            'estado': respuesta.status_code,
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'consultas': len(capturadas),
+            'filas': filas_obtenidas(registro.consultas),
+        }
+
+    def comparar(self, anteriores, actuales, umbral):
+        """Informa las vistas cuya latencia p95, consultas o filas crecieron más que el umbral"""
+        regresiones = 0
+        for clave, actual in actuales.items():
+            anterior = anteriores.get(clave)
+            if not anterior:
+                continue
+            problemas = []
+            # se ignoran diferencias de latencia menores a 5 ms, que suelen ser ruido
+            if actual['p95_ms'] > anterior['p95_ms'] * (1 + umbral) and actual['p95_ms'] - anterior['p95_ms'] > 5:
+                problemas.append(f"p95 {anterior['p95_ms']} -> {actual['p95_ms']} ms")
+            if actual['consultas'] > anterior['consultas']:
+                problemas.append(f"consultas {anterior['consultas']} -> {actual['consultas']}")
+            if actual['filas'] > anterior['filas'] * (1 + umbral):
+                problemas.append(f"filas {anterior['filas']} -> {actual['filas']}")
+            if problemas:
+                regresiones += 1
+                self.stdout.write(self.style.ERROR(f"REGRESIÓN {clave}: {', '.join(problemas)}"))
+        return regresiones
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.conciliacion import conciliar_boletas
+
+
+class Command(BaseCommand):
+    help = (
+        'Concilia boletas y pagos: marca como pagadas las boletas cuyos pagos cubren el monto, como '
+        'vencidas las impagas con fecha de vencimiento pasada, y el estado de cada pago según su boleta. '
+        'Pensado para ejecutarse cada noche (por ejemplo con cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Fecha de referencia para los vencimientos (AAAA-MM-DD, por defecto hoy)')
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = datetime.strptime(options['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Fecha inválida '{options['fecha']}', use el formato AAAA-MM-DD")
+
+        resumen = conciliar_boletas(hoy)
+        self.stdout.write(f"Boletas pagadas: {resumen['boletas_pagadas']}")
+        self.stdout.write(f"Boletas reabiertas (pagos insuficientes): {resumen['boletas_reabiertas']}")
+        self.stdout.write(f"Boletas vencidas: {resumen['boletas_vencidas']}")
+        self.stdout.write(f"Boletas vueltas a pendiente: {resumen['boletas_pendientes']}")
+        self.stdout.write(f"Pagos completos: {resumen['pagos_completos']}")
+        self.stdout.write(f"Pagos parciales: {resumen['pagos_parciales']}")
+        self.stdout.write(self.style.SUCCESS('Conciliación terminada'))
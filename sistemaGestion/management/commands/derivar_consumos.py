@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion import consumos
+
+# cantidad de diferencias que se muestran con --detalle
+MAXIMO_DETALLE = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Deriva el consumo de cada lectura como la diferencia con la lectura anterior del mismo medidor '
+        '(función de ventana LAG) y lo compara con consumo_energetico. Detecta vueltas del registro y '
+        'lecturas menores que la anterior. Con --corregir reemplaza los consumos que no coinciden.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corregir', action='store_true', help='Actualiza consumo_energetico con el consumo derivado')
+        parser.add_argument('--bloque', type=int, default=consumos.MEDIDORES_POR_BLOQUE, help='Medidores por bloque')
+        parser.add_argument('--detalle', action='store_true', help=f'Muestra las primeras {MAXIMO_DETALLE} diferencias')
+
+    def handle(self, *args, **options):
+        if options['bloque'] < 1:
+            raise CommandError('--bloque debe ser mayor que cero')
+
+        mostradas = [0]
+
+        def informar(diferencia):
+            if options['detalle'] and mostradas[0] < MAXIMO_DETALLE:
+                id_lectura, medidor_id, fecha, registrado, derivado, estado = diferencia
+                self.stdout.write(f"  lectura {id_lectura} (medidor {medidor_id}, {fecha}): registrado {registrado}, derivado {derivado}, {estado}")
+                mostradas[0] += 1
+
+        resumen = consumos.revisar_consumos(options['corregir'], options['bloque'], informar)
+
+        self.stdout.write(f"Coinciden: {resumen[consumos.OK]}")
+        self.stdout.write(f"Primera lectura del medidor (sin anterior): {resumen[consumos.PRIMERA]}")
+        self.stdout.write(f"Consumo distinto al derivado: {resumen[consumos.DISTINTO]}")
+        self.stdout.write(f"Vuelta del registro: {resumen[consumos.VUELTA]}")
+        if resumen[consumos.NO_MONOTONA]:
+            self.stdout.write(self.style.WARNING(f"Lecturas menores que la anterior (revisar): {resumen[consumos.NO_MONOTONA]}"))
+        if resumen[consumos.POSTERIOR_NO_MONOTONA]:
+            self.stdout.write(self.style.WARNING(f"Lecturas siguientes a una menor que la anterior, sin corregir: {resumen[consumos.POSTERIOR_NO_MONOTONA]}"))
+        if options['corregir']:
+            self.stdout.write(self.style.SUCCESS(f"Consumos corregidos: {resumen['corregidas']}"))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion import anomalias
+
+
+class Command(BaseCommand):
+    help = (
+        'Analiza las lecturas de cada medidor y crea notificaciones de lectura para los picos de consumo '
+        '(respecto de las lecturas anteriores del medidor), las rachas sin consumo y las lecturas menores '
+        'que la anterior. Las anomalías ya notificadas no se repiten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bloque', type=int, default=anomalias.MEDIDORES_POR_BLOQUE, help='Medidores por bloque')
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta las anomalías, sin crear notificaciones')
+
+    def handle(self, *args, **options):
+        if options['bloque'] < 1:
+            raise CommandError('--bloque debe ser mayor que cero')
+
+        inicio = time.perf_counter()
+        resumen = anomalias.detectar_anomalias(options['bloque'], notificar=not options['simular'])
+        self.stdout.write(f"Lecturas analizadas: {resumen['lecturas']} en {time.perf_counter() - inicio:.1f} s")
+        self.stdout.write(f"Picos de consumo: {resumen[anomalias.PICO]}")
+        self.stdout.write(f"Rachas sin consumo: {resumen[anomalias.SIN_CONSUMO]}")
+        self.stdout.write(f"Lecturas menores que la anterior: {resumen[anomalias.REGISTRO_MENOR]}")
+        if not options['simular']:
+            self.stdout.write(f"Ya notificadas: {resumen['ya_notificadas']}")
+            self.stdout.write(self.style.SUCCESS(f"Notificaciones creadas: {resumen['creadas']}"))
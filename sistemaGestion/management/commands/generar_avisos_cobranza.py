@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.cobranza import TAMANO_BLOQUE, generar_avisos
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea una notificación de pago por cada cliente con boletas vencidas o pendientes, con la deuda '
+        'total y el detalle de las boletas. Los clientes que ya tienen aviso en el ciclo (mes) se omiten, '
+        'así el comando se puede ejecutar varias veces.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ciclo', help='Mes del ciclo de cobranza en formato AAAA-MM (por defecto el mes actual)')
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Avisos por transacción')
+
+    def handle(self, *args, **options):
+        if options['bloque'] < 1:
+            raise CommandError('--bloque debe ser mayor que cero')
+        fecha = None
+        if options['ciclo']:
+            try:
+                fecha = datetime.strptime(options['ciclo'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("Ciclo inválido, use el formato AAAA-MM")
+
+        resumen = generar_avisos(fecha, options['bloque'])
+        self.stdout.write(f"Ciclo: {resumen['ciclo']}")
+        self.stdout.write(f"Clientes ya notificados en el ciclo: {resumen['ya_notificados']}")
+        self.stdout.write(f"Deuda total avisada: ${resumen['deuda_total']}")
+        self.stdout.write(self.style.SUCCESS(f"Avisos creados: {resumen['creados']}"))
@@ -0,0 +1,63 @@
+from datetime import date, datetime
+import calendar
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.facturacion import DIAS_VENCIMIENTO, TAMANO_BLOQUE, generar_boletas
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{valor}', use el formato AAAA-MM-DD")
+
+
+class Command(BaseCommand):
+    help = 'Genera las boletas de un ciclo de facturación a partir de las lecturas y tarifas vigentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help='Mes a facturar en formato AAAA-MM (por defecto el mes anterior)')
+        parser.add_argument('--desde', help='Fecha de inicio del periodo (AAAA-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha de fin del periodo (AAAA-MM-DD)')
+        parser.add_argument('--fecha-emision', help='Fecha de emisión de las boletas (por defecto el fin del periodo)')
+        parser.add_argument('--dias-vencimiento', type=int, default=DIAS_VENCIMIENTO)
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Boletas por transacción')
+
+    def handle(self, *args, **options):
+        if options['desde'] or options['hasta']:
+            if not (options['desde'] and options['hasta']):
+                raise CommandError('Debe indicar --desde y --hasta juntos')
+            fecha_inicio, fecha_fin = _fecha(options['desde']), _fecha(options['hasta'])
+        else:
+            if options['periodo']:
+                try:
+                    anio, mes = (int(parte) for parte in options['periodo'].split('-'))
+                except ValueError:
+                    raise CommandError("Periodo inválido, use el formato AAAA-MM")
+            else:
+                hoy = date.today()
+                anio, mes = (hoy.year, hoy.month - 1) if hoy.month > 1 else (hoy.year - 1, 12)
+            fecha_inicio = date(anio, mes, 1)
+            fecha_fin = date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+        if fecha_fin < fecha_inicio:
+            raise CommandError('La fecha de fin debe ser posterior a la fecha de inicio')
+        if options['dias_vencimiento'] < 15:
+            raise CommandError('La boleta debe tener al menos 15 días para el pago')
+
+        fecha_emision = _fecha(options['fecha_emision']) if options['fecha_emision'] else None
+        self.stdout.write(f'Facturando periodo {fecha_inicio} a {fecha_fin}...')
+        resumen = generar_boletas(
+            fecha_inicio,
+            fecha_fin,
+            fecha_emision=fecha_emision,
+            dias_vencimiento=options['dias_vencimiento'],
+            tamano_bloque=options['bloque'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Boletas creadas: {resumen['creadas']}"))
+        self.stdout.write(f"Medidores ya facturados: {resumen['ya_emitidas']}")
+        self.stdout.write(f"Medidores sin consumo: {resumen['sin_consumo']}")
+        if resumen['sin_tarifa']:
+            self.stdout.write(self.style.WARNING(f"Medidores sin tarifa vigente: {resumen['sin_tarifa']}"))
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.datos_sinteticos import generar_datos
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos consistentes (usuarios, clientes, contratos, medidores, lecturas mensuales, '
+        'boletas, pagos y notificaciones) para pruebas de rendimiento, al cierre del mes --hasta. Con la misma '
+        'semilla y el mismo --hasta el resultado es idéntico, sin importar el día en que se ejecute.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000, help='Cantidad de clientes (cada uno con un contrato y un medidor)')
+        parser.add_argument('--meses', type=int, default=12, help='Meses de lecturas, boletas y pagos por medidor')
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--hasta', help='Último mes con lecturas, formato AAAA-MM (por defecto el mes anterior)')
+        parser.add_argument('--bloque', type=int, default=1000, help='Clientes por transacción')
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['meses'] < 1 or options['bloque'] < 1:
+            raise CommandError('--clientes, --meses y --bloque deben ser mayores que cero')
+        mes_final = None
+        if options['hasta']:
+            try:
+                mes_final = datetime.strptime(options['hasta'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("Mes inválido, use el formato AAAA-MM")
+            if mes_final >= date.today().replace(day=1):
+                raise CommandError('El último mes debe ser anterior al mes actual')
+
+        def informar(resumen):
+            self.stdout.write(f"  {resumen['clientes']} clientes, {resumen['lecturas']} lecturas, {resumen['boletas']} boletas, {resumen['pagos']} pagos")
+
+        try:
+            resumen = generar_datos(
+                clientes=options['clientes'],
+                meses=options['meses'],
+                usuarios=options['usuarios'],
+                semilla=options['semilla'],
+                mes_final=mes_final,
+                tamano_bloque=options['bloque'],
+                informar=informar,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS('Datos generados:'))
+        for clave, cantidad in resumen.items():
+            self.stdout.write(f'  {clave}: {cantidad}')
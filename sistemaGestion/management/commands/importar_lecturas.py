@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.importacion import TAMANO_BLOQUE, importar_lecturas
+
+
+class Command(BaseCommand):
+    help = ('Importa lecturas desde un archivo CSV con las columnas medidor_numero, fecha_lectura, '
+            'lectura_actual, consumo_energetico y tipo_lectura (opcional)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo CSV con encabezado')
+        parser.add_argument('--rechazos', help='Archivo donde se escriben las filas rechazadas (por defecto <archivo>.rechazos.csv)')
+        parser.add_argument('--delimitador', default=',')
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Lecturas por INSERT (todo el archivo se importa en una sola transacción)')
+
+    def handle(self, *args, **options):
+        ruta_rechazos = options['rechazos'] or f"{options['archivo']}.rechazos.csv"
+        try:
+            with open(options['archivo'], newline='', encoding='utf-8-sig') as archivo, \
+                    open(ruta_rechazos, 'w', newline='', encoding='utf-8') as rechazos:
+                resumen = importar_lecturas(archivo, rechazos, options['delimitador'], options['bloque'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(f"Lecturas importadas: {resumen['importadas']}"))
+        if resumen['consumos_corregidos']:
+            self.stdout.write(f"Consumos corregidos según la lectura anterior: {resumen['consumos_corregidos']}")
+        if resumen['rechazadas']:
+            self.stdout.write(self.style.WARNING(f"Filas rechazadas: {resumen['rechazadas']} (ver {ruta_rechazos})"))
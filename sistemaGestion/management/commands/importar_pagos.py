@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.importacion_pagos import TAMANO_BLOQUE, importar_pagos
+
+
+class Command(BaseCommand):
+    help = ('Importa pagos desde una cartola bancaria o archivo de recaudación CSV con las columnas '
+            'numero_referencia, fecha_pago, monto_pagado, metodo_pago (opcional) y boleta y/o numero_cliente, '
+            'y concilia las boletas pagadas')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo CSV con encabezado')
+        parser.add_argument('--rechazos', help='Archivo donde se escriben las filas rechazadas (por defecto <archivo>.rechazos.csv)')
+        parser.add_argument('--delimitador', default=',')
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Pagos por INSERT (todo el archivo se importa en una sola transacción)')
+
+    def handle(self, *args, **options):
+        ruta_rechazos = options['rechazos'] or f"{options['archivo']}.rechazos.csv"
+        try:
+            with open(options['archivo'], newline='', encoding='utf-8-sig') as archivo, \
+                    open(ruta_rechazos, 'w', newline='', encoding='utf-8') as rechazos:
+                resumen = importar_pagos(archivo, rechazos, options['delimitador'], options['bloque'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(f"Pagos importados: {resumen['importados']} (${resumen['monto_total']})"))
+        self.stdout.write(f"Asociados por N° de boleta: {resumen['por_boleta']}")
+        self.stdout.write(f"Asociados por cliente y monto: {resumen['por_cliente_y_monto']}")
+        if 'conciliacion' in resumen:
+            self.stdout.write(f"Boletas pagadas: {resumen['conciliacion']['boletas_pagadas']}")
+        if resumen['rechazados']:
+            self.stdout.write(self.style.WARNING(f"Filas rechazadas: {resumen['rechazados']} (ver {ruta_rechazos})"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from sistemaGestion import estadisticas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores del dashboard desde las tablas (ejecutar periódicamente, por ejemplo con cron)'
+
+    def handle(self, *args, **options):
+        for clave, (anterior, nuevo) in estadisticas.reconciliar().items():
+            if anterior is None:
+                self.stdout.write(f'{clave}: inicializado en {nuevo}')
+            elif anterior != nuevo:
+                self.stdout.write(self.style.WARNING(f'{clave}: corregido de {anterior} a {nuevo}'))
+            else:
+                self.stdout.write(f'{clave}: {nuevo}')
+        self.stdout.write(self.style.SUCCESS('Estadísticas reconciliadas'))
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion import resumenes
+
+
+def _mes(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Mes inválido '{valor}', use el formato AAAA-MM")
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenera desde las lecturas los resúmenes de consumo mensual por medidor y por tipo de cliente. '
+        'Sin --desde ni --hasta regenera todos los meses con lecturas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Primer mes a regenerar (AAAA-MM)')
+        parser.add_argument('--hasta', help='Último mes a regenerar (AAAA-MM)')
+
+    def handle(self, *args, **options):
+        desde = _mes(options['desde']) if options['desde'] else None
+        hasta = _mes(options['hasta']) if options['hasta'] else None
+        if desde and hasta and desde > hasta:
+            raise CommandError('--desde debe ser anterior o igual a --hasta')
+
+        resumen = resumenes.reconstruir(desde, hasta)
+        self.stdout.write(f"Meses regenerados: {resumen['meses']}")
+        self.stdout.write(f"Filas por tipo de cliente y mes: {resumen['tipo_cliente_mes']}")
+        self.stdout.write(self.style.SUCCESS(f"Filas por medidor y mes: {resumen['medidor_mes']}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion import consumos
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula en cada medidor la copia de su última lectura (fecha, valor y consumo) a partir '
+        'de la tabla de lecturas. Necesario después de migrar o de cargar lecturas sin pasar por '
+        'la aplicación.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bloque', type=int, default=consumos.MEDIDORES_POR_BLOQUE, help='Medidores por UPDATE')
+
+    def handle(self, *args, **options):
+        if options['bloque'] < 1:
+            raise CommandError('--bloque debe ser mayor que cero')
+        actualizados = consumos.reconstruir_ultimas_lecturas(medidores_por_bloque=options['bloque'])
+        self.stdout.write(self.style.SUCCESS(f'Medidores actualizados: {actualizados}'))
@@ -0,0 +1,96 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from sistemaGestion.models import Boleta, Cliente, Contrato, Lectura, Medidor, Pago, Tarifa
+
+# tamaño de página de las listas (paginar_objetos / paginar_por_cursor) más el registro extra
+PAGINA = 6
+
+# consultas que leen la tabla completa a propósito: no se reportan como error
+# (la tabla de tarifas es pequeña y el resolutor la carga entera una sola vez)
+RECORRIDO_PERMITIDO = {'resolutor de tarifas: carga ordenada'}
+
+
+def consultas_representativas():
+    """
+    Consultas con la misma forma que las de las vistas lista_* y el admin:
+    filtros por igualdad o rango y orden de la paginación, limitadas a una página
+    (salvo las de RECORRIDO_PERMITIDO).
+    """
+    hoy = date.today()
+    hace_un_mes = hoy - timedelta(days=30)
+    return [
+        ('lista_clientes: orden por número', Cliente.objects.order_by('numero_cliente')[:PAGINA]),
+        ('autocompletar clientes: prefijo de nombre', Cliente.objects.filter(nombre__startswith='A').order_by('nombre')[:10]),
+        ('lista_contratos: orden por número', Contrato.objects.order_by('numero_contrato')[:PAGINA]),
+        ('lista_contratos: estado', Contrato.objects.filter(estado='Activo').order_by('numero_contrato')[:PAGINA]),
+        ('lista_contratos: fecha_inicio desde', Contrato.objects.filter(fecha_inicio__gte=hace_un_mes).order_by('fecha_inicio')[:PAGINA]),
+        ('lista_contratos: fecha_fin hasta', Contrato.objects.filter(fecha_fin__lte=hoy).order_by('-fecha_fin')[:PAGINA]),
+        ('admin contratos: orden por fecha_inicio', Contrato.objects.order_by('-fecha_inicio')[:PAGINA]),
+        ('lista_medidores: orden por número', Medidor.objects.order_by('numero_medidor')[:PAGINA]),
+        ('lista_medidores: estado', Medidor.objects.filter(estado_medidor='Activo').order_by('numero_medidor')[:PAGINA]),
+        ('lista_medidores: fecha de instalación', Medidor.objects.filter(fecha_instalacion__gte=hace_un_mes).order_by('fecha_instalacion')[:PAGINA]),
+        ('lista_lecturas: orden por fecha', Lectura.objects.order_by('-fecha_lectura', '-id')[:PAGINA]),
+        ('lista_lecturas: fecha desde', Lectura.objects.filter(fecha_lectura__gte=hace_un_mes).order_by('-fecha_lectura', '-id')[:PAGINA]),
+        ('lista_lecturas: tipo', Lectura.objects.filter(tipo_lectura='Digital').order_by('-fecha_lectura', '-id')[:PAGINA]),
+        ('lecturas de un medidor', Lectura.objects.filter(medidor_id=1, fecha_lectura__gte=hace_un_mes).order_by('fecha_lectura')),
+        ('lista_boletas: orden por emisión', Boleta.objects.order_by('-fecha_emision')[:PAGINA]),
+        ('lista_boletas: estado', Boleta.objects.filter(estado='Pendiente').order_by('-fecha_emision')[:PAGINA]),
+        ('lista_boletas: estadísticas por estado', Boleta.objects.filter(estado='Pendiente').values('estado').annotate(cantidad=Count('id'), monto=Sum('monto_total'))),
+        ('boletas vencidas', Boleta.objects.filter(estado='Pendiente', fecha_vencimiento__lt=hoy).order_by('fecha_vencimiento')[:PAGINA]),
+        ('lista_pagos: orden por fecha', Pago.objects.order_by('-fecha_pago', '-id')[:PAGINA]),
+        ('lista_pagos: estado', Pago.objects.filter(estado_pago='Pagado').order_by('-fecha_pago', '-id')[:PAGINA]),
+        ('lista_tarifas: orden por tipo', Tarifa.objects.order_by('tipo_cliente', 'tipo_tarifa')[:PAGINA]),
+        ('resolutor de tarifas: carga ordenada', Tarifa.objects.order_by('fecha_vigencia', 'id')),
+    ]
+
+
+def plan_de_ejecucion(consulta):
+    if connection.vendor == 'mysql':
+        return consulta.explain(format='JSON')
+    return consulta.explain()
+
+
+def escaneo_completo(plan):
+    """Indica si el plan recorre alguna tabla completa sin usar un índice"""
+    if connection.vendor == 'mysql':
+        return '"access_type": "ALL"' in plan
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan' in plan
+    if connection.vendor == 'sqlite':
+        # 'SCAN tabla' sin 'USING ... INDEX' es un recorrido completo de la tabla
+        return any(re.search(r'\bSCAN \S+$', linea.strip()) for linea in plan.splitlines())
+    raise CommandError(f"No se sabe interpretar el EXPLAIN de la base de datos '{connection.vendor}'")
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las consultas representativas de las listas y falla si alguna "
+        "recorre una tabla completa. Conviene ejecutarlo con un volumen de datos realista, "
+        "con pocas filas el motor puede preferir un recorrido completo aunque exista el índice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plan', action='store_true', help='Muestra el plan completo de cada consulta')
+
+    def handle(self, *args, **options):
+        fallidas = []
+        for nombre, consulta in consultas_representativas():
+            plan = plan_de_ejecucion(consulta)
+            if not escaneo_completo(plan):
+                self.stdout.write(f"OK                {nombre}")
+            elif nombre in RECORRIDO_PERMITIDO:
+                self.stdout.write(self.style.WARNING(f"COMPLETO (PERM.)  {nombre}"))
+            else:
+                fallidas.append(nombre)
+                self.stdout.write(self.style.ERROR(f"ESCANEO COMPLETO  {nombre}"))
+            if options['plan']:
+                self.stdout.write(plan)
+
+        if fallidas:
+            raise CommandError(f"{len(fallidas)} consultas recorren una tabla completa: {', '.join(fallidas)}")
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
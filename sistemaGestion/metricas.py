@@ -0,0 +1,197 @@
+"""
+Métricas por petición para saber qué vistas generan carga en la base de datos.
+
+MetricasMiddleware mide en cada petición el tiempo total, la cantidad y el tiempo de las
+consultas SQL (con connection.execute_wrapper) y el tiempo de renderizado de plantillas,
+y los acumula en histogramas en memoria etiquetados con el nombre de la URL resuelta.
+La vista `metricas` los publica en el formato de texto de Prometheus.
+
+En las respuestas en streaming (exportaciones) la medición sigue mientras se envía el contenido,
+así se cuentan las consultas que se hacen al recorrer las filas; la duración incluye el envío.
+
+Los histogramas son por proceso: con varios workers cada uno publica los suyos.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db import connection
+from django.template.backends.django import Template as PlantillaDjango
+
+# límites (segundos) de los buckets de tiempo y de cantidad de consultas
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# mediciones de la petición en curso (las usa el renderizado de plantillas)
+_peticion_actual = ContextVar('metricas_peticion', default=None)
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * len(limites)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        for indice, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.cuentas[indice] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    """Histogramas y contadores en memoria, protegidos por un lock porque los workers usan hilos"""
+    DESCRIPCIONES = {
+        'sistema_peticion_segundos': ('histogram', 'Duración total de la petición'),
+        'sistema_sql_consultas': ('histogram', 'Cantidad de consultas SQL por petición'),
+        'sistema_sql_segundos': ('histogram', 'Tiempo total en consultas SQL por petición'),
+        'sistema_plantillas_segundos': ('histogram', 'Tiempo de renderizado de plantillas por petición'),
+        'sistema_peticiones_total': ('counter', 'Peticiones atendidas'),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+
+    def observar(self, nombre, etiquetas, valor, limites=BUCKETS_SEGUNDOS):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma(limites)
+            histograma.observar(valor)
+
+    def incrementar(self, nombre, etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+        with self._lock:
+            histogramas = {clave: (list(h.cuentas), h.limites, h.suma, h.total) for clave, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        lineas = []
+        for nombre, (tipo, descripcion) in self.DESCRIPCIONES.items():
+            lineas.append(f'# HELP {nombre} {descripcion}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            if tipo == 'counter':
+                for (metrica, etiquetas), valor in sorted(contadores.items()):
+                    if metrica == nombre:
+                        lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+                continue
+            for (metrica, etiquetas), (cuentas, limites, suma, total) in sorted(histogramas.items()):
+                if metrica != nombre:
+                    continue
+                acumulado = 0
+                for limite, cuenta in zip(limites, cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", _numero(limite)),))} {acumulado}')
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", "+Inf"),))} {total}')
+                lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(suma)}')
+                lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {total}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    pares = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{clave}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+registro = RegistroMetricas()
+
+
+class MedidorSQL:
+    """execute_wrapper que cuenta las consultas de la petición y el tiempo que toman"""
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def _instrumentar_plantillas():
+    """Envuelve Template.render del backend de Django para sumar el tiempo de renderizado a la petición"""
+    if getattr(PlantillaDjango.render, 'instrumentado', False):
+        return
+    render_original = PlantillaDjango.render
+
+    def render(self, context=None, request=None):
+        mediciones = _peticion_actual.get()
+        if mediciones is None:
+            return render_original(self, context, request)
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, context, request)
+        finally:
+            mediciones['plantillas'] += time.perf_counter() - inicio
+
+    render.instrumentado = True
+    PlantillaDjango.render = render
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrumentar_plantillas()
+
+    def __call__(self, request):
+        medidor = MedidorSQL()
+        mediciones = {'plantillas': 0.0}
+        token = _peticion_actual.set(mediciones)
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(medidor):
+                response = self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
+
+        if response.streaming:
+            # las filas se leen mientras se envía el contenido: se registra al terminar de enviarlo
+            response.streaming_content = self._medir_contenido(response.streaming_content, request, response, medidor, mediciones, inicio)
+        else:
+            self._registrar(request, response, medidor, mediciones, time.perf_counter() - inicio)
+        return response
+
+    def _medir_contenido(self, contenido, request, response, medidor, mediciones, inicio):
+        try:
+            with connection.execute_wrapper(medidor):
+                yield from contenido
+        finally:
+            self._registrar(request, response, medidor, mediciones, time.perf_counter() - inicio)
+
+    def _registrar(self, request, response, medidor, mediciones, duracion):
+        # se etiqueta por nombre de URL (no por ruta) para no crear una serie por cada id
+        resolver_match = getattr(request, 'resolver_match', None)
+        vista = resolver_match.view_name if resolver_match else 'sin_ruta'
+        registro.observar('sistema_peticion_segundos', {'vista': vista, 'metodo': request.method}, duracion)
+        registro.observar('sistema_sql_consultas', {'vista': vista}, medidor.consultas, BUCKETS_CONSULTAS)
+        registro.observar('sistema_sql_segundos', {'vista': vista}, medidor.segundos)
+        registro.observar('sistema_plantillas_segundos', {'vista': vista}, mediciones['plantillas'])
+        registro.incrementar('sistema_peticiones_total', {'vista': vista, 'metodo': request.method, 'estado': response.status_code})
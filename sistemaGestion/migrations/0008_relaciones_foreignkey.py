@@ -0,0 +1,59 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0007_boleta_cliente_numero_boleta_lectura_id_and_more'),
+    ]
+
+    operations = [
+        # lectura_id y boleta_id chocan con la columna que genera la ForeignKey,
+        # por eso se renombran antes de agregar las nuevas relaciones
+        migrations.RenameField(
+            model_name='boleta',
+            old_name='lectura_id',
+            new_name='lectura_ref',
+        ),
+        migrations.RenameField(
+            model_name='pago',
+            old_name='boleta_id',
+            new_name='boleta_ref',
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clientes', to='sistemaGestion.usuario'),
+        ),
+        migrations.AddField(
+            model_name='contrato',
+            name='cliente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contratos', to='sistemaGestion.cliente'),
+        ),
+        migrations.AddField(
+            model_name='medidor',
+            name='contrato',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='medidores', to='sistemaGestion.contrato'),
+        ),
+        migrations.AddField(
+            model_name='lectura',
+            name='medidor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lecturas', to='sistemaGestion.medidor'),
+        ),
+        migrations.AddField(
+            model_name='boleta',
+            name='cliente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='boletas', to='sistemaGestion.cliente'),
+        ),
+        migrations.AddField(
+            model_name='boleta',
+            name='lectura',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='boletas', to='sistemaGestion.lectura'),
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='boleta',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagos', to='sistemaGestion.boleta'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+"""
+Migración de datos: convierte las referencias de texto (numero_cliente, numero_contrato,
+numero_medidor, id de lectura/boleta y username) en las nuevas ForeignKey.
+
+Se recorre cada tabla por bloques, se resuelven las claves de cada bloque con una sola
+consulta a la tabla destino y se guardan con bulk_update. Las referencias que no
+corresponden a ningún registro (huérfanas) quedan en NULL, se informan por consola y se
+guardan en la tabla ReferenciaHuerfana, así no se pierden cuando 0010 elimina las columnas de texto.
+
+La migración se puede revertir: las columnas de texto se vuelven a llenar desde las ForeignKey
+y desde ReferenciaHuerfana.
+"""
+
+from django.db import migrations, models
+
+TAMANO_BLOQUE = 1000
+
+# (modelo, campo de texto antiguo, nueva ForeignKey, modelo destino, campo clave en destino)
+RELACIONES = [
+    ('Cliente', 'usuario_asociado', 'usuario', 'Usuario', 'username'),
+    ('Contrato', 'cliente_numero', 'cliente', 'Cliente', 'numero_cliente'),
+    ('Medidor', 'contrato_numero', 'contrato', 'Contrato', 'numero_contrato'),
+    ('Lectura', 'medidor_numero', 'medidor', 'Medidor', 'numero_medidor'),
+    ('Boleta', 'cliente_numero', 'cliente', 'Cliente', 'numero_cliente'),
+    ('Boleta', 'lectura_ref', 'lectura', 'Lectura', 'id'),
+    ('Pago', 'boleta_ref', 'boleta', 'Boleta', 'id'),
+]
+
+
+def _normalizar(valor, clave):
+    valor = (valor or '').strip()
+    if clave == 'id':
+        return int(valor) if valor.isdigit() else None
+    return valor or None
+
+
+def _resolver_bloque(modelo, destino, campo_fk, clave, bloque, huerfanos):
+    claves = {_normalizar(texto, clave) for _, texto in bloque} - {None}
+    mapa = dict(destino.objects.filter(**{f'{clave}__in': claves}).values_list(clave, 'id'))
+
+    objetos = []
+    for pk, texto in bloque:
+        destino_id = mapa.get(_normalizar(texto, clave))
+        if destino_id is None:
+            huerfanos.append((pk, texto))
+            continue
+        objeto = modelo(pk=pk)
+        setattr(objeto, f'{campo_fk}_id', destino_id)
+        objetos.append(objeto)
+    modelo.objects.bulk_update(objetos, [campo_fk], batch_size=TAMANO_BLOQUE)
+
+
+def resolver_relaciones(apps, schema_editor):
+    ReferenciaHuerfana = apps.get_model('sistemaGestion', 'ReferenciaHuerfana')
+    for nombre_modelo, campo_texto, campo_fk, nombre_destino, clave in RELACIONES:
+        modelo = apps.get_model('sistemaGestion', nombre_modelo)
+        destino = apps.get_model('sistemaGestion', nombre_destino)
+
+        filas = (
+            modelo.objects.exclude(**{f'{campo_texto}__isnull': True})
+            .exclude(**{campo_texto: ''})
+            .order_by('pk')
+            .values_list('pk', campo_texto)
+            .iterator(chunk_size=TAMANO_BLOQUE)
+        )
+        huerfanos = []
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= TAMANO_BLOQUE:
+                _resolver_bloque(modelo, destino, campo_fk, clave, bloque, huerfanos)
+                bloque = []
+        if bloque:
+            _resolver_bloque(modelo, destino, campo_fk, clave, bloque, huerfanos)
+
+        if huerfanos:
+            ReferenciaHuerfana.objects.bulk_create(
+                [ReferenciaHuerfana(modelo=nombre_modelo, objeto_id=pk, campo=campo_texto, valor=texto.strip()[:45])
+                 for pk, texto in huerfanos],
+                batch_size=TAMANO_BLOQUE,
+            )
+            print(f"\n  {nombre_modelo}.{campo_texto}: {len(huerfanos)} referencias huérfanas quedaron en NULL "
+                  f"(guardadas en ReferenciaHuerfana)")
+            for pk, texto in huerfanos[:20]:
+                print(f"    {nombre_modelo} id={pk} -> '{texto}'")
+            if len(huerfanos) > 20:
+                print(f"    ... y {len(huerfanos) - 20} más")
+
+
+def revertir_relaciones(apps, schema_editor):
+    """Vuelve a llenar las columnas de texto desde las ForeignKey y las referencias huérfanas guardadas"""
+    ReferenciaHuerfana = apps.get_model('sistemaGestion', 'ReferenciaHuerfana')
+    for nombre_modelo, campo_texto, campo_fk, nombre_destino, clave in RELACIONES:
+        modelo = apps.get_model('sistemaGestion', nombre_modelo)
+        filas = (
+            modelo.objects.filter(**{f'{campo_fk}__isnull': False})
+            .order_by('pk')
+            .values_list('pk', f'{campo_fk}__{clave}')
+            .iterator(chunk_size=TAMANO_BLOQUE)
+        )
+        huerfanas = (
+            ReferenciaHuerfana.objects.filter(modelo=nombre_modelo, campo=campo_texto)
+            .values_list('objeto_id', 'valor')
+            .iterator(chunk_size=TAMANO_BLOQUE)
+        )
+        bloque = []
+        for pk, valor in list(filas) + list(huerfanas):
+            objeto = modelo(pk=pk)
+            setattr(objeto, campo_texto, str(valor))
+            bloque.append(objeto)
+            if len(bloque) >= TAMANO_BLOQUE:
+                modelo.objects.bulk_update(bloque, [campo_texto], batch_size=TAMANO_BLOQUE)
+                bloque = []
+        modelo.objects.bulk_update(bloque, [campo_texto], batch_size=TAMANO_BLOQUE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0008_relaciones_foreignkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenciaHuerfana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=45)),
+                ('objeto_id', models.BigIntegerField()),
+                ('campo', models.CharField(max_length=45)),
+                ('valor', models.CharField(max_length=45)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modelo', 'campo'], name='referencia_huerfana_idx')],
+            },
+        ),
+        migrations.RunPython(resolver_relaciones, revertir_relaciones),
+    ]
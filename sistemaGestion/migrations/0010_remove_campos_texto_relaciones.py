@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0009_resolver_relaciones'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cliente',
+            name='usuario_asociado',
+        ),
+        migrations.RemoveField(
+            model_name='contrato',
+            name='cliente_numero',
+        ),
+        migrations.RemoveField(
+            model_name='medidor',
+            name='contrato_numero',
+        ),
+        migrations.RemoveField(
+            model_name='lectura',
+            name='medidor_numero',
+        ),
+        migrations.RemoveField(
+            model_name='boleta',
+            name='cliente_numero',
+        ),
+        migrations.RemoveField(
+            model_name='boleta',
+            name='lectura_ref',
+        ),
+        migrations.RemoveField(
+            model_name='pago',
+            name='boleta_ref',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0010_remove_campos_texto_relaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='tipo_cliente',
+            field=models.CharField(choices=[('Residencial', 'Residencial'), ('Comercial', 'Comercial'), ('Industrial', 'Industrial')], default='Residencial', max_length=45),
+        ),
+    ]
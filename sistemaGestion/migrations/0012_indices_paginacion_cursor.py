@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0011_cliente_tipo_cliente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lectura',
+            index=models.Index(fields=['fecha_lectura', 'id'], name='lectura_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago', 'id'], name='pago_fecha_id_idx'),
+        ),
+    ]
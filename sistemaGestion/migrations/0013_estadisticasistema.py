@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0012_indices_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaSistema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=45, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
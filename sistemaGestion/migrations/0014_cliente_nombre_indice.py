@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0013_estadisticasistema'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cliente',
+            name='nombre',
+            field=models.CharField(db_index=True, max_length=45),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0014_cliente_nombre_indice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['fecha_emision', 'id'], name='boleta_emision_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'fecha_emision'], name='boleta_estado_emision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', 'fecha_vencimiento'], name='boleta_estado_venc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['estado', 'numero_contrato'], name='contrato_estado_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['fecha_inicio'], name='contrato_fecha_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['fecha_fin'], name='contrato_fecha_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lectura',
+            index=models.Index(fields=['tipo_lectura', 'fecha_lectura', 'id'], name='lectura_tipo_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lectura',
+            index=models.Index(fields=['medidor', 'fecha_lectura'], name='lectura_medidor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medidor',
+            index=models.Index(fields=['estado_medidor', 'numero_medidor'], name='medidor_estado_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medidor',
+            index=models.Index(fields=['fecha_instalacion'], name='medidor_fecha_instalacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['estado_pago', 'fecha_pago', 'id'], name='pago_estado_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarifa',
+            index=models.Index(fields=['tipo_cliente', 'tipo_tarifa', 'fecha_vigencia'], name='tarifa_tipo_vigencia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarifa',
+            index=models.Index(fields=['fecha_vigencia'], name='tarifa_fecha_vigencia_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0015_indices_listas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medidor',
+            name='ultima_lectura_fecha',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='medidor',
+            name='ultima_lectura_valor',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='medidor',
+            name='ultimo_consumo',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
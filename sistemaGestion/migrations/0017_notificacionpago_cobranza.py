@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0016_medidor_ultima_lectura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacionpago',
+            name='clave_cobranza',
+            field=models.CharField(blank=True, max_length=45, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='notificacionpago',
+            name='cliente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones_pago', to='sistemaGestion.cliente'),
+        ),
+    ]
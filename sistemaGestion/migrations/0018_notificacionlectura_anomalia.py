@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0017_notificacionpago_cobranza'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='lectura',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones', to='sistemaGestion.lectura'),
+        ),
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='medidor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones_lectura', to='sistemaGestion.medidor'),
+        ),
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='puntaje',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='tipo_anomalia',
+            field=models.CharField(blank=True, choices=[('Pico', 'Pico de consumo'), ('Sin consumo', 'Consumo nulo sostenido'), ('Registro menor', 'Lectura menor que la anterior')], max_length=45, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacionlectura',
+            constraint=models.UniqueConstraint(fields=('lectura', 'tipo_anomalia'), name='notificacion_lectura_anomalia_unica'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0018_notificacionlectura_anomalia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoTipoClienteMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_cliente', models.CharField(choices=[('Residencial', 'Residencial'), ('Comercial', 'Comercial'), ('Industrial', 'Industrial')], max_length=45)),
+                ('mes', models.DateField()),
+                ('consumo_total', models.BigIntegerField(default=0)),
+                ('lecturas', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tipo_cliente', 'mes'), name='consumo_tipo_cliente_mes_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsumoMedidorMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('consumo_total', models.BigIntegerField(default=0)),
+                ('lecturas', models.IntegerField(default=0)),
+                ('medidor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos_mensuales', to='sistemaGestion.medidor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mes'], name='consumo_medidor_mes_idx')],
+                'constraints': [models.UniqueConstraint(fields=('medidor', 'mes'), name='consumo_medidor_mes_unico')],
+            },
+        ),
+    ]
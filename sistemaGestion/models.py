@@ -10,12 +10,21 @@ from django.db import models
 #ademas se incluye el charfield unique para asegurar que ciertos campos no se repitan en la base de datos
 #y el max_length para limitar la longitud de los campos de texto
 #tambien null=True y blank=True para permitir que ciertos campos sean opcionales.
+
+#las relaciones entre modelos son ForeignKey (indexadas), con on_delete=SET_NULL para que
+#al eliminar un registro no se borren en cascada los registros que lo referencian
 class Cliente(models.Model):
+    TIPO_CLIENTE_CHOICES = [
+        ('Residencial','Residencial'),
+        ('Comercial','Comercial'),
+        ('Industrial','Industrial')
+    ]
     numero_cliente = models.CharField(max_length=45, unique=True)
-    nombre = models.CharField(max_length=45)
+    nombre = models.CharField(max_length=45, db_index=True)  # indexado para el autocompletado por prefijo
     email = models.CharField(max_length=45, unique=True)
     telefono = models.CharField(max_length=15)
-    usuario_asociado = models.CharField(max_length=45, blank=True, null=True)
+    tipo_cliente = models.CharField(max_length=45, choices=TIPO_CLIENTE_CHOICES, default='Residencial')  # define la tarifa que se le aplica
+    usuario = models.ForeignKey('Usuario', on_delete=models.SET_NULL, blank=True, null=True, related_name='clientes')
     
     def __str__(self):
         return f"{self.numero_cliente} - {self.nombre}"
@@ -29,7 +38,15 @@ class Contrato(models.Model):
     fecha_fin = models.DateField()
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='Activo')
     numero_contrato = models.CharField(max_length=45, unique=True)
-    cliente_numero = models.CharField(max_length=45, blank=True, null=True)
+    cliente = models.ForeignKey(Cliente, on_delete=models.SET_NULL, blank=True, null=True, related_name='contratos')
+
+    class Meta:
+        indexes = [
+            # lista_contratos filtra por estado y ordena por número; el admin ordena por fecha_inicio
+            models.Index(fields=['estado', 'numero_contrato'], name='contrato_estado_numero_idx'),
+            models.Index(fields=['fecha_inicio'], name='contrato_fecha_inicio_idx'),
+            models.Index(fields=['fecha_fin'], name='contrato_fecha_fin_idx'),
+        ]
 
     def __str__(self):
         return f"Contrato {self.numero_contrato} - {self.estado}"
@@ -50,6 +67,13 @@ class Tarifa(models.Model):
     tipo_tarifa = models.CharField(max_length=45, choices=TARIFA_CHOICES, default='Verano')
     tipo_cliente = models.CharField(max_length=45, choices=CLIENTE_CHOICES, default='Residencial')
 
+    class Meta:
+        indexes = [
+            # orden de lista_tarifas
+            models.Index(fields=['tipo_cliente', 'tipo_tarifa', 'fecha_vigencia'], name='tarifa_tipo_vigencia_idx'),
+            models.Index(fields=['fecha_vigencia'], name='tarifa_fecha_vigencia_idx'),
+        ]
+
     def __str__(self):
         return f"Tarifa {self.tipo_tarifa} - {self.tipo_cliente} (${self.precio}/kWh)"
 
@@ -67,7 +91,19 @@ class Medidor(models.Model):
     estado_medidor = models.CharField(max_length=45, choices=ESTADO_CHOICES, default='Activo')
     imagen_ubicacion = models.URLField(max_length=200, blank=True, null=True)  # Imagen del mapa de ubicación
     imagen_fisica = models.URLField(max_length=200, blank=True, null=True)     # Imagen física del medidor
-    contrato_numero = models.CharField(max_length=45, blank=True, null=True)
+    contrato = models.ForeignKey(Contrato, on_delete=models.SET_NULL, blank=True, null=True, related_name='medidores')
+    # copia de la lectura más reciente, para no buscarla en la tabla de lecturas
+    # (se mantiene con las señales de Lectura y la importación, ver consumos.py)
+    ultima_lectura_fecha = models.DateField(blank=True, null=True)
+    ultima_lectura_valor = models.PositiveIntegerField(blank=True, null=True)
+    ultimo_consumo = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # lista_medidores filtra por estado y ordena por número
+            models.Index(fields=['estado_medidor', 'numero_medidor'], name='medidor_estado_numero_idx'),
+            models.Index(fields=['fecha_instalacion'], name='medidor_fecha_instalacion_idx'),
+        ]
 
     def __str__(self):
         return f"Medidor {self.numero_medidor} - {self.ubicacion} ({self.estado_medidor})"
@@ -82,7 +118,16 @@ class Lectura(models.Model):
     consumo_energetico = models.PositiveIntegerField()
     tipo_lectura = models.CharField(max_length=45, choices=TIPO_LECTURA_CHOICES, default='Digital')
     lectura_actual = models.PositiveIntegerField()
-    medidor_numero = models.CharField(max_length=45, blank=True, null=True)
+    medidor = models.ForeignKey(Medidor, on_delete=models.SET_NULL, blank=True, null=True, related_name='lecturas')
+
+    class Meta:
+        indexes = [
+            # usado por la paginación por cursor de lista_lecturas
+            models.Index(fields=['fecha_lectura', 'id'], name='lectura_fecha_id_idx'),
+            models.Index(fields=['tipo_lectura', 'fecha_lectura', 'id'], name='lectura_tipo_fecha_id_idx'),
+            # lecturas de un medidor por fecha (facturación y detalle del medidor)
+            models.Index(fields=['medidor', 'fecha_lectura'], name='lectura_medidor_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Lectura {self.fecha_lectura} - {self.consumo_energetico} kWh"
@@ -100,8 +145,16 @@ class Boleta(models.Model):
     monto_total = models.PositiveIntegerField()
     consumo_energetico = models.CharField(max_length=45)
     estado = models.CharField(max_length=45, choices=BOLETA_CHOICES, default='Pendiente')
-    lectura_id = models.CharField(max_length=50, blank=True, null=True)       
-    cliente_numero = models.CharField(max_length=45, blank=True, null=True)   
+    lectura = models.ForeignKey(Lectura, on_delete=models.SET_NULL, blank=True, null=True, related_name='boletas')
+    cliente = models.ForeignKey(Cliente, on_delete=models.SET_NULL, blank=True, null=True, related_name='boletas')
+
+    class Meta:
+        indexes = [
+            # orden de lista_boletas, filtro por estado y estadísticas agrupadas por estado
+            models.Index(fields=['fecha_emision', 'id'], name='boleta_emision_id_idx'),
+            models.Index(fields=['estado', 'fecha_emision'], name='boleta_estado_emision_idx'),
+            models.Index(fields=['estado', 'fecha_vencimiento'], name='boleta_estado_venc_idx'),
+        ]
 
     def __str__(self):
         return f"Boleta {self.fecha_emision} - ${self.monto_total} ({self.estado})"
@@ -124,7 +177,14 @@ class Pago(models.Model):
     metodo_pago = models.CharField(max_length=45, choices=METODOPAGO_CHOICES)
     numero_referencia = models.CharField(max_length=45)
     estado_pago = models.CharField(max_length=45, choices=PAGO_CHOICES, default='Pagado')
-    boleta_id = models.CharField(max_length=50, blank=True, null=True)
+    boleta = models.ForeignKey(Boleta, on_delete=models.SET_NULL, blank=True, null=True, related_name='pagos')
+
+    class Meta:
+        indexes = [
+            # usado por la paginación por cursor de lista_pagos
+            models.Index(fields=['fecha_pago', 'id'], name='pago_fecha_id_idx'),
+            models.Index(fields=['estado_pago', 'fecha_pago', 'id'], name='pago_estado_fecha_id_idx'),
+        ]
 
     def __str__(self):
         return f"Pago {self.numero_referencia} - ${self.monto_pagado} ({self.metodo_pago})"
@@ -132,7 +192,24 @@ class Pago(models.Model):
 
 
 class NotificacionLectura(models.Model):
+    TIPO_ANOMALIA_CHOICES = [
+        ('Pico', 'Pico de consumo'),
+        ('Sin consumo', 'Consumo nulo sostenido'),
+        ('Registro menor', 'Lectura menor que la anterior'),
+    ]
+
     registro_consumo = models.CharField(max_length=500)
+    # las notificaciones del análisis de anomalías (anomalias.py) guardan el medidor, la lectura
+    # y el puntaje; una lectura tiene a lo más una notificación por tipo de anomalía
+    medidor = models.ForeignKey(Medidor, on_delete=models.SET_NULL, blank=True, null=True, related_name='notificaciones_lectura')
+    lectura = models.ForeignKey(Lectura, on_delete=models.SET_NULL, blank=True, null=True, related_name='notificaciones')
+    tipo_anomalia = models.CharField(max_length=45, choices=TIPO_ANOMALIA_CHOICES, blank=True, null=True)
+    puntaje = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lectura', 'tipo_anomalia'], name='notificacion_lectura_anomalia_unica'),
+        ]
 
     def __str__(self):
         return f"Notificación Lectura - {self.registro_consumo[:30]}..."
@@ -140,6 +217,10 @@ class NotificacionLectura(models.Model):
 
 class NotificacionPago(models.Model):
     deuda_pendiente = models.CharField(max_length=500)
+    # los avisos de cobranza automáticos (cobranza.py) guardan el cliente y una clave
+    # 'AAAA-MM:cliente_id' única por ciclo, para no avisar dos veces en el mismo ciclo
+    cliente = models.ForeignKey(Cliente, on_delete=models.SET_NULL, blank=True, null=True, related_name='notificaciones_pago')
+    clave_cobranza = models.CharField(max_length=45, unique=True, blank=True, null=True)
 
     def __str__(self):
         return f"Notificación Pago - {self.deuda_pendiente[:30]}..."
@@ -162,3 +243,67 @@ class Usuario(models.Model):
     def __str__(self):
         return f"{self.username} - {self.rol}"
 
+
+
+#tabla resumen con los contadores del dashboard, se mantiene con incrementos
+#desde las señales (signals.py) y se corrige periodicamente con reconciliar_estadisticas
+class EstadisticaSistema(models.Model):
+    clave = models.CharField(max_length=45, unique=True)
+    valor = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.clave}: {self.valor}"
+
+
+#tablas resumen del consumo mensual por medidor y por tipo de cliente, para que los reportes
+#no recorran la tabla de lecturas; se mantienen con incrementos desde las señales de Lectura
+#y la importacion, y se regeneran con reconstruir_resumenes (ver resumenes.py)
+class ConsumoMedidorMes(models.Model):
+    medidor = models.ForeignKey(Medidor, on_delete=models.CASCADE, related_name='consumos_mensuales')
+    mes = models.DateField()  # primer dia del mes
+    consumo_total = models.BigIntegerField(default=0)
+    lecturas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['medidor', 'mes'], name='consumo_medidor_mes_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['mes'], name='consumo_medidor_mes_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.medidor_id} {self.mes:%m/%Y}: {self.consumo_total} kWh"
+
+
+class ConsumoTipoClienteMes(models.Model):
+    tipo_cliente = models.CharField(max_length=45, choices=Cliente.TIPO_CLIENTE_CHOICES)
+    mes = models.DateField()  # primer dia del mes
+    consumo_total = models.BigIntegerField(default=0)
+    lecturas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tipo_cliente', 'mes'], name='consumo_tipo_cliente_mes_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo_cliente} {self.mes:%m/%Y}: {self.consumo_total} kWh"
+
+
+#referencias de texto antiguas (numero_cliente, numero_contrato, etc.) que la migracion 0009 no pudo
+#convertir en ForeignKey porque no corresponden a ningun registro; se guardan aqui para corregirlas
+#a mano, ya que las columnas de texto se eliminan en la migracion 0010
+class ReferenciaHuerfana(models.Model):
+    modelo = models.CharField(max_length=45)
+    objeto_id = models.BigIntegerField()
+    campo = models.CharField(max_length=45)
+    valor = models.CharField(max_length=45)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modelo', 'campo'], name='referencia_huerfana_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id}.{self.campo} -> '{self.valor}'"
@@ -0,0 +1,110 @@
+"""
+Paginación por cursor (keyset) para las listas con muchos registros.
+
+A diferencia de Paginator, no ejecuta COUNT(*) ni OFFSET: cada página busca
+directamente a partir del último registro mostrado usando el par
+(campo de orden, id), que debe estar cubierto por un índice.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class PaginaCursor:
+    """
+    Página de resultados compatible con lo que usan los templates
+    (iterable, has_next, has_previous, has_other_pages).
+    """
+    por_cursor = True
+
+    def __init__(self, objetos, cursor_siguiente, cursor_anterior):
+        self.object_list = objetos
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def codificar_cursor(direccion, valor, pk):
+    datos = json.dumps([direccion, valor, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (direccion, valor, pk) o None si el cursor no es válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        direccion, valor, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+    # los valores de orden se codifican como texto (fechas) o enteros
+    if direccion not in ('sig', 'ant') or type(pk) is not int or type(valor) not in (str, int):
+        return None
+    return direccion, valor, pk
+
+
+def _valor_cursor(objeto, campo):
+    valor = getattr(objeto, campo)
+    return valor.isoformat() if hasattr(valor, 'isoformat') else valor
+
+
+def paginar_por_cursor(request, objetos, orden, elementos_por_pagina=5):
+    """
+    Pagina un queryset ordenado por `orden` (por ejemplo '-fecha_lectura') y luego por id.
+    El cursor viaja en el parámetro GET 'cursor', así que los filtros de la vista se mantienen.
+    """
+    descendente = orden.startswith('-')
+    campo = orden.lstrip('-')
+    modelo_campo = objetos.model._meta.get_field(campo)
+
+    cursor = decodificar_cursor(request.GET.get('cursor', ''))
+    retrocediendo = False
+    if cursor:
+        direccion, valor, pk = cursor
+        try:
+            valor = modelo_campo.to_python(valor)
+        except (ValidationError, TypeError):
+            cursor = None
+    if cursor:
+        retrocediendo = direccion == 'ant'
+        # avanzar en el sentido del orden, o en sentido contrario al retroceder
+        menor = descendente != retrocediendo
+        op = 'lt' if menor else 'gt'
+        objetos = objetos.filter(Q(**{f'{campo}__{op}': valor}) | Q(**{campo: valor, f'id__{op}': pk}))
+
+    if descendente != retrocediendo:
+        objetos = objetos.order_by(f'-{campo}', '-id')
+    else:
+        objetos = objetos.order_by(campo, 'id')
+
+    # se pide un registro extra solo para saber si existe otra página
+    filas = list(objetos[:elementos_por_pagina + 1])
+    hay_mas = len(filas) > elementos_por_pagina
+    filas = filas[:elementos_por_pagina]
+    if retrocediendo:
+        filas.reverse()
+
+    cursor_siguiente = cursor_anterior = None
+    if filas:
+        primero, ultimo = filas[0], filas[-1]
+        if hay_mas or retrocediendo:
+            cursor_siguiente = codificar_cursor('sig', _valor_cursor(ultimo, campo), ultimo.id)
+        if cursor and (hay_mas or not retrocediendo):
+            cursor_anterior = codificar_cursor('ant', _valor_cursor(primero, campo), primero.id)
+    return PaginaCursor(filas, cursor_siguiente, cursor_anterior)
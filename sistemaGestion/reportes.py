@@ -0,0 +1,172 @@
+"""
+Reportes y totales calculados en la base de datos.
+
+Los totales se obtienen con consultas agrupadas (aggregate/annotate) en vez de recorrer
+los objetos en Python, y se guardan en cache por conjunto de filtros. Cualquier cambio en
+Boletas o Pagos invalida la cache (ver signals.py).
+"""
+
+import hashlib
+import json
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Boleta, Pago
+
+# segundos que se mantiene un reporte en cache aunque no haya cambios
+DURACION_CACHE = 300
+
+CLAVE_VERSION = 'reportes:version'
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, 1, None)
+        version = cache.get(CLAVE_VERSION, 1)
+    return version
+
+
+def invalidar():
+    """Invalida todos los reportes en cache (se llama al crear, editar o eliminar boletas y pagos)"""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, 1, None)
+
+
+def _clave_cache(nombre, filtros):
+    firma = json.dumps(filtros, sort_keys=True, default=str)
+    resumen = hashlib.md5(firma.encode()).hexdigest()
+    return f'reportes:{nombre}:{_version()}:{resumen}'
+
+
+def estadisticas_boletas(boletas, filtros):
+    """
+    Calcula las estadísticas de lista_boletas sobre el queryset ya filtrado.
+    `filtros` son los parámetros de búsqueda activos y se usan como clave de cache.
+    """
+    clave = _clave_cache('boletas', filtros)
+    estadisticas = cache.get(clave)
+    if estadisticas is not None:
+        return estadisticas
+
+    # una sola consulta agrupada por estado: cantidad y monto de cada estado
+    agrupado = {
+        fila['estado']: {'cantidad': fila['cantidad'], 'monto': fila['monto'] or 0}
+        for fila in boletas.order_by().values('estado').annotate(cantidad=Count('id'), monto=Sum('monto_total'))
+    }
+    por_estado = {estado: agrupado.get(estado, {'cantidad': 0, 'monto': 0}) for estado, _ in Boleta.BOLETA_CHOICES}
+
+    # pagos confirmados; si hay filtros solo se consideran los pagos de las boletas filtradas
+    pagos = Pago.objects.filter(estado_pago='Pagado')
+    if any(filtros.values()):
+        pagos = pagos.filter(boleta__in=boletas.order_by().values('id'))
+    totales_pagos = pagos.aggregate(cantidad=Count('id'), monto=Sum('monto_pagado'))
+
+    gasto_total = sum(estado['monto'] for estado in por_estado.values())
+    total_pagado = totales_pagos['monto'] or 0
+    estadisticas = {
+        'total_servicios': sum(estado['cantidad'] for estado in por_estado.values()),
+        'servicios_pagados': totales_pagos['cantidad'],
+        'servicios_pendientes': por_estado['Pendiente']['cantidad'],
+        'gasto_total_presupuestado': gasto_total,
+        'total_pagado': total_pagado,
+        'porcentaje_pagado': (total_pagado * 100 / gasto_total) if gasto_total else 0,
+        'por_estado': por_estado,
+    }
+    cache.set(clave, estadisticas, DURACION_CACHE)
+    return estadisticas
+
+
+# tramos de antigüedad de saldos: (clave, etiqueta, días de atraso desde, hasta); None es sin límite
+TRAMOS_ANTIGUEDAD = [
+    ('por_vencer', 'Por vencer', None, -1),
+    ('dias_0_30', '0-30 días', 0, 30),
+    ('dias_31_60', '31-60 días', 31, 60),
+    ('dias_61_90', '61-90 días', 61, 90),
+    ('dias_mas_90', 'Más de 90 días', 91, None),
+]
+
+
+def _condicion_tramo(columna, corte, desde, hasta):
+    """SQL (y parámetros) para un atraso entre `desde` y `hasta` días a la fecha de corte"""
+    condiciones, parametros = [], []
+    if desde is not None:
+        condiciones.append(f'{columna} <= %s')
+        parametros.append(connection.ops.adapt_datefield_value(corte - timedelta(days=desde)))
+    if hasta is not None:
+        condiciones.append(f'{columna} >= %s')
+        parametros.append(connection.ops.adapt_datefield_value(corte - timedelta(days=hasta)))
+    return ' AND '.join(condiciones), parametros
+
+
+def antiguedad_saldos(corte=None):
+    """
+    Saldo impago de cada cliente a la fecha de corte, separado por días de atraso (TRAMOS_ANTIGUEDAD).
+    El saldo de cada boleta emitida hasta el corte es monto_total menos sus pagos hasta esa fecha.
+    Solo se leen las boletas no pagadas y las pagadas con algún pago posterior al corte.
+    Los pagos se suman una vez por boleta en una subconsulta agrupada por boleta (tabla derivada)
+    y sobre ella una sola consulta agrupada por cliente suma los tramos con agregación condicional.
+    Retorna {'corte', 'clientes': [filas ordenadas por saldo total], 'totales'} y se guarda en cache por fecha de corte.
+    """
+    corte = corte or date.today()
+    clave = _clave_cache('antiguedad', {'corte': corte})
+    reporte = cache.get(clave)
+    if reporte is not None:
+        return reporte
+
+    pagadas_despues = Pago.objects.filter(fecha_pago__gt=corte, boleta__isnull=False).values('boleta_id')
+    boletas = (
+        Boleta.objects.filter(cliente__isnull=False, fecha_emision__lte=corte)
+        .filter(~Q(estado='Pagado') | Q(id__in=pagadas_despues))
+        .order_by()
+        .values(
+            'id',
+            id_cliente=F('cliente_id'),
+            numero_cliente=F('cliente__numero_cliente'),
+            nombre_cliente=F('cliente__nombre'),
+            vencimiento=F('fecha_vencimiento'),
+            monto=F('monto_total'),
+        )
+        .annotate(pagado=Coalesce(Sum('pagos__monto_pagado', filter=Q(pagos__fecha_pago__lte=corte)), 0))
+    )
+    sql_boletas, parametros_boletas = boletas.query.sql_with_params()
+
+    nombre = connection.ops.quote_name
+    saldo = f"({nombre('monto')} - {nombre('pagado')})"
+    columnas, parametros_tramos = [], []
+    for clave_tramo, _, desde, hasta in TRAMOS_ANTIGUEDAD:
+        condicion, parametros = _condicion_tramo(nombre('vencimiento'), corte, desde, hasta)
+        columnas.append(f'SUM(CASE WHEN {condicion} THEN {saldo} ELSE 0 END)')
+        parametros_tramos.extend(parametros)
+    sql = (
+        f"SELECT {nombre('id_cliente')}, {nombre('numero_cliente')}, {nombre('nombre_cliente')}, "
+        f"{', '.join(columnas)}, SUM({saldo}), COUNT(*) "
+        f"FROM ({sql_boletas}) saldos "
+        f"WHERE {nombre('monto')} > {nombre('pagado')} "
+        f"GROUP BY {nombre('id_cliente')}, {nombre('numero_cliente')}, {nombre('nombre_cliente')}"
+    )
+    with connection.cursor() as cursor:
+        # los parámetros de los tramos van en el SELECT, antes de los de la subconsulta
+        cursor.execute(sql, parametros_tramos + list(parametros_boletas))
+        filas = cursor.fetchall()
+
+    claves = [clave_tramo for clave_tramo, _, _, _ in TRAMOS_ANTIGUEDAD] + ['total', 'boletas']
+    clientes = []
+    totales = dict.fromkeys(claves, 0)
+    for cliente_id, numero_cliente, nombre_cliente, *valores in filas:
+        cliente = {'cliente_id': cliente_id, 'numero_cliente': numero_cliente, 'nombre': nombre_cliente}
+        for campo, valor in zip(claves, valores):
+            cliente[campo] = int(valor or 0)
+            totales[campo] += cliente[campo]
+        clientes.append(cliente)
+    clientes.sort(key=lambda cliente: (-cliente['total'], cliente['numero_cliente']))
+
+    reporte = {'corte': corte, 'clientes': clientes, 'totales': totales}
+    cache.set(clave, reporte, DURACION_CACHE)
+    return reporte
@@ -0,0 +1,166 @@
+"""
+Resúmenes mensuales de consumo por medidor (ConsumoMedidorMes) y por tipo de cliente
+(ConsumoTipoClienteMes), para que los reportes lean unas miles de filas en vez de la tabla de lecturas.
+
+Se mantienen con incrementos: cada lectura que se crea, edita o elimina suma o resta su consumo
+(y una lectura) en el mes de su fecha, con registrar_cambios. Lo llaman las señales de Lectura,
+la importación CSV y la corrección de consumos, que no disparan señales.
+reconstruir() regenera los resúmenes de un rango de meses desde las lecturas, por ejemplo
+después de cambiar el contrato de un medidor o el tipo de un cliente (los incrementos usan el
+tipo de cliente vigente al guardar la lectura).
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DateField, Max, Min, Sum, Value
+
+from .models import Cliente, ConsumoMedidorMes, ConsumoTipoClienteMes, Lectura, Medidor
+
+TAMANO_LOTE = 1000
+
+
+def mes_de(fecha):
+    return fecha.replace(day=1)
+
+
+def mes_siguiente(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def mes_anterior(mes):
+    return mes_de(mes - timedelta(days=1))
+
+
+def tipos_de_medidores(medidor_ids):
+    """{medidor_id: tipo_cliente} según el cliente del contrato de cada medidor (sin los que no tienen)"""
+    return dict(
+        Medidor.objects.filter(id__in=medidor_ids, contrato__cliente__isnull=False)
+        .values_list('id', 'contrato__cliente__tipo_cliente')
+    )
+
+
+def registrar_cambios(quitadas=(), agregadas=()):
+    """
+    Actualiza los resúmenes restando las lecturas `quitadas` y sumando las `agregadas`,
+    dadas como tuplas (medidor_id, fecha_lectura, consumo_energetico).
+    Las lecturas sin medidor no se resumen.
+    """
+    cambios = [(fila, -1) for fila in quitadas if fila and fila[0]] + [(fila, 1) for fila in agregadas if fila and fila[0]]
+    if not cambios:
+        return
+    tipos = tipos_de_medidores({medidor_id for (medidor_id, _, _), _ in cambios})
+    por_medidor = defaultdict(lambda: [0, 0])
+    por_tipo = defaultdict(lambda: [0, 0])
+    for (medidor_id, fecha, consumo), signo in cambios:
+        mes = mes_de(fecha)
+        for deltas, clave in ((por_medidor, medidor_id), (por_tipo, tipos.get(medidor_id))):
+            if clave is not None:
+                deltas[(clave, mes)][0] += signo * consumo
+                deltas[(clave, mes)][1] += signo
+
+    # si otra transacción crea la misma fila al mismo tiempo se reintenta una vez (ya existe y se actualiza)
+    for intento in range(2):
+        try:
+            with transaction.atomic():
+                _aplicar(ConsumoMedidorMes, 'medidor_id', por_medidor)
+                _aplicar(ConsumoTipoClienteMes, 'tipo_cliente', por_tipo)
+            return
+        except IntegrityError:
+            if intento:
+                raise
+
+
+def _aplicar(modelo, campo, deltas):
+    deltas = {clave: delta for clave, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+    existentes = modelo.objects.select_for_update().filter(
+        **{f'{campo}__in': {clave for clave, _ in deltas}, 'mes__in': {mes for _, mes in deltas}}
+    )
+    actualizar, vacias = [], []
+    for fila in existentes:
+        delta = deltas.pop((getattr(fila, campo), fila.mes), None)
+        if delta is None:
+            continue
+        fila.consumo_total += delta[0]
+        fila.lecturas += delta[1]
+        (actualizar if fila.lecturas > 0 else vacias).append(fila)
+    modelo.objects.bulk_update(actualizar, ['consumo_total', 'lecturas'], batch_size=TAMANO_LOTE)
+    if vacias:
+        modelo.objects.filter(id__in=[fila.id for fila in vacias]).delete()
+    modelo.objects.bulk_create(
+        [modelo(**{campo: clave, 'mes': mes, 'consumo_total': consumo, 'lecturas': cantidad})
+         for (clave, mes), (consumo, cantidad) in deltas.items() if cantidad > 0],
+        batch_size=TAMANO_LOTE,
+    )
+
+
+def _insertar_consulta(modelo, columnas, consulta):
+    """
+    INSERT ... SELECT con la consulta agrupada (sin traer las filas a Python).
+    Las columnas de la consulta deben venir en el orden de `columnas`.
+    """
+    sql, params = consulta.query.sql_with_params()
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    nombres = ', '.join(connection.ops.quote_name(modelo._meta.get_field(columna).column) for columna in columnas)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {tabla} ({nombres}) {sql}', params)
+        return cursor.rowcount
+
+
+def reconstruir(desde=None, hasta=None):
+    """
+    Regenera los resúmenes de los meses entre `desde` y `hasta` (incluidos; por defecto todos
+    los meses con lecturas), un mes por transacción con INSERT ... SELECT agrupados.
+    Retorna la cantidad de filas por tabla.
+    """
+    if desde is None or hasta is None:
+        limites = Lectura.objects.aggregate(primera=Min('fecha_lectura'), ultima=Max('fecha_lectura'))
+        desde = desde or limites['primera']
+        hasta = hasta or limites['ultima']
+    resumen = {'meses': 0, 'medidor_mes': 0, 'tipo_cliente_mes': 0}
+    if desde is None or hasta is None:
+        return resumen
+
+    mes, ultimo = mes_de(desde), mes_de(hasta)
+    while mes <= ultimo:
+        siguiente = mes_siguiente(mes)
+        lecturas = Lectura.objects.filter(fecha_lectura__gte=mes, fecha_lectura__lt=siguiente).order_by()
+        totales = {'mes_resumen': Value(mes, output_field=DateField()), 'consumo': Sum('consumo_energetico'), 'cantidad': Count('id')}
+        with transaction.atomic():
+            ConsumoMedidorMes.objects.filter(mes=mes).delete()
+            ConsumoTipoClienteMes.objects.filter(mes=mes).delete()
+            resumen['medidor_mes'] += _insertar_consulta(
+                ConsumoMedidorMes, ['medidor_id', 'mes', 'consumo_total', 'lecturas'],
+                lecturas.filter(medidor__isnull=False).values('medidor_id').annotate(**totales),
+            )
+            resumen['tipo_cliente_mes'] += _insertar_consulta(
+                ConsumoTipoClienteMes, ['tipo_cliente', 'mes', 'consumo_total', 'lecturas'],
+                lecturas.filter(medidor__contrato__cliente__isnull=False).values('medidor__contrato__cliente__tipo_cliente').annotate(**totales),
+            )
+        resumen['meses'] += 1
+        mes = siguiente
+    return resumen
+
+
+def consumo_por_tipo_cliente(meses=6, hoy=None):
+    """
+    Consumo de los últimos `meses` meses por tipo de cliente, leído de los resúmenes.
+    Retorna una lista (del mes más reciente al más antiguo) de {'mes', 'consumos': [kWh por tipo], 'total'}.
+    """
+    ultimo = mes_de(hoy or date.today())
+    desde = ultimo
+    for _ in range(meses - 1):
+        desde = mes_anterior(desde)
+    valores = defaultdict(dict)
+    for tipo, mes, consumo in ConsumoTipoClienteMes.objects.filter(mes__gte=desde, mes__lte=ultimo).values_list('tipo_cliente', 'mes', 'consumo_total'):
+        valores[mes][tipo] = consumo
+    filas = []
+    mes = ultimo
+    while mes >= desde:
+        consumos = [valores[mes].get(tipo, 0) for tipo, _ in Cliente.TIPO_CLIENTE_CHOICES]
+        filas.append({'mes': mes, 'consumos': consumos, 'total': sum(consumos)})
+        mes = mes_anterior(mes)
+    return filas
@@ -0,0 +1,100 @@
+"""
+Serie de consumo de un medidor para el gráfico de detalle_medidor y ubicacion_medidor.
+
+Las lecturas del rango se leen por el índice (medidor, fecha_lectura) y se reducen en el
+servidor a la cantidad de puntos pedida, para no enviar años de lecturas al navegador:
+- lttb (largest-triangle-three-buckets): un punto por tramo, el que forma el triángulo de mayor
+  área con el punto elegido en el tramo anterior y el promedio del tramo siguiente; conserva la forma
+- minmax: el mínimo y el máximo de cada tramo; conserva los picos y los valles
+La vista serie_medidor responde con un ETag del contenido para que el navegador revalide sin
+volver a descargar la serie si no cambió.
+"""
+
+import hashlib
+import json
+from datetime import date
+
+from .models import Lectura
+
+LTTB = 'lttb'
+MINMAX = 'minmax'
+METODOS = (LTTB, MINMAX)
+
+PUNTOS_POR_DEFECTO = 200
+PUNTOS_MAXIMOS = 2000
+
+
+def lecturas_medidor(medidor_id, desde=None, hasta=None):
+    """Puntos (día ordinal, consumo) de las lecturas del medidor en el rango, ordenados por fecha"""
+    lecturas = Lectura.objects.filter(medidor_id=medidor_id)
+    if desde:
+        lecturas = lecturas.filter(fecha_lectura__gte=desde)
+    if hasta:
+        lecturas = lecturas.filter(fecha_lectura__lte=hasta)
+    return [
+        (fecha.toordinal(), consumo)
+        for fecha, consumo in lecturas.order_by('fecha_lectura', 'id').values_list('fecha_lectura', 'consumo_energetico')
+    ]
+
+
+def lttb(puntos, cantidad):
+    """Reduce `puntos` (x, y) ordenados por x a `cantidad` puntos; conserva el primero y el último"""
+    total = len(puntos)
+    if cantidad >= total or cantidad < 3:
+        return list(puntos)
+    tamano = (total - 2) / (cantidad - 2)
+    elegidos = [puntos[0]]
+    anterior = 0
+    for tramo in range(cantidad - 2):
+        # promedio del tramo siguiente (para el último tramo, el último punto)
+        inicio_siguiente = int((tramo + 1) * tamano) + 1
+        fin_siguiente = min(int((tramo + 2) * tamano) + 1, total)
+        siguientes = puntos[inicio_siguiente:fin_siguiente]
+        promedio_x = sum(x for x, _ in siguientes) / len(siguientes)
+        promedio_y = sum(y for _, y in siguientes) / len(siguientes)
+
+        ax, ay = puntos[anterior]
+        mejor, mayor_area = None, -1
+        for indice in range(int(tramo * tamano) + 1, int((tramo + 1) * tamano) + 1):
+            x, y = puntos[indice]
+            area = abs((ax - promedio_x) * (y - ay) - (ax - x) * (promedio_y - ay))
+            if area > mayor_area:
+                mejor, mayor_area = indice, area
+        elegidos.append(puntos[mejor])
+        anterior = mejor
+    elegidos.append(puntos[-1])
+    return elegidos
+
+
+def min_max(puntos, cantidad):
+    """Reduce `puntos` a lo más `cantidad` puntos: el mínimo y el máximo de cada tramo, en orden"""
+    total = len(puntos)
+    tramos = cantidad // 2
+    if cantidad >= total or tramos < 1:
+        return list(puntos)
+    elegidos = []
+    for tramo in range(tramos):
+        indices = range(tramo * total // tramos, (tramo + 1) * total // tramos)
+        minimo = min(indices, key=lambda indice: puntos[indice][1])
+        maximo = max(indices, key=lambda indice: puntos[indice][1])
+        elegidos.extend(puntos[indice] for indice in sorted({minimo, maximo}))
+    return elegidos
+
+
+def serie(medidor_id, desde=None, hasta=None, puntos=PUNTOS_POR_DEFECTO, metodo=LTTB):
+    """Diccionario con el total de lecturas del rango y los puntos reducidos como [fecha ISO, kWh]"""
+    lecturas = lecturas_medidor(medidor_id, desde, hasta)
+    reducidos = (lttb if metodo == LTTB else min_max)(lecturas, puntos)
+    return {
+        'desde': desde.isoformat() if desde else None,
+        'hasta': hasta.isoformat() if hasta else None,
+        'metodo': metodo,
+        'total_lecturas': len(lecturas),
+        'puntos': [[date.fromordinal(x).isoformat(), y] for x, y in reducidos],
+    }
+
+
+def contenido_y_etag(datos):
+    """JSON compacto de la serie y su ETag (hash del contenido)"""
+    contenido = json.dumps(datos, separators=(',', ':'))
+    return contenido, '"' + hashlib.md5(contenido.encode()).hexdigest() + '"'
@@ -0,0 +1,107 @@
+"""
+Señales que mantienen actualizados los contadores del dashboard (ver estadisticas.py),
+la copia de la última lectura de cada medidor (ver consumos.py) y los resúmenes mensuales
+de consumo (ver resumenes.py), e invalidan los reportes y las tarifas en memoria cuando
+cambian sus datos.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import consumos, estadisticas, reportes, resumenes, tarifas
+from .models import Boleta, Cliente, Contrato, Lectura, Medidor, Pago, Tarifa
+
+# modelo -> contador que se incrementa al crear y se decrementa al eliminar
+CONTADOR_POR_MODELO = {
+    Cliente: 'total_clientes',
+    Contrato: 'total_contratos',
+    Medidor: 'total_medidores',
+    Lectura: 'lecturas_pendientes',
+    Boleta: 'boletas_emitidas',
+}
+
+
+def _contar_creacion(sender, instance, created, **kwargs):
+    if created:
+        estadisticas.incrementar(CONTADOR_POR_MODELO[sender])
+
+
+def _contar_eliminacion(sender, instance, **kwargs):
+    estadisticas.incrementar(CONTADOR_POR_MODELO[sender], -1)
+
+
+for modelo in CONTADOR_POR_MODELO:
+    post_save.connect(_contar_creacion, sender=modelo, dispatch_uid=f'contador_creacion_{modelo.__name__}')
+    post_delete.connect(_contar_eliminacion, sender=modelo, dispatch_uid=f'contador_eliminacion_{modelo.__name__}')
+
+
+# los pagos solo se cuentan cuando estado_pago es 'Pagado', por eso tambien
+# hay que considerar los cambios de estado al editar
+@receiver(pre_save, sender=Pago)
+def _guardar_estado_pago_anterior(sender, instance, **kwargs):
+    instance._estado_pago_anterior = None
+    if instance.pk:
+        instance._estado_pago_anterior = (
+            Pago.objects.filter(pk=instance.pk).values_list('estado_pago', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Pago)
+def _contar_pago(sender, instance, created, **kwargs):
+    antes = getattr(instance, '_estado_pago_anterior', None) == 'Pagado'
+    ahora = instance.estado_pago == 'Pagado'
+    if ahora != antes:
+        estadisticas.incrementar('pagos_realizados', 1 if ahora else -1)
+
+
+@receiver(post_delete, sender=Pago)
+def _descontar_pago(sender, instance, **kwargs):
+    if instance.estado_pago == 'Pagado':
+        estadisticas.incrementar('pagos_realizados', -1)
+
+
+# cualquier cambio en boletas o pagos invalida los reportes en cache
+@receiver(post_save, sender=Boleta)
+@receiver(post_delete, sender=Boleta)
+@receiver(post_save, sender=Pago)
+@receiver(post_delete, sender=Pago)
+def _invalidar_reportes(sender, **kwargs):
+    reportes.invalidar()
+
+
+# crear_tarifa, editar_tarifa y eliminar_tarifa (y el admin) reconstruyen el resolutor de tarifas
+@receiver(post_save, sender=Tarifa)
+@receiver(post_delete, sender=Tarifa)
+def _invalidar_tarifas(sender, **kwargs):
+    tarifas.invalidar()
+
+
+# la copia de la última lectura del medidor: al crear basta comparar fechas,
+# al editar o eliminar se recalcula (la lectura pudo cambiar de medidor).
+# Los resúmenes mensuales restan los valores anteriores de la lectura y suman los nuevos.
+@receiver(pre_save, sender=Lectura)
+def _guardar_lectura_anterior(sender, instance, **kwargs):
+    instance._lectura_anterior = None
+    if instance.pk:
+        instance._lectura_anterior = (
+            Lectura.objects.filter(pk=instance.pk).values_list('medidor_id', 'fecha_lectura', 'consumo_energetico').first()
+        )
+    instance._medidor_anterior = instance._lectura_anterior[0] if instance._lectura_anterior else None
+
+
+@receiver(post_save, sender=Lectura)
+def _actualizar_ultima_lectura(sender, instance, created, **kwargs):
+    if created:
+        consumos.registrar_lectura_nueva(instance)
+    else:
+        consumos.reconstruir_ultimas_lecturas({instance.medidor_id, getattr(instance, '_medidor_anterior', None)})
+    resumenes.registrar_cambios(
+        quitadas=[getattr(instance, '_lectura_anterior', None)],
+        agregadas=[(instance.medidor_id, instance.fecha_lectura, instance.consumo_energetico)],
+    )
+
+
+@receiver(post_delete, sender=Lectura)
+def _descontar_ultima_lectura(sender, instance, **kwargs):
+    consumos.reconstruir_ultimas_lecturas({instance.medidor_id})
+    resumenes.registrar_cambios(quitadas=[(instance.medidor_id, instance.fecha_lectura, instance.consumo_energetico)])
@@ -0,0 +1,107 @@
+"""
+Resolución de la tarifa vigente en memoria.
+
+La tarifa vigente a una fecha es la de fecha_vigencia más reciente que no sea posterior a ella,
+para el tipo de cliente y el tipo de tarifa (temporada). En vez de consultarla por cada boleta,
+ResolutorTarifas carga la tabla Tarifa completa (es pequeña) en listas ordenadas por fecha para
+cada (tipo_cliente, tipo_tarifa) y la busca con bisect (una fecha) o numpy.searchsorted (muchas fechas).
+
+El resolutor se guarda por proceso y se reconstruye cuando cambia la versión en cache, que se
+incrementa al crear, editar o eliminar una tarifa (ver signals.py).
+"""
+
+import threading
+from bisect import bisect_right
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Tarifa
+
+CLAVE_VERSION = 'tarifas:version'
+
+
+class ResolutorTarifas:
+    def __init__(self, tarifas):
+        """`tarifas`: tuplas (tipo_cliente, tipo_tarifa, fecha_vigencia, precio) ordenadas por fecha e id"""
+        self.fechas = {}
+        self.precios = {}
+        for tipo_cliente, tipo_tarifa, fecha_vigencia, precio in tarifas:
+            fechas = self.fechas.setdefault((tipo_cliente, tipo_tarifa), [])
+            precios = self.precios.setdefault((tipo_cliente, tipo_tarifa), [])
+            # con dos tarifas en la misma fecha rige la de mayor id (la última cargada)
+            if fechas and fechas[-1] == fecha_vigencia:
+                precios[-1] = precio
+            else:
+                fechas.append(fecha_vigencia)
+                precios.append(precio)
+        # las mismas vigencias como arreglos datetime64 para resolver muchas fechas a la vez
+        self.vigencias = {clave: np.array(fechas, dtype='datetime64[D]') for clave, fechas in self.fechas.items()}
+
+    @classmethod
+    def desde_base_de_datos(cls):
+        return cls(
+            Tarifa.objects.order_by('fecha_vigencia', 'id')
+            .values_list('tipo_cliente', 'tipo_tarifa', 'fecha_vigencia', 'precio')
+        )
+
+    def precio(self, tipo_cliente, tipo_tarifa, fecha):
+        """Precio vigente a la fecha, o None si no hay tarifa vigente"""
+        fechas = self.fechas.get((tipo_cliente, tipo_tarifa))
+        if not fechas:
+            return None
+        posicion = bisect_right(fechas, fecha) - 1
+        return self.precios[(tipo_cliente, tipo_tarifa)][posicion] if posicion >= 0 else None
+
+    def precios_en_fechas(self, tipo_cliente, tipo_tarifa, fechas):
+        """
+        Precio vigente para cada fecha de la lista (None donde no hay tarifa), en el mismo orden.
+        Las posiciones de todas las fechas se buscan a la vez con numpy.searchsorted.
+        """
+        vigencias = self.vigencias.get((tipo_cliente, tipo_tarifa))
+        if vigencias is None:
+            return [None] * len(fechas)
+        precios = self.precios[(tipo_cliente, tipo_tarifa)]
+        posiciones = np.searchsorted(vigencias, np.array(fechas, dtype='datetime64[D]'), side='right') - 1
+        return [precios[posicion] if posicion >= 0 else None for posicion in posiciones.tolist()]
+
+    def vigentes(self, tipo_tarifa, fecha):
+        """Diccionario {tipo_cliente: precio} con las tarifas vigentes a la fecha"""
+        precios = {}
+        for tipo_cliente, _ in Tarifa.CLIENTE_CHOICES:
+            precio = self.precio(tipo_cliente, tipo_tarifa, fecha)
+            if precio is not None:
+                precios[tipo_cliente] = precio
+        return precios
+
+
+_lock = threading.Lock()
+_actual = {'version': None, 'resolutor': None}
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, 1, None)
+        version = cache.get(CLAVE_VERSION, 1)
+    return version
+
+
+def resolutor():
+    """Resolutor con las tarifas actuales (se reconstruye solo si hubo cambios)"""
+    version = _version()
+    with _lock:
+        if _actual['resolutor'] is None or _actual['version'] != version:
+            _actual['resolutor'] = ResolutorTarifas.desde_base_de_datos()
+            _actual['version'] = version
+        return _actual['resolutor']
+
+
+def invalidar():
+    """Se llama al crear, editar o eliminar tarifas"""
+    with _lock:
+        _actual['resolutor'] = None
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, 1, None)
@@ -1,3 +1,160 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from .models import Lectura
+from .paginacion import codificar_cursor, decodificar_cursor, paginar_por_cursor
+from .series import lttb, min_max
+
+
+def es_subsecuencia(elegidos, puntos):
+    """Los puntos elegidos aparecen en `puntos` y en el mismo orden"""
+    restantes = iter(puntos)
+    return all(punto in restantes for punto in elegidos)
+
+
+class LttbTests(SimpleTestCase):
+    def setUp(self):
+        self.puntos = [(dia, (dia * 37) % 101) for dia in range(1000)]
+
+    def test_cantidad_menor_a_tres_devuelve_todos(self):
+        for cantidad in (0, 1, 2):
+            self.assertEqual(lttb(self.puntos, cantidad), self.puntos)
+
+    def test_cantidad_mayor_o_igual_al_total_devuelve_todos(self):
+        self.assertEqual(lttb(self.puntos, 1000), self.puntos)
+        self.assertEqual(lttb(self.puntos, 5000), self.puntos)
+        self.assertEqual(lttb([], 10), [])
+
+    def test_devuelve_la_cantidad_pedida_con_el_primero_y_el_ultimo(self):
+        for cantidad in (3, 4, 7, 200, 999):
+            elegidos = lttb(self.puntos, cantidad)
+            self.assertEqual(len(elegidos), cantidad)
+            self.assertEqual(elegidos[0], self.puntos[0])
+            self.assertEqual(elegidos[-1], self.puntos[-1])
+            self.assertTrue(es_subsecuencia(elegidos, self.puntos))
+
+    def test_conserva_un_pico_aislado(self):
+        puntos = [(dia, 10) for dia in range(500)]
+        puntos[250] = (250, 900)
+        self.assertIn((250, 900), lttb(puntos, 20))
+
+    def test_fechas_repetidas(self):
+        # dos lecturas por día (por ejemplo una corrección el mismo día)
+        puntos = [(dia // 2, dia % 7) for dia in range(300)]
+        elegidos = lttb(puntos, 31)
+        self.assertEqual(len(elegidos), 31)
+        self.assertTrue(es_subsecuencia(elegidos, puntos))
+        self.assertEqual([x for x, _ in elegidos], sorted(x for x, _ in elegidos))
+
+
+class MinMaxTests(SimpleTestCase):
+    def setUp(self):
+        self.puntos = [(dia, (dia * 37) % 101) for dia in range(1000)]
+
+    def test_cantidad_mayor_o_igual_al_total_devuelve_todos(self):
+        self.assertEqual(min_max(self.puntos, 1000), self.puntos)
+        self.assertEqual(min_max([], 4), [])
+
+    def test_cantidad_menor_a_dos_devuelve_todos(self):
+        self.assertEqual(min_max(self.puntos, 0), self.puntos)
+        self.assertEqual(min_max(self.puntos, 1), self.puntos)
+
+    def test_cantidad_impar_no_supera_la_pedida(self):
+        for cantidad in (3, 5, 21, 199):
+            elegidos = min_max(self.puntos, cantidad)
+            self.assertLessEqual(len(elegidos), cantidad)
+            self.assertEqual(len(elegidos), cantidad - 1)
+            self.assertTrue(es_subsecuencia(elegidos, self.puntos))
+
+    def test_conserva_el_minimo_y_el_maximo_global(self):
+        puntos = [(dia, 50) for dia in range(400)]
+        puntos[123] = (123, 0)
+        puntos[321] = (321, 999)
+        elegidos = min_max(puntos, 10)
+        self.assertIn((123, 0), elegidos)
+        self.assertIn((321, 999), elegidos)
+
+    def test_tramo_constante_aporta_un_solo_punto(self):
+        puntos = [(dia, 5) for dia in range(100)]
+        self.assertEqual(len(min_max(puntos, 10)), 5)
+
+    def test_fechas_repetidas(self):
+        puntos = [(dia // 3, dia % 11) for dia in range(300)]
+        elegidos = min_max(puntos, 40)
+        self.assertLessEqual(len(elegidos), 40)
+        self.assertTrue(es_subsecuencia(elegidos, puntos))
+
+
+class CursorTests(SimpleTestCase):
+    def test_codificar_y_decodificar(self):
+        for valor in ('2026-10-18', 42):
+            self.assertEqual(decodificar_cursor(codificar_cursor('sig', valor, 7)), ('sig', valor, 7))
+
+    def test_cursores_invalidos(self):
+        for cursor in ('', 'basura', '!!!',
+                       codificar_cursor('otro', '2026-10-18', 7),
+                       codificar_cursor('sig', '2026-10-18', '7'),
+                       codificar_cursor('sig', '2026-10-18', True),
+                       codificar_cursor('sig', ['2026-10-18'], 7),
+                       codificar_cursor('sig', None, 7)):
+            self.assertIsNone(decodificar_cursor(cursor), cursor)
+
+
+class PaginarPorCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        inicio = date(2026, 1, 1)
+        # tres lecturas por fecha: el id desempata el orden dentro de la misma fecha
+        Lectura.objects.bulk_create([
+            Lectura(fecha_lectura=inicio + timedelta(days=numero // 3), consumo_energetico=numero, lectura_actual=numero)
+            for numero in range(23)
+        ])
+        cls.esperadas = list(Lectura.objects.order_by('-fecha_lectura', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def pagina(self, cursor=None):
+        request = self.factory.get('/lecturas/', {'cursor': cursor} if cursor else {})
+        return paginar_por_cursor(request, Lectura.objects.all(), '-fecha_lectura', elementos_por_pagina=5)
+
+    def test_avanzar_recorre_todas_las_filas_una_vez_y_en_orden(self):
+        pagina = self.pagina()
+        self.assertFalse(pagina.has_previous())
+        vistas = []
+        while True:
+            vistas.extend(lectura.id for lectura in pagina)
+            if not pagina.has_next():
+                break
+            pagina = self.pagina(pagina.cursor_siguiente)
+            self.assertTrue(pagina.has_previous())
+        self.assertEqual(vistas, self.esperadas)
+        self.assertEqual(len(pagina), 3)
+
+    def test_retroceder_devuelve_la_pagina_anterior(self):
+        paginas = [self.pagina()]
+        while paginas[-1].has_next():
+            paginas.append(self.pagina(paginas[-1].cursor_siguiente))
+        for anterior, actual in zip(reversed(paginas[:-1]), reversed(paginas[1:])):
+            pagina = self.pagina(actual.cursor_anterior)
+            self.assertEqual([lectura.id for lectura in pagina], [lectura.id for lectura in anterior])
+            self.assertTrue(pagina.has_next())
+
+    def test_primera_pagina_al_retroceder_no_tiene_anterior(self):
+        segunda = self.pagina(self.pagina().cursor_siguiente)
+        primera = self.pagina(segunda.cursor_anterior)
+        self.assertEqual([lectura.id for lectura in primera], self.esperadas[:5])
+        self.assertFalse(primera.has_previous())
+
+    def test_cursor_invalido_muestra_la_primera_pagina(self):
+        for cursor in ('basura', codificar_cursor('sig', 'no-es-fecha', 1)):
+            pagina = self.pagina(cursor)
+            self.assertEqual([lectura.id for lectura in pagina], self.esperadas[:5])
+            self.assertFalse(pagina.has_previous())
+
+    def test_sin_resultados(self):
+        request = self.factory.get('/lecturas/')
+        pagina = paginar_por_cursor(request, Lectura.objects.none(), '-fecha_lectura')
+        self.assertEqual(len(pagina), 0)
+        self.assertFalse(pagina.has_other_pages())
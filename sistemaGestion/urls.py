@@ -29,18 +29,22 @@ urlpatterns = [
     path('medidores/crear/', views.crear_medidor, name='crear_medidor'), # Página para crear un nuevo medidor
     path('medidores/<int:medidor_id>/', views.detalle_medidor, name='detalle_medidor'), # Detalle de medidor
     path('medidores/<int:medidor_id>/ubicacion/', views.ubicacion_medidor, name='ubicacion_medidor'), # Ubicación del medidor
+    path('medidores/<int:medidor_id>/serie/', views.serie_medidor, name='serie_medidor'), # Serie de consumo del medidor (JSON)
     path('medidores/eliminar/<int:medidor_id>/', views.eliminar_medidor, name='eliminar_medidor'), # Eliminar medidor
     path('medidores/editar/<int:medidor_id>/', views.editar_medidor, name='editar_medidor'), # Editar medidor
     
     # Lecturas
     path('lecturas/', views.lista_lecturas, name='lista_lecturas'), # Página de lista de lecturas
     path('lecturas/crear/', views.crear_lectura, name='crear_lectura'), # Página para crear una nueva lectura
+    path('lecturas/importar/', views.importar_lecturas, name='importar_lecturas'), # Importación masiva de lecturas desde CSV
+    path('lecturas/importar/rechazos/', views.descargar_rechazos_lecturas, name='descargar_rechazos_lecturas'), # Descarga de filas rechazadas
     path('lecturas/<int:lectura_id>/', views.detalle_lectura, name='detalle_lectura'), # Detalle de lectura
     path('lecturas/eliminar/<int:lectura_id>/', views.eliminar_lectura, name='eliminar_lectura'), # Eliminar lectura
     path('lecturas/editar/<int:lectura_id>/', views.editar_lectura, name='editar_lectura'), # Editar lectura
     
     # Boletas
     path('boletas/', views.lista_boletas, name='lista_boletas'), # Página de lista de boletas
+    path('boletas/antiguedad/', views.antiguedad_saldos, name='antiguedad_saldos'), # Antigüedad de saldos por cliente
     path('boletas/crear/', views.crear_boleta, name='crear_boleta'), # Página para crear una nueva boleta
     path('boletas/<int:boleta_id>/', views.detalle_boleta, name='detalle_boleta'), # Detalle de boleta
     path('boletas/eliminar/<int:boleta_id>/', views.eliminar_boleta, name='eliminar_boleta'), # Eliminar boleta
@@ -49,6 +53,8 @@ urlpatterns = [
     # Pagos
     path('pagos/', views.lista_pagos, name='lista_pagos'), # Página de lista de pagos
     path('pagos/crear/', views.crear_pago, name='crear_pago'),  # Página para crear un nuevo pago
+    path('pagos/importar/', views.importar_pagos, name='importar_pagos'), # Importación de pagos desde cartolas CSV
+    path('pagos/importar/rechazos/', views.descargar_rechazos_pagos, name='descargar_rechazos_pagos'), # Descarga de filas rechazadas
     path('pagos/<int:pago_id>/', views.detalle_pago, name='detalle_pago'), # Detalle de pago
     path('pagos/eliminar/<int:pago_id>/', views.eliminar_pago, name='eliminar_pago'), # Eliminar pago
     path('pagos/editar/<int:pago_id>/', views.editar_pago, name='editar_pago'), # Editar pago
@@ -81,4 +87,11 @@ urlpatterns = [
     path('notificaciones/pago/<int:notificacion_id>/', views.detalle_notificacion_pago, name='detalle_notificacion_pago'), # Detalle de notificación de pago
     path('notificaciones/pago/editar/<int:notificacion_id>/', views.editar_notificacion_pago, name='editar_notificacion_pago'), # Editar notificación de pago
     path('notificaciones/pago/eliminar/<int:notificacion_id>/', views.eliminar_notificacion_pago, name='eliminar_notificacion_pago'), # Eliminar notificación de pago
-]
\ No newline at end of file
+    
+    # Autocompletado (JSON) para los campos de relación de los formularios
+    path('autocompletar/<str:entidad>/', views.autocompletar, name='autocompletar'), # Búsqueda por prefijo de usuarios, clientes, contratos y medidores
+
+    # Métricas de rendimiento por vista (formato Prometheus)
+    path('metrics/', views.metricas_view, name='metricas'), # Solo administrador
+    path('diagnostico/sql/', views.diagnostico_sql, name='diagnostico_sql'), # Consultas lentas y N+1 (solo administrador)
+]
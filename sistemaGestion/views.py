@@ -4,11 +4,25 @@ El sistema permite gestionar clientes, contratos, medidores, lecturas, boletas,
 usuarios y notificaciones con un sistema de autenticación por roles.
 """
 
+import hmac
+import io
+import os
+import tempfile
+import uuid
+from datetime import date
+
 from django.shortcuts import render, redirect
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.utils.cache import get_conditional_response
+from django.db.models import CharField, F, Q, Value
 from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, Usuario, NotificacionPago, NotificacionLectura
-from .forms import ClienteForm, ContratoForm, MedidorForm, LecturaForm, BoletaForm, PagoForm, TarifaForm, UsuarioForm, NotificacionLecturaForm, NotificacionPagoForm
+from .paginacion import paginar_por_cursor
+from . import estadisticas, reportes, importacion, importacion_pagos, exportacion, metricas, diagnostico, resumenes, series
+from .forms import ClienteForm, ContratoForm, MedidorForm, LecturaForm, BoletaForm, PagoForm, TarifaForm, UsuarioForm, NotificacionLecturaForm, NotificacionPagoForm, ImportarLecturasForm, ImportarPagosForm
+from .forms import etiqueta_usuario, etiqueta_cliente, etiqueta_contrato, etiqueta_medidor
 
 
 # ============================================================================
@@ -48,6 +62,32 @@ def paginar_objetos(request, objetos, elementos_por_pagina=5):
     page_obj = paginator.get_page(page_number)
     return page_obj
 
+#las filas rechazadas de una importacion quedan en un archivo temporal cuya ruta se guarda en la sesion;
+#al guardar una nueva se borra el archivo anterior, y el archivo se borra una vez descargado
+def guardar_ruta_rechazos(request, clave, ruta):
+    anterior = request.session.pop(clave, None)
+    if anterior and os.path.exists(anterior):
+        os.remove(anterior)
+    if ruta:
+        request.session[clave] = ruta
+
+def descarga_rechazos(request, clave, nombre_archivo):
+    """
+    Respuesta con el archivo de rechazos de la sesion (que luego se borra) o None si no hay
+    """
+    ruta = request.session.pop(clave, None)
+    if not ruta or not os.path.exists(ruta):
+        return None
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    os.remove(ruta)
+    response = HttpResponse(contenido, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+#para las listas con muchos registros (lecturas, pagos) se usa paginar_por_cursor,
+#que no cuenta el total ni usa OFFSET, sino que avanza desde el ultimo registro mostrado
+
 
 # ============================================================================
 # VISTAS DE AUTENTICACIÓN (LOGIN Y LOGOUT)
@@ -100,14 +140,11 @@ def dashboard(request):
         return redirect('sistemaGestion:login')
     
     # Obtener estadísticas clave para el dashboard
-    datos = {
-        'total_clientes': Cliente.objects.count(),
-        'total_contratos': Contrato.objects.count(),
-        'total_medidores': Medidor.objects.count(),
-        'lecturas_pendientes': Lectura.objects.count(), 
-        'boletas_emitidas': Boleta.objects.count(),
-        'pagos_realizados': Pago.objects.filter(estado_pago='Pagado').count(),
-    }
+    # se leen de la tabla resumen (sin COUNT), ver estadisticas.py
+    datos = estadisticas.obtener()
+    # consumo de los últimos meses por tipo de cliente, desde los resúmenes mensuales
+    datos['tipos_cliente'] = [etiqueta for _, etiqueta in Cliente.TIPO_CLIENTE_CHOICES]
+    datos['consumo_mensual'] = resumenes.consumo_por_tipo_cliente()
     return render(request, 'dashboard.html', datos)
 
 def interfaz(request):
@@ -147,6 +184,11 @@ def lista_clientes(request):
     
     # Ordenar los resultados por número de cliente
     clientes = clientes.order_by('numero_cliente')
+
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, clientes, 'clientes')
     page_obj = paginar_objetos(request, clientes,)
     
     #en datos se pasa el username quien esta logueado el nombre de la persona que esta logueada
@@ -269,24 +311,22 @@ def detalle_cliente(request, cliente_id):
         return redirect('sistemaGestion:dashboard')
     
     try:
-        cliente = Cliente.objects.get(id=cliente_id)
-        
-        # ✅ CONSULTAS DE RELACIONES - CORREGIDAS
-        # 1. Cliente → Usuario (usuario_asociado)
-        usuario_responsable = Usuario.objects.filter(username=cliente.usuario_asociado).first()
-        
-        # 2. Cliente → Contratos (cliente_numero)  
-        contratos_cliente = Contrato.objects.filter(cliente_numero=cliente.numero_cliente)
-        
-        # 3. Cliente → Boletas (cliente_numero)
-        boletas_cliente = Boleta.objects.filter(cliente_numero=cliente.numero_cliente)
-        
-        # 4. Cliente → Medidores (a través de Contratos)
-        # Primero obtenemos los contratos del cliente
-        contratos_ids = [contrato.numero_contrato for contrato in contratos_cliente]
-        # Luego los medidores de esos contratos
-        medidores_cliente = Medidor.objects.filter(contrato_numero__in=contratos_ids)
-        
+        # el usuario responsable se trae en la misma consulta con un JOIN
+        cliente = Cliente.objects.select_related('usuario').get(id=cliente_id)
+
+        # ✅ CONSULTAS DE RELACIONES (ForeignKey indexadas)
+        # 1. Cliente → Usuario (usuario)
+        usuario_responsable = cliente.usuario
+
+        # 2. Cliente → Contratos (cliente)
+        contratos_cliente = cliente.contratos.all()
+
+        # 3. Cliente → Boletas (cliente)
+        boletas_cliente = cliente.boletas.all()
+
+        # 4. Cliente → Medidores (a través de Contratos, en una sola consulta con JOIN)
+        medidores_cliente = Medidor.objects.filter(contrato__cliente=cliente)
+
     except Cliente.DoesNotExist:
         messages.error(request, 'El cliente no existe')
         return redirect('sistemaGestion:lista_clientes')
@@ -329,7 +369,7 @@ def lista_contratos(request):
     if search_numero:
         contratos = contratos.filter(numero_contrato__icontains=search_numero)
     if search_estado:
-        contratos = contratos.filter(estado__icontains=search_estado)
+        contratos = contratos.filter(estado=search_estado)
     if search_fecha_inicio:
         contratos = contratos.filter(fecha_inicio__gte=search_fecha_inicio)
     if search_fecha_fin:
@@ -337,6 +377,11 @@ def lista_contratos(request):
     
     # Ordenar los resultados por número de contrato
     contratos = contratos.order_by('numero_contrato')
+
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, contratos, 'contratos')
     page_obj = paginar_objetos(request, contratos)
     
     datos = {
@@ -483,12 +528,17 @@ def lista_medidores(request):
     if search_ubicacion:
         medidores = medidores.filter(ubicacion__icontains=search_ubicacion)
     if search_estado:
-        medidores = medidores.filter(estado_medidor__icontains=search_estado)
+        medidores = medidores.filter(estado_medidor=search_estado)
     if search_fecha:
         medidores = medidores.filter(fecha_instalacion__gte=search_fecha)
     
     # Ordenar los resultados
     medidores = medidores.order_by('numero_medidor')
+
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, medidores, 'medidores')
     page_obj = paginar_objetos(request, medidores)
     
     datos = {
@@ -600,13 +650,47 @@ def detalle_medidor(request, medidor_id):
         messages.error(request, 'El medidor no existe')
         return redirect('sistemaGestion:lista_medidores')
     
+    # consumo de los últimos 12 meses desde el resumen mensual (sin recorrer las lecturas)
+    consumos_mensuales = medidor.consumos_mensuales.order_by('-mes')[:12]
+    
     datos = {
         'username': request.session.get('username'),
         'nombre': request.session.get('nombre'),
-        'medidor': medidor
+        'medidor': medidor,
+        'consumos_mensuales': consumos_mensuales,
     }
     return render(request, 'medidores/detalle_medidor.html', datos)
 
+#serie de consumo del medidor en JSON para el gráfico de detalle y ubicación
+#se reduce en el servidor a la cantidad de puntos pedida (ver series.py) y se responde con un
+#ETag, así el navegador revalida y recibe un 304 sin contenido si la serie no cambió
+def serie_medidor(request, medidor_id):
+    if not tiene_permiso(request, 'medidores'):
+        return JsonResponse({'error': 'No tienes permisos para acceder a esta sección'}, status=403)
+
+    if not Medidor.objects.filter(id=medidor_id).exists():
+        return JsonResponse({'error': 'El medidor no existe'}, status=404)
+
+    try:
+        desde = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else None
+        hasta = date.fromisoformat(request.GET['hasta']) if request.GET.get('hasta') else None
+        puntos = int(request.GET.get('puntos', series.PUNTOS_POR_DEFECTO))
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos: use fechas AAAA-MM-DD y un número de puntos'}, status=400)
+    metodo = request.GET.get('metodo', series.LTTB)
+    if metodo not in series.METODOS:
+        return JsonResponse({'error': 'Método inválido, use lttb o minmax'}, status=400)
+    puntos = max(3, min(puntos, series.PUNTOS_MAXIMOS))
+
+    contenido, etag = series.contenido_y_etag(series.serie(medidor_id, desde, hasta, puntos, metodo))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(contenido, content_type='application/json')
+    response['ETag'] = etag
+    # el navegador guarda la serie pero la revalida en cada uso
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 #ubicacion medidor muestra la ubicación e información completa del medidor con imágenes
 #similar a detalle medidor pero con más información mas la ubicación tanto en texto como en mapa
 def ubicacion_medidor(request, medidor_id):
@@ -655,15 +739,19 @@ def lista_lecturas(request):
     if search_fecha:
         lecturas = lecturas.filter(fecha_lectura__gte=search_fecha)
     if search_tipo:
-        lecturas = lecturas.filter(tipo_lectura__icontains=search_tipo)
+        lecturas = lecturas.filter(tipo_lectura=search_tipo)
     if search_consumo_min:
         lecturas = lecturas.filter(consumo_energetico__gte=search_consumo_min)
     if search_consumo_max:
         lecturas = lecturas.filter(consumo_energetico__lte=search_consumo_max)
     
-    # Ordenar los resultados
-    lecturas = lecturas.order_by('-fecha_lectura')
-    page_obj = paginar_objetos(request, lecturas)
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, lecturas, 'lecturas')
+
+    # Ordenar los resultados (paginación por cursor sobre fecha_lectura e id)
+    page_obj = paginar_por_cursor(request, lecturas, '-fecha_lectura')
     
     datos = {
         'username': request.session.get('username'),
@@ -758,6 +846,62 @@ def eliminar_lectura(request, lectura_id):
     }
     return render(request, 'lecturas/eliminar_lectura.html', datos)
 
+#importar lecturas desde un archivo CSV
+#el archivo se procesa fila por fila y las filas rechazadas quedan en un archivo temporal
+#que el usuario puede descargar desde descargar_rechazos_lecturas
+def importar_lecturas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'lecturas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    resumen = None
+    if request.method == 'POST':
+        form = ImportarLecturasForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig', newline='')
+            ruta_rechazos = os.path.join(tempfile.gettempdir(), f'rechazos_lecturas_{uuid.uuid4().hex}.csv')
+            try:
+                with open(ruta_rechazos, 'w', newline='', encoding='utf-8') as rechazos:
+                    resumen = importacion.importar_lecturas(archivo, rechazos, form.cleaned_data['delimitador'])
+            except (ValueError, UnicodeDecodeError) as error:
+                # la importación es todo o nada: no se guardó ninguna lectura del archivo
+                os.remove(ruta_rechazos)
+                messages.error(request, f'No se pudo importar el archivo, no se guardó ninguna lectura: {error}')
+            else:
+                if not resumen['rechazadas']:
+                    os.remove(ruta_rechazos)
+                    ruta_rechazos = None
+                guardar_ruta_rechazos(request, 'rechazos_lecturas', ruta_rechazos)
+                messages.success(request, f"Se importaron {resumen['importadas']} lecturas")
+    else:
+        form = ImportarLecturasForm()
+
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'form': form,
+        'resumen': resumen,
+    }
+    return render(request, 'lecturas/importar_lecturas.html', datos)
+
+#descarga el archivo con las filas rechazadas de la ultima importacion del usuario (una sola vez)
+def descargar_rechazos_lecturas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'lecturas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    response = descarga_rechazos(request, 'rechazos_lecturas', 'lecturas_rechazadas.csv')
+    if response is None:
+        messages.error(request, 'No hay filas rechazadas para descargar')
+        return redirect('sistemaGestion:importar_lecturas')
+    return response
+
 #detalle lectura
 def detalle_lectura(request, lectura_id):
     """Vista de detalle para una lectura específica"""
@@ -809,7 +953,7 @@ def lista_boletas(request):
     if search_fecha_vencimiento:
         boletas = boletas.filter(fecha_vencimiento__lte=search_fecha_vencimiento)
     if search_estado:
-        boletas = boletas.filter(estado__icontains=search_estado)
+        boletas = boletas.filter(estado=search_estado)
     if search_monto_min:
         boletas = boletas.filter(monto_total__gte=search_monto_min)
     if search_monto_max:
@@ -817,23 +961,29 @@ def lista_boletas(request):
     
     # Ordenar los resultados
     boletas = boletas.order_by('-fecha_emision')
+
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, boletas, 'boletas')
     page_obj = paginar_objetos(request, boletas)
     
-    # Estadísticas usando información de boletas
-    estadisticas = {
-        'total_servicios': Boleta.objects.count(),
-        'servicios_pagados': Pago.objects.filter(estado_pago='Confirmado').count(),
-        'servicios_pendientes': Boleta.objects.filter(estado='Pendiente').count(),
-        'gasto_total_presupuestado': sum(boleta.monto_total for boleta in boletas),
-        'total_pagado': sum(pago.monto_pagado for pago in Pago.objects.filter(estado_pago='Confirmado')),
+    # Estadísticas calculadas en la base de datos sobre las boletas filtradas (con cache, ver reportes.py)
+    filtros = {
+        'fecha_emision': search_fecha_emision,
+        'fecha_vencimiento': search_fecha_vencimiento,
+        'estado': search_estado,
+        'monto_min': search_monto_min,
+        'monto_max': search_monto_max,
     }
+    estadisticas_boletas = reportes.estadisticas_boletas(boletas, filtros)
     
     datos = {
         'username': request.session.get('username'),
         'nombre': request.session.get('nombre'),
         'boletas': page_obj,
         'page_obj': page_obj,
-        'estadisticas': estadisticas,
+        'estadisticas': estadisticas_boletas,
         'search_fecha_emision': search_fecha_emision,
         'search_fecha_vencimiento': search_fecha_vencimiento,
         'search_estado': search_estado,
@@ -842,6 +992,44 @@ def lista_boletas(request):
     }
     return render(request, 'boletas/lista_boletas.html', datos)
 
+#antigüedad de saldos: saldo impago de cada cliente por tramos de días de atraso a una fecha de corte
+#se calcula con una sola consulta agrupada y se guarda en cache por fecha de corte (ver reportes.py)
+def antiguedad_saldos(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'boletas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    search_corte = request.GET.get('corte', '')
+    try:
+        corte = date.fromisoformat(search_corte) if search_corte else date.today()
+    except ValueError:
+        messages.error(request, 'La fecha de corte no es válida, se usa la fecha de hoy')
+        corte = date.today()
+    reporte = reportes.antiguedad_saldos(corte)
+    tramos = [(clave, etiqueta) for clave, etiqueta, _, _ in reportes.TRAMOS_ANTIGUEDAD]
+
+    # Exportación completa (CSV o JSON Lines) de todos los clientes del reporte
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        campos = ['numero_cliente', 'nombre'] + [clave for clave, _ in tramos] + ['total', 'boletas']
+        filas = ([cliente[campo] for campo in campos] for cliente in reporte['clientes'])
+        return exportacion.exportar_filas(formato, filas, campos, f'antiguedad_saldos_{corte.isoformat()}')
+    page_obj = paginar_objetos(request, reporte['clientes'], 20)
+
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'clientes': page_obj,
+        'page_obj': page_obj,
+        'totales': reporte['totales'],
+        'corte': corte,
+        'search_corte': corte.isoformat(),
+    }
+    return render(request, 'boletas/antiguedad_saldos.html', datos)
+
 #crear boleta
 def crear_boleta(request):
     if not usuario_logueado(request):
@@ -969,9 +1157,9 @@ def lista_tarifas(request):
     
     # Aplicar filtros si existen
     if search_tipo_cliente:
-        tarifas = tarifas.filter(tipo_cliente__icontains=search_tipo_cliente)
+        tarifas = tarifas.filter(tipo_cliente=search_tipo_cliente)
     if search_tipo_tarifa:
-        tarifas = tarifas.filter(tipo_tarifa__icontains=search_tipo_tarifa)
+        tarifas = tarifas.filter(tipo_tarifa=search_tipo_tarifa)
     if search_precio_min:
         tarifas = tarifas.filter(precio__gte=search_precio_min)
     if search_precio_max:
@@ -981,6 +1169,11 @@ def lista_tarifas(request):
     
     # Ordenar los resultados
     tarifas = tarifas.order_by('tipo_cliente', 'tipo_tarifa')
+
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, tarifas, 'tarifas')
     page_obj = paginar_objetos(request, tarifas)
     
     datos = {
@@ -1276,9 +1469,9 @@ def lista_pagos(request):
     if search_fecha:
         pagos = pagos.filter(fecha_pago__gte=search_fecha)
     if search_metodo:
-        pagos = pagos.filter(metodo_pago__icontains=search_metodo)
+        pagos = pagos.filter(metodo_pago=search_metodo)
     if search_estado:
-        pagos = pagos.filter(estado_pago__icontains=search_estado)
+        pagos = pagos.filter(estado_pago=search_estado)
     if search_referencia:
         pagos = pagos.filter(numero_referencia__icontains=search_referencia)
     if search_monto_min:
@@ -1286,9 +1479,13 @@ def lista_pagos(request):
     if search_monto_max:
         pagos = pagos.filter(monto_pagado__lte=search_monto_max)
     
-    # Ordenar los resultados
-    pagos = pagos.order_by('-fecha_pago')
-    page_obj = paginar_objetos(request, pagos)
+    # Exportación completa (CSV o JSON Lines) con los mismos filtros
+    formato = exportacion.formato_solicitado(request)
+    if formato:
+        return exportacion.exportar(formato, pagos, 'pagos')
+
+    # Ordenar los resultados (paginación por cursor sobre fecha_pago e id)
+    page_obj = paginar_por_cursor(request, pagos, '-fecha_pago')
     
     datos = {
         'username': request.session.get('username'),
@@ -1304,6 +1501,62 @@ def lista_pagos(request):
     }
     return render(request, 'pagos/lista_pagos.html', datos)
 
+#importar pagos desde una cartola bancaria o archivo de recaudacion (CSV)
+#igual que importar_lecturas: las filas rechazadas quedan en un archivo temporal
+#que el usuario puede descargar desde descargar_rechazos_pagos
+def importar_pagos(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'pagos'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    resumen = None
+    if request.method == 'POST':
+        form = ImportarPagosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig', newline='')
+            ruta_rechazos = os.path.join(tempfile.gettempdir(), f'rechazos_pagos_{uuid.uuid4().hex}.csv')
+            try:
+                with open(ruta_rechazos, 'w', newline='', encoding='utf-8') as rechazos:
+                    resumen = importacion_pagos.importar_pagos(archivo, rechazos, form.cleaned_data['delimitador'])
+            except (ValueError, UnicodeDecodeError) as error:
+                # la importación es todo o nada: no se guardó ningún pago del archivo
+                os.remove(ruta_rechazos)
+                messages.error(request, f'No se pudo importar el archivo, no se guardó ningún pago: {error}')
+            else:
+                if not resumen['rechazados']:
+                    os.remove(ruta_rechazos)
+                    ruta_rechazos = None
+                guardar_ruta_rechazos(request, 'rechazos_pagos', ruta_rechazos)
+                messages.success(request, f"Se importaron {resumen['importados']} pagos")
+    else:
+        form = ImportarPagosForm()
+
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'form': form,
+        'resumen': resumen,
+    }
+    return render(request, 'pagos/importar_pagos.html', datos)
+
+#descarga el archivo con las filas rechazadas de la ultima importacion de pagos del usuario (una sola vez)
+def descargar_rechazos_pagos(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'pagos'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    response = descarga_rechazos(request, 'rechazos_pagos', 'pagos_rechazados.csv')
+    if response is None:
+        messages.error(request, 'No hay filas rechazadas para descargar')
+        return redirect('sistemaGestion:importar_pagos')
+    return response
+
 #crear pago
 def crear_pago(request):
     if not usuario_logueado(request):
@@ -1424,45 +1677,34 @@ def lista_notificaciones(request):
     search_tipo = request.GET.get('tipo', '')
     search_mensaje = request.GET.get('mensaje', '')
     
-    # Obtener notificaciones de ambos tipos con filtros
-    notificaciones_lectura = NotificacionLectura.objects.all().order_by('id')
-    notificaciones_pago = NotificacionPago.objects.all().order_by('id')
+    # Cada tipo de notificación se lleva a las mismas columnas (id, tipo, titulo, mensaje)
+    # para combinarlas en la base de datos con UNION ALL
+    notificaciones_lectura = NotificacionLectura.objects.annotate(
+        tipo=Value('Lectura', output_field=CharField()),
+        titulo=Value('Notificación de Lectura', output_field=CharField()),
+        mensaje=F('registro_consumo'),
+    ).values('id', 'tipo', 'titulo', 'mensaje')
+    notificaciones_pago = NotificacionPago.objects.annotate(
+        tipo=Value('Pago', output_field=CharField()),
+        titulo=Value('Notificación de Pago', output_field=CharField()),
+        mensaje=F('deuda_pendiente'),
+    ).values('id', 'tipo', 'titulo', 'mensaje')
     
     # Aplicar filtros de texto en el mensaje
     if search_mensaje:
         notificaciones_lectura = notificaciones_lectura.filter(registro_consumo__icontains=search_mensaje)
         notificaciones_pago = notificaciones_pago.filter(deuda_pendiente__icontains=search_mensaje)
     
-    # Combinar ambos tipos de notificaciones con su ID para acciones CRUD
-    notificaciones = []
-    
-    # Agregar notificaciones de lectura si no se filtra por tipo o si es "Lectura"
-    if not search_tipo or search_tipo == 'Lectura':
-        for notif in notificaciones_lectura:
-            notificaciones.append({
-                'id': notif.id,
-                'tipo': 'Lectura',
-                'titulo': 'Notificación de Lectura',
-                'mensaje': notif.registro_consumo,
-                'url_detalle': f'/notificaciones/lectura/{notif.id}/',
-                'url_editar': f'/notificaciones/lectura/editar/{notif.id}/',
-                'url_eliminar': f'/notificaciones/lectura/eliminar/{notif.id}/'
-            })
-    
-    # Agregar notificaciones de pago si no se filtra por tipo o si es "Pago"
-    if not search_tipo or search_tipo == 'Pago':
-        for notif in notificaciones_pago:
-            notificaciones.append({
-                'id': notif.id,
-                'tipo': 'Pago',
-                'titulo': 'Notificación de Pago',
-                'mensaje': notif.deuda_pendiente,
-                'url_detalle': f'/notificaciones/pago/{notif.id}/',
-                'url_editar': f'/notificaciones/pago/editar/{notif.id}/',
-                'url_eliminar': f'/notificaciones/pago/eliminar/{notif.id}/'
-            })
-    
-    # Paginar la lista combinada de notificaciones
+    # Filtrar por tipo o combinar ambos; primero las de lectura y luego las de pago, cada una por id
+    if search_tipo == 'Lectura':
+        notificaciones = notificaciones_lectura
+    elif search_tipo == 'Pago':
+        notificaciones = notificaciones_pago
+    else:
+        notificaciones = notificaciones_lectura.union(notificaciones_pago, all=True)
+    notificaciones = notificaciones.order_by('tipo', 'id')
+    
+    # Paginar en la base de datos (COUNT y LIMIT/OFFSET), solo se carga la página visible
     page_obj = paginar_objetos(request, notificaciones)
     
     datos = {
@@ -1518,7 +1760,7 @@ def detalle_notificacion_lectura(request, notificacion_id):
         return redirect('sistemaGestion:dashboard')
     
     try:
-        notificacion = NotificacionLectura.objects.get(id=notificacion_id)
+        notificacion = NotificacionLectura.objects.select_related('medidor', 'lectura').get(id=notificacion_id)
     except NotificacionLectura.DoesNotExist:
         messages.error(request, 'La notificación no existe')
         return redirect('sistemaGestion:lista_notificaciones')
@@ -1765,4 +2007,86 @@ def perfil_usuario(request):
         'usuario': usuario
     }
     
-    return render(request, 'usuarios/perfil_usuario.html', datos)
\ No newline at end of file
+    return render(request, 'usuarios/perfil_usuario.html', datos)
+
+# ============================================================================
+# AUTOCOMPLETADO (JSON) PARA LOS CAMPOS DE RELACIÓN DE LOS FORMULARIOS
+# ============================================================================
+
+# cantidad máxima de resultados que devuelve el autocompletado
+LIMITE_AUTOCOMPLETAR = 10
+
+# entidad: (modelo, campos indexados donde se busca por prefijo, etiqueta, módulos que lo usan)
+AUTOCOMPLETAR = {
+    'usuarios': (Usuario, ['username'], etiqueta_usuario, ['clientes']),
+    'clientes': (Cliente, ['numero_cliente', 'nombre'], etiqueta_cliente, ['contratos', 'boletas']),
+    'contratos': (Contrato, ['numero_contrato'], etiqueta_contrato, ['medidores']),
+    'medidores': (Medidor, ['numero_medidor'], etiqueta_medidor, ['lecturas']),
+}
+
+#devuelve los primeros registros cuyo numero (o nombre) comienza con el texto buscado
+#la busqueda por prefijo no distingue mayusculas, igual que la busqueda por contenido de los listados;
+#en MySQL (collation case-insensitive) se traduce a LIKE 'texto%' y sigue usando el indice de la columna
+def autocompletar(request, entidad):
+    if entidad not in AUTOCOMPLETAR:
+        return JsonResponse({'error': 'Entidad no válida'}, status=404)
+
+    modelo, campos, etiqueta, modulos = AUTOCOMPLETAR[entidad]
+    if not any(tiene_permiso(request, modulo) for modulo in modulos):
+        return JsonResponse({'error': 'No tienes permisos para acceder a esta sección'}, status=403)
+
+    texto = request.GET.get('q', '').strip()
+    if not texto:
+        return JsonResponse({'resultados': []})
+
+    filtro = Q()
+    for campo in campos:
+        filtro |= Q(**{f'{campo}__istartswith': texto})
+    objetos = modelo.objects.filter(filtro).order_by(campos[0])[:LIMITE_AUTOCOMPLETAR]
+
+    resultados = [{'id': objeto.pk, 'texto': etiqueta(objeto)} for objeto in objetos]
+    return JsonResponse({'resultados': resultados})
+
+# ============================================================================
+# MÉTRICAS DE RENDIMIENTO (FORMATO PROMETHEUS)
+# ============================================================================
+
+#histogramas de duracion, consultas SQL y renderizado por vista (ver metricas.py)
+#solo para el administrador, o para el recolector si envia el token METRICAS_TOKEN
+def metricas_view(request):
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    # comparación en tiempo constante para no filtrar el token por diferencias de tiempo
+    autorizado_token = bool(token) and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+    if not autorizado_token and request.session.get('rol') != 'Administrador':
+        return HttpResponse('No tienes permisos para acceder a esta sección', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(metricas.registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ============================================================================
+# DIAGNÓSTICO DE CONSULTAS (CONSULTAS LENTAS Y N+1)
+# ============================================================================
+
+#resumen de los hallazgos del modo diagnostico (ver diagnostico.py), solo para el administrador
+def diagnostico_sql(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if request.session.get('rol') != 'Administrador':
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    tipo = request.GET.get('tipo', '')
+    hallazgos = diagnostico.leer_hallazgos()
+    if tipo:
+        hallazgos = [hallazgo for hallazgo in hallazgos if hallazgo['tipo'] == tipo]
+
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'activo': getattr(settings, 'DIAGNOSTICO_SQL', False),
+        'umbral_ms': diagnostico.umbral_ms(),
+        'repeticiones': diagnostico.repeticiones_n_mas_1(),
+        'archivo': diagnostico.archivo_registro(),
+        'grupos': diagnostico.resumen_hallazgos(hallazgos),
+        'search_tipo': tipo,
+    }
+    return render(request, 'diagnostico/diagnostico_sql.html', datos)
@@ -25,4 +25,200 @@ document.addEventListener('DOMContentLoaded', function() {
         password.addEventListener('input', validarPasswords);
         confirmarPassword.addEventListener('input', validarPasswords);
     }
-});
\ No newline at end of file
+});
+
+// Autocompletado de los campos de relación (cliente, contrato, usuario, medidor)
+// Los <select data-autocompletar="url"> solo traen la opción seleccionada; este bloque
+// agrega un campo de texto que busca en el servidor a medida que se escribe
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-autocompletar]').forEach(function(select) {
+        const url = select.dataset.autocompletar;
+        const contenedor = document.createElement('div');
+        contenedor.className = 'position-relative';
+        const buscador = document.createElement('input');
+        buscador.type = 'text';
+        buscador.className = 'form-control';
+        buscador.autocomplete = 'off';
+        buscador.placeholder = 'Escriba para buscar...';
+        const lista = document.createElement('div');
+        lista.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        lista.style.zIndex = 1000;
+
+        const seleccionada = select.options[select.selectedIndex];
+        if (seleccionada && seleccionada.value) {
+            buscador.value = seleccionada.text;
+        }
+        select.classList.add('d-none');
+        select.parentNode.insertBefore(contenedor, select);
+        contenedor.appendChild(buscador);
+        contenedor.appendChild(lista);
+        contenedor.appendChild(select);
+
+        function cerrarLista() {
+            lista.classList.add('d-none');
+            lista.innerHTML = '';
+        }
+
+        function elegir(id, texto) {
+            let opcion = Array.from(select.options).find(function(o) { return o.value === String(id); });
+            if (!opcion) {
+                opcion = new Option(texto, id);
+                select.add(opcion);
+            }
+            select.value = String(id);
+            buscador.value = texto;
+            cerrarLista();
+        }
+
+        let espera = null;
+        let consulta = 0;
+        buscador.addEventListener('input', function() {
+            clearTimeout(espera);
+            const texto = buscador.value.trim();
+            if (!texto) {
+                select.value = '';
+                cerrarLista();
+                return;
+            }
+            // se espera a que el usuario deje de escribir para no consultar en cada tecla
+            espera = setTimeout(function() {
+                const numero = ++consulta;
+                fetch(url + '?q=' + encodeURIComponent(texto), {headers: {'Accept': 'application/json'}})
+                    .then(function(respuesta) { return respuesta.json(); })
+                    .then(function(datos) {
+                        if (numero !== consulta) {
+                            return;  // llegó una respuesta más nueva
+                        }
+                        lista.innerHTML = '';
+                        (datos.resultados || []).forEach(function(resultado) {
+                            const item = document.createElement('button');
+                            item.type = 'button';
+                            item.className = 'list-group-item list-group-item-action';
+                            item.textContent = resultado.texto;
+                            item.addEventListener('mousedown', function(evento) {
+                                evento.preventDefault();
+                                elegir(resultado.id, resultado.texto);
+                            });
+                            lista.appendChild(item);
+                        });
+                        if (!lista.children.length) {
+                            const vacio = document.createElement('div');
+                            vacio.className = 'list-group-item text-muted';
+                            vacio.textContent = 'Sin resultados';
+                            lista.appendChild(vacio);
+                        }
+                        lista.classList.remove('d-none');
+                    })
+                    .catch(cerrarLista);
+            }, 250);
+        });
+
+        buscador.addEventListener('keydown', function(evento) {
+            if (evento.key === 'Escape') {
+                cerrarLista();
+            } else if (evento.key === 'Enter' && !lista.classList.contains('d-none')) {
+                evento.preventDefault();
+                const primero = lista.querySelector('button');
+                if (primero) {
+                    primero.dispatchEvent(new MouseEvent('mousedown'));
+                }
+            }
+        });
+
+        buscador.addEventListener('blur', function() {
+            // si se borró o cambió el texto sin elegir, se restaura la opción seleccionada
+            const actual = select.options[select.selectedIndex];
+            buscador.value = actual && actual.value ? actual.text : '';
+            cerrarLista();
+        });
+    });
+});
+
+// Gráfico del historial de consumo de un medidor (grafico_consumo.html)
+// La serie se pide ya reducida a unos pocos puntos por píxel (el servidor la reduce con LTTB)
+// y se dibuja como una línea SVG; el navegador la revalida con el ETag de la respuesta
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-serie]').forEach(function(grafico) {
+        const svg = grafico.querySelector('svg');
+        const rango = grafico.querySelector('[data-serie-rango]');
+        const estado = grafico.querySelector('[data-serie-estado]');
+        const NS = 'http://www.w3.org/2000/svg';
+
+        function texto(x, y, contenido, ancla) {
+            const elemento = document.createElementNS(NS, 'text');
+            elemento.setAttribute('x', x);
+            elemento.setAttribute('y', y);
+            elemento.setAttribute('font-size', '11');
+            elemento.setAttribute('fill', '#6c757d');
+            elemento.setAttribute('text-anchor', ancla || 'start');
+            elemento.textContent = contenido;
+            svg.appendChild(elemento);
+        }
+
+        function dibujar(datos) {
+            svg.innerHTML = '';
+            const puntos = datos.puntos || [];
+            if (!puntos.length) {
+                estado.textContent = 'Sin lecturas en el período';
+                return;
+            }
+            const ancho = svg.clientWidth || 600;
+            const alto = svg.clientHeight || 180;
+            const margen = {izquierda: 50, derecha: 10, arriba: 10, abajo: 20};
+            const tiempos = puntos.map(function(punto) { return Date.parse(punto[0]); });
+            const valores = puntos.map(function(punto) { return punto[1]; });
+            const minimoX = tiempos[0], maximoX = tiempos[tiempos.length - 1];
+            const maximoY = Math.max.apply(null, valores) || 1;
+            const escalaX = function(t) {
+                return margen.izquierda + (maximoX > minimoX ? (t - minimoX) / (maximoX - minimoX) : 0.5) * (ancho - margen.izquierda - margen.derecha);
+            };
+            const escalaY = function(v) {
+                return margen.arriba + (1 - v / maximoY) * (alto - margen.arriba - margen.abajo);
+            };
+
+            const linea = document.createElementNS(NS, 'polyline');
+            linea.setAttribute('fill', 'none');
+            linea.setAttribute('stroke', '#0d6efd');
+            linea.setAttribute('stroke-width', '1.5');
+            linea.setAttribute('points', puntos.map(function(punto, indice) {
+                return escalaX(tiempos[indice]).toFixed(1) + ',' + escalaY(punto[1]).toFixed(1);
+            }).join(' '));
+            svg.appendChild(linea);
+
+            texto(margen.izquierda - 5, margen.arriba + 10, maximoY, 'end');
+            texto(margen.izquierda - 5, alto - margen.abajo, 0, 'end');
+            texto(margen.izquierda, alto - 5, puntos[0][0]);
+            texto(ancho - margen.derecha, alto - 5, puntos[puntos.length - 1][0], 'end');
+            estado.textContent = datos.total_lecturas + ' lecturas' +
+                (datos.total_lecturas > puntos.length ? ', se muestran ' + puntos.length + ' puntos' : '');
+        }
+
+        function cargar() {
+            const parametros = new URLSearchParams();
+            // del orden de un punto cada 3 píxeles
+            parametros.set('puntos', Math.max(50, Math.round((svg.clientWidth || 600) / 3)));
+            if (rango && rango.value) {
+                const desde = new Date();
+                desde.setMonth(desde.getMonth() - parseInt(rango.value, 10));
+                parametros.set('desde', desde.toISOString().slice(0, 10));
+            }
+            estado.textContent = 'Cargando...';
+            fetch(grafico.dataset.serie + '?' + parametros.toString(), {headers: {'Accept': 'application/json'}})
+                .then(function(respuesta) {
+                    if (!respuesta.ok) {
+                        throw new Error(respuesta.status);
+                    }
+                    return respuesta.json();
+                })
+                .then(dibujar)
+                .catch(function() { estado.textContent = 'No se pudo cargar el historial'; });
+        }
+
+        if (rango) {
+            rango.addEventListener('change', cargar);
+        }
+        cargar();
+    });
+});